@@ -1,11 +1,15 @@
 #!python
 #cython: boundscheck=False, initializedcheck=False, cdivision=True, wraparound=False
 
-from libc.math cimport sin, cos
+from libc.math cimport sin, cos, atan2, sqrt, fabs, INFINITY
+from libc.stdlib cimport malloc, free
 from cpython cimport array
 
 
 cdef dict peers = {}
+# A template for new float arrays.
+cdef array.array darray = array.array('d', [])
+cdef array.array iarray = array.array('i', [])
 
 
 # ______________________________________________________________________ UPDATE
@@ -39,6 +43,19 @@ cdef rotate(double[::1] points, int length, double angle,
         points[i+1] = points[i+1] + orig1
 
 
+cdef transform(double[::1] hints, double[::1] points, int length,
+               double width, double height, double pos0, double pos1,
+               double angle, double orig0, double orig1):
+    cdef double x, y, c = cos(angle), s = sin(angle)
+    cdef Py_ssize_t i
+
+    for i in range(0, length, 2):
+        x = hints[i] * width + pos0 - orig0
+        y = hints[i+1] * height + pos1 - orig1
+        points[i] = x * c - y * s + orig0
+        points[i+1] = x * s + y * c + orig1
+
+
 cdef calc_bbox(double[::1] points, int length, double[::1] bbox):
     cdef Py_ssize_t i, h
     cdef double ipt, i1pt
@@ -57,8 +74,8 @@ cdef calc_bbox(double[::1] points, int length, double[::1] bbox):
             bbox[3] = i1pt
 
 
-cdef calc_segboxes(double[::1] points, Py_ssize_t[::1] polids,
-                   Py_ssize_t[::1] ptids, int[::1] plens, int length,
+cdef calc_segboxes(double[::1] points, int[::1] polids,
+                   int[::1] ptids, int[::1] plens, int length,
                    double[::1] bbox,
                    double[::1] blefts, double[::1] bbotts,
                    double[::1] brghts, double[::1] btops):
@@ -133,11 +150,32 @@ cdef calc_polboxes(double[::1] points, int[::1] plens, double[::1] bbox,
         strt = strt + plens[p] * 2
 
 
+cdef calc_boxes(dict bounds, dict frames, bbox=None):
+    if bbox is None:
+        bbox = array.array('d', [float("inf"), float("inf"), 0., 0.])
+    else:
+        bbox[0] = bbox[1] = float("inf")
+        bbox[2] = bbox[3] = 0.
+
+    if not frames['pre_check']:
+        calc_bbox(bounds['points'], bounds['length'], bbox)
+    elif frames['seg']:
+        calc_segboxes(bounds['points'], bounds['pol_ids'], bounds['pt_ids'],
+                      bounds['pol_lens'], bounds['length'], bbox,
+                      bounds['lefts'], bounds['botts'], bounds['rights'],
+                      bounds['tops'])
+    else:
+        calc_polboxes(bounds['points'], bounds['pol_lens'], bbox,
+                      bounds['lefts'], bounds['botts'], bounds['rights'],
+                      bounds['tops'])
+    return bbox
+
+
 # ________________________________________________________________ INTERSECTION
-cdef intersection(double[::1] pts, Py_ssize_t[::1] ptids, int[::1] plens,
-                  Py_ssize_t[::1] opens,
-                  double[::1] t_pts, Py_ssize_t[::1] t_ptis, int[::1] t_plens,
-                  Py_ssize_t[::1] t_opens):
+cdef intersection(double[::1] pts, int[::1] ptids, int[::1] plens,
+                  int[::1] opens,
+                  double[::1] t_pts, int[::1] t_ptis, int[::1] t_plens,
+                  int[::1] t_opens):
 
     cdef Py_ssize_t k, i, i1, i2, i3, j, j1, j2, j3, p, t_p, \
         t_strt, strt, o = 0, t_o = 0
@@ -146,6 +184,7 @@ cdef intersection(double[::1] pts, Py_ssize_t[::1] ptids, int[::1] plens,
 
     strt = 0
     for p in range(len(plens)):
+        o = 0
         for k in range(len(opens)):
             if opens[k] == p:
                 o = 2
@@ -167,6 +206,7 @@ cdef intersection(double[::1] pts, Py_ssize_t[::1] ptids, int[::1] plens,
 
             t_strt = 0
             for t_p in range(len(t_plens)):
+                t_o = 0
                 for l in range(len(t_opens)):
                     if t_opens[l] == t_p:
                         t_o = 2
@@ -206,12 +246,12 @@ cdef intersection(double[::1] pts, Py_ssize_t[::1] ptids, int[::1] plens,
     return False
 
 
-cdef intersection_pc(double[::1] pts, Py_ssize_t[::1] ptids, int le,
-                     int[::1] plens, Py_ssize_t[::1] opens, double[::1] lefts,
+cdef intersection_pc(double[::1] pts, int[::1] ptids, int le,
+                     int[::1] plens, int[::1] opens, double[::1] lefts,
                      double[::1] botts, double[::1] rghts, double[::1] tops,
                      double[::1] t_box, double[::1] t_pts,
-                     Py_ssize_t[::1] t_ptis, int t_le, int[::1] t_plens,
-                     Py_ssize_t[::1] t_opens, double[::1] t_lefts,
+                     int[::1] t_ptis, int t_le, int[::1] t_plens,
+                     int[::1] t_opens, double[::1] t_lefts,
                      double[::1] t_botts, double[::1] t_rghts,
                      double[::1] t_tops):
 
@@ -222,6 +262,7 @@ cdef intersection_pc(double[::1] pts, Py_ssize_t[::1] ptids, int le,
 
     strt = 0
     for p in range(len(plens)):
+        o = 0
         for k in range(len(opens)):
             if opens[k] == p:
                 o = 2
@@ -251,6 +292,7 @@ cdef intersection_pc(double[::1] pts, Py_ssize_t[::1] ptids, int le,
 
             t_strt = 0
             for t_p in range(len(t_plens)):
+                t_o = 0
                 for l in range(len(t_opens)):
                     if t_opens[l] == t_p:
                         t_o = 2
@@ -299,8 +341,85 @@ cdef intersection_pc(double[::1] pts, Py_ssize_t[::1] ptids, int le,
     return False
 
 
-def intersection_w(double[::1] pts, Py_ssize_t[::1] ptids, int[::1] plens,
-                   Py_ssize_t[::1] opens, double[::1] t_box):
+cpdef local_crossing(double[::1] pts, int[::1] ptids, int[::1] plens,
+                     int[::1] opens, double[::1] box, double[::1] m,
+                     double[::1] grid, int[::1] cells, int[::1] sides,
+                     double[::1] segs, int[::1] ids):
+    '''Segment intersection between a frame's sides and the indexed sides of
+        another (see define_index), in the latter's hint space: Each side that
+        reaches the other frame's [box] is mapped through [m] (world to hint
+        space) and checked against the sides listed in the grid cells that its
+        box covers.
+    '''
+    cdef Py_ssize_t p, k, i, i2, s, strt = 0, o, row, col, cell
+    cdef Py_ssize_t c0, c1, r0, r1
+    cdef int pl, cols = <int>grid[4], rows = <int>grid[5]
+    cdef double x1, y1, x2, y2, u0, u1, w0, w1
+    cdef double v10, v11, v20, v21, v30, v31, v40, v41
+
+    for p in range(plens.shape[0]):
+        o = 0
+        for k in range(opens.shape[0]):
+            if opens[k] == p:
+                o = 2
+                break
+        pl = plens[p]
+        for i in range(strt, strt + pl * 2 - o, 2):
+            i2 = i + 2 if ptids[i] < pl - 1 else strt
+            x1 = pts[i]
+            y1 = pts[i + 1]
+            x2 = pts[i2]
+            y2 = pts[i2 + 1]
+            if (max(x1, x2) < box[0] or min(x1, x2) > box[2]
+                    or max(y1, y2) < box[1] or min(y1, y2) > box[3]):
+                continue
+            v10 = m[0] * x1 + m[1] * y1 + m[4]
+            v11 = m[2] * x1 + m[3] * y1 + m[5]
+            v20 = m[0] * x2 + m[1] * y2 + m[4]
+            v21 = m[2] * x2 + m[3] * y2 + m[5]
+            u0 = (min(v10, v20) - grid[0]) * grid[2]
+            u1 = (max(v10, v20) - grid[0]) * grid[2]
+            w0 = (min(v11, v21) - grid[1]) * grid[3]
+            w1 = (max(v11, v21) - grid[1]) * grid[3]
+            if u1 < 0 or u0 > cols or w1 < 0 or w0 > rows:
+                continue
+            c0 = 0 if u0 < 0 else <Py_ssize_t>u0
+            c1 = cols - 1 if u1 >= cols else <Py_ssize_t>u1
+            r0 = 0 if w0 < 0 else <Py_ssize_t>w0
+            r1 = rows - 1 if w1 >= rows else <Py_ssize_t>w1
+            if c0 >= cols:
+                c0 = cols - 1
+            if r0 >= rows:
+                r0 = rows - 1
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    cell = row * cols + col
+                    for k in range(cells[cell], cells[cell + 1]):
+                        s = sides[k] * 4
+                        v30 = segs[s]
+                        v31 = segs[s + 1]
+                        v40 = segs[s + 2]
+                        v41 = segs[s + 3]
+                        # Segment intersection detection method (see
+                        # intersection).
+                        if (((v40 - v30) * (v11 - v31)
+                             - (v10 - v30) * (v41 - v31) > 0)
+                                == ((v40 - v30) * (v21 - v31)
+                                    - (v20 - v30) * (v41 - v31) > 0)):
+                            continue
+                        elif (((v20 - v10) * (v31 - v11)
+                               - (v30 - v10) * (v21 - v11) > 0)
+                                == ((v20 - v10) * (v41 - v11)
+                                    - (v40 - v10) * (v21 - v11) > 0)):
+                            continue
+                        return [p, ptids[i], ids[sides[k] * 2],
+                                ids[sides[k] * 2 + 1]]
+        strt = strt + pl * 2
+    return False
+
+
+def intersection_w(double[::1] pts, int[::1] ptids, int[::1] plens,
+                   int[::1] opens, double[::1] t_box):
     cdef Py_ssize_t p, k, i, i1, i2, i3, j, j1, j2, j3, t_strt, o = 0
     cdef double v10, v11, v20, v21, v30, v31, v40, v41
     cdef int pl, wrap
@@ -310,6 +429,7 @@ def intersection_w(double[::1] pts, Py_ssize_t[::1] ptids, int[::1] plens,
     o = 0
     strt = 0
     for p in range(len(plens)):
+        o = 0
         for k in range(len(opens)):
             if opens[k] == p:
                 o = 2
@@ -472,6 +592,380 @@ cdef membership_pc(double[::1] pts, int[::1] plens, double[::1] lefts,
 
 
 # ______________________________________________________________________ CPDEFS
+# A side for the contact test, with its box and its frame ([k]: 0 or 1).
+cdef struct Side:
+    double left, right, bott, top, x1, y1, x2, y2
+    int pol, pt, k
+
+
+cdef int near_sides(Side *sides, int n, int k, double[::1] pts,
+                    int[::1] ptids, int[::1] polids, int[::1] plens,
+                    int[::1] opens, int le, double[::1] box):
+    '''Appending to [sides] (from [n] on) the sides of a frame that might
+    touch [box]. Returns the new count.
+    '''
+    cdef Py_ssize_t i, i2, m
+    cdef int p, pl
+    cdef bint opened
+    cdef double x1, y1, x2, y2
+
+    for i in range(0, le, 2):
+        p = polids[i]
+        pl = plens[p]
+        if ptids[i] < pl - 1:
+            i2 = i + 2
+        else:
+            opened = 0
+            for m in range(opens.shape[0]):
+                if opens[m] == p:
+                    opened = 1
+                    break
+            if opened:
+                continue
+            i2 = i - pl * 2 + 2
+        x1 = pts[i]
+        y1 = pts[i + 1]
+        x2 = pts[i2]
+        y2 = pts[i2 + 1]
+        sides[n].left = x1 if x1 < x2 else x2
+        sides[n].right = x2 if x1 < x2 else x1
+        sides[n].bott = y1 if y1 < y2 else y2
+        sides[n].top = y2 if y1 < y2 else y1
+        if (sides[n].right < box[0] or sides[n].left > box[2]
+                or sides[n].top < box[1] or sides[n].bott > box[3]):
+            continue
+        sides[n].x1 = x1
+        sides[n].y1 = y1
+        sides[n].x2 = x2
+        sides[n].y2 = y2
+        sides[n].pol = p
+        sides[n].pt = ptids[i]
+        sides[n].k = k
+        n += 1
+    return n
+
+
+cdef bint anchor_map(dict bounds, double[::1] pts, double m[6]):
+    '''The affine map from world space to a frame's hint space, from its
+        anchor points (see rotabounds' local_map), into [m]. 0 for a flat or
+        unanchored frame.
+    '''
+    cdef array.array hints = bounds['hints']
+    cdef array.array anchors = bounds.get('anchors')
+    cdef Py_ssize_t i0, i1, i2
+    cdef double wx1, wy1, wx2, wy2, hx1, hy1, hx2, hy2, det
+
+    if anchors is None:
+        return 0
+    i0 = anchors.data.as_ints[0]
+    i1 = anchors.data.as_ints[1]
+    i2 = anchors.data.as_ints[2]
+    wx1 = pts[i1] - pts[i0]
+    wy1 = pts[i1 + 1] - pts[i0 + 1]
+    wx2 = pts[i2] - pts[i0]
+    wy2 = pts[i2 + 1] - pts[i0 + 1]
+    det = wx1 * wy2 - wx2 * wy1
+    if det == 0:
+        return 0
+    hx1 = hints.data.as_doubles[i1] - hints.data.as_doubles[i0]
+    hy1 = hints.data.as_doubles[i1 + 1] - hints.data.as_doubles[i0 + 1]
+    hx2 = hints.data.as_doubles[i2] - hints.data.as_doubles[i0]
+    hy2 = hints.data.as_doubles[i2 + 1] - hints.data.as_doubles[i0 + 1]
+    m[0] = (hx1 * wy2 - hx2 * wy1) / det
+    m[1] = (hx2 * wx1 - hx1 * wx2) / det
+    m[2] = (hy1 * wy2 - hy2 * wy1) / det
+    m[3] = (hy2 * wx1 - hy1 * wx2) / det
+    m[4] = (hints.data.as_doubles[i0] - m[0] * pts[i0]
+            - m[1] * pts[i0 + 1])
+    m[5] = (hints.data.as_doubles[i0 + 1] - m[2] * pts[i0]
+            - m[3] * pts[i0 + 1])
+    return 1
+
+
+cdef bint separated(double *axes, Py_ssize_t a_strt, Py_ssize_t al,
+                    double *m, double[::1] t_pts, int[::1] t_ppts,
+                    Py_ssize_t t_strt, Py_ssize_t tpl):
+    '''Whether any of a convex piece's axes (see rotabounds' define_pieces) is
+        a separating axis, i.e. the piece's projection on it and that of the
+        other piece's points don't overlap. The axes and the piece's own
+        projections are mapped from hint space to the piece's pose by the
+        transpose of [m], its frame's map from world to hint space.
+    '''
+    cdef double nx, ny, off, d, t_low, t_high
+    cdef Py_ssize_t i, k, a
+
+    for a in range(a_strt * 4, (a_strt + al) * 4, 4):
+        nx = m[0] * axes[a] + m[2] * axes[a + 1]
+        ny = m[1] * axes[a] + m[3] * axes[a + 1]
+        off = axes[a] * m[4] + axes[a + 1] * m[5]
+        i = t_ppts[t_strt]
+        t_low = t_high = nx * t_pts[i] + ny * t_pts[i + 1]
+        for k in range(t_strt + 1, t_strt + tpl):
+            i = t_ppts[k]
+            d = nx * t_pts[i] + ny * t_pts[i + 1]
+            if d < t_low:
+                t_low = d
+            elif d > t_high:
+                t_high = d
+        if axes[a + 3] - off < t_low or t_high < axes[a + 2] - off:
+            return 1
+    return 0
+
+
+cpdef bint separates(dict bounds, dict tbounds, double nx, double ny):
+    '''Whether the projections of two frames' points on the axis (nx, ny)
+        don't overlap (then, neither do the bounds).
+    '''
+    cdef double[::1] pts = bounds['points']
+    cdef double[::1] t_pts = tbounds['points']
+    cdef Py_ssize_t i, le = bounds['length'], t_le = tbounds['length']
+    cdef double d, low, high, t_low, t_high
+
+    if le < 2 or t_le < 2:
+        return 0
+    low = high = nx * pts[0] + ny * pts[1]
+    for i in range(2, le, 2):
+        d = nx * pts[i] + ny * pts[i + 1]
+        if d < low:
+            low = d
+        elif d > high:
+            high = d
+    t_low = t_high = nx * t_pts[0] + ny * t_pts[1]
+    for i in range(2, t_le, 2):
+        d = nx * t_pts[i] + ny * t_pts[i + 1]
+        if d < t_low:
+            t_low = d
+        elif d > t_high:
+            t_high = d
+    return high < t_low or t_high < low
+
+
+cdef piece_boxes(double[::1] pts, int[::1] plens, int[::1] ppts,
+                 double[::1] boxes):
+    cdef Py_ssize_t p, k, i, strt = 0
+
+    for p in range(plens.shape[0]):
+        i = ppts[strt]
+        boxes[p * 4] = boxes[p * 4 + 2] = pts[i]
+        boxes[p * 4 + 1] = boxes[p * 4 + 3] = pts[i + 1]
+        for k in range(strt + 1, strt + plens[p]):
+            i = ppts[k]
+            if pts[i] < boxes[p * 4]:
+                boxes[p * 4] = pts[i]
+            elif pts[i] > boxes[p * 4 + 2]:
+                boxes[p * 4 + 2] = pts[i]
+            if pts[i + 1] < boxes[p * 4 + 1]:
+                boxes[p * 4 + 1] = pts[i + 1]
+            elif pts[i + 1] > boxes[p * 4 + 3]:
+                boxes[p * 4 + 3] = pts[i + 1]
+        strt += plens[p]
+
+
+cdef sat(double[::1] pts, int[::1] plens, int[::1] ppts, int[::1] ppols,
+         array.array axes, array.array alens, double *m, double[::1] t_pts,
+         int[::1] t_plens, int[::1] t_ppts, int[::1] t_ppols,
+         array.array t_axes, array.array t_alens, double *t_m):
+    '''Separating axis test between the convex pieces of two frames:
+        Two convex polygons don't overlap if (and only if) the projections of
+        their points on one of their edges' normals don't overlap.
+        Each pair of pieces with overlapping boxes is checked, and the indices
+        of the first overlapping pair's polygons are returned.
+    '''
+    cdef double[::1] boxes = array.clone(darray, plens.shape[0] * 4, False)
+    cdef double[::1] t_boxes = array.clone(darray, t_plens.shape[0] * 4, False)
+    cdef Py_ssize_t p, t_p, strt = 0, t_strt, a_strt = 0, t_a_strt
+
+    piece_boxes(pts, plens, ppts, boxes)
+    piece_boxes(t_pts, t_plens, t_ppts, t_boxes)
+    for p in range(plens.shape[0]):
+        t_strt = t_a_strt = 0
+        for t_p in range(t_plens.shape[0]):
+            if not (boxes[p * 4 + 2] < t_boxes[t_p * 4]
+                    or boxes[p * 4] > t_boxes[t_p * 4 + 2]
+                    or boxes[p * 4 + 3] < t_boxes[t_p * 4 + 1]
+                    or boxes[p * 4 + 1] > t_boxes[t_p * 4 + 3]
+                    or separated(axes.data.as_doubles, a_strt,
+                                 alens.data.as_ints[p], m, t_pts, t_ppts,
+                                 t_strt, t_plens[t_p])
+                    or separated(t_axes.data.as_doubles, t_a_strt,
+                                 t_alens.data.as_ints[t_p], t_m, pts, ppts,
+                                 strt, plens[p])):
+                return [ppols[p], t_ppols[t_p]]
+            t_strt += t_plens[t_p]
+            t_a_strt += t_alens.data.as_ints[t_p]
+        strt += plens[p]
+        a_strt += alens.data.as_ints[p]
+    return False
+
+
+cpdef sat_bounds(rid, wid, frame='bounds', tframe='bounds'):
+    '''
+        [collide_bounds], using the separating axis test when both parties
+        have convex pieces (see [define_pieces]).
+    '''
+    cdef double[::1] box, t_box, pts, t_pts
+    cdef double m[6]
+    cdef double t_m[6]
+
+    try:
+        this = peers[rid]
+        that = peers[wid]
+        bounds = this[frame]
+        tbounds = that[tframe]
+    except (KeyError, TypeError):
+        return collide_bounds(rid, wid, frame, tframe)
+    if (bounds.get('piece_lens') is None
+            or tbounds.get('piece_lens') is None):
+        return collide_bounds(rid, wid, frame, tframe)
+    box = this['bbox']
+    t_box = that['bbox']
+    if (box.shape[0] < 4 or t_box.shape[0] < 4
+            or box[2] < t_box[0] or box[0] > t_box[2]
+            or box[3] < t_box[1] or box[1] > t_box[3]):
+        return False
+    pts = bounds['points']
+    t_pts = tbounds['points']
+    if not (anchor_map(bounds, pts, m) and anchor_map(tbounds, t_pts, t_m)):
+        return collide_bounds(rid, wid, frame, tframe)
+    return sat(pts, bounds['piece_lens'], bounds['piece_pts'],
+               bounds['piece_pols'], bounds['piece_axes'], bounds['axis_lens'],
+               m, t_pts, tbounds['piece_lens'],
+               tbounds['piece_pts'], tbounds['piece_pols'],
+               tbounds['piece_axes'], tbounds['axis_lens'], t_m)
+
+
+# A frame's early-out tiers in world space: bounding circle and box corners.
+cdef struct Tiers:
+    double x, y, r
+    double xs[4]
+    double ys[4]
+
+
+cdef void fit_tiers(double[::1] tiers, double[::1] hints, int le, double w,
+                    double h):
+    '''Recalculating the bounding circle's radius for the [w], [h] scale,
+        unless it's already that of the last one (to rounding).
+    '''
+    cdef Py_ssize_t i
+    cdef double dx, dy, r = 0
+
+    if fabs(w - tiers[3]) > 1e-9 * w or fabs(h - tiers[4]) > 1e-9 * h:
+        for i in range(0, le, 2):
+            dx = (hints[i] - tiers[18]) * w
+            dy = (hints[i + 1] - tiers[19]) * h
+            if dx * dx + dy * dy > r:
+                r = dx * dx + dy * dy
+        tiers[2] = sqrt(r)
+        tiers[3] = w
+        tiers[4] = h
+
+
+def fit_radius(dict bounds, double w, double h):
+    '''[fit_tiers] for a frame (see rotabounds' defer_bounds).'''
+    fit_tiers(bounds['tiers'], bounds['hints'], bounds['length'], w, h)
+
+
+cdef void world_tiers(double[::1] pts, int[::1] anchors, double[::1] tiers,
+                      double[::1] hints, int le, bint obb, Tiers *out):
+    '''A frame's bounding circle and (if [obb]) its oriented box's corners,
+        mapped from hint space through the frame's anchor points (see
+        [define_tiers] in rotabox.py). The radius is only recalculated when
+        the scale changes.
+    '''
+    cdef Py_ssize_t k, i0 = anchors[0], i1 = anchors[1], i2 = anchors[2]
+    cdef double p0x = pts[i0], p0y = pts[i0 + 1]
+    cdef double ux = pts[i1] - p0x, uy = pts[i1 + 1] - p0y
+    cdef double vx = pts[i2] - p0x, vy = pts[i2 + 1] - p0y
+    cdef double ax = ux * tiers[14] + vx * tiers[16]
+    cdef double ay = uy * tiers[14] + vy * tiers[16]
+    cdef double bx = ux * tiers[15] + vx * tiers[17]
+    cdef double by = uy * tiers[15] + vy * tiers[17]
+
+    fit_tiers(tiers, hints, le, sqrt(ax * ax + ay * ay),
+              sqrt(bx * bx + by * by))
+    out.x = p0x + ux * tiers[0] + vx * tiers[1]
+    out.y = p0y + uy * tiers[0] + vy * tiers[1]
+    out.r = tiers[2]
+    if obb:
+        for k in range(4):
+            out.xs[k] = p0x + ux * tiers[5 + k * 2] + vx * tiers[6 + k * 2]
+            out.ys[k] = p0y + uy * tiers[5 + k * 2] + vy * tiers[6 + k * 2]
+
+
+cdef bint rects_apart(double *xs, double *ys, double *t_xs,
+                      double *t_ys) noexcept nogil:
+    '''Separating axis test between two rectangles (their corners).'''
+    cdef double nx, ny, d, low, high, t_low, t_high
+    cdef double *rxs
+    cdef double *rys
+    cdef int side, k, m
+
+    for side in range(2):
+        rxs = t_xs if side else xs
+        rys = t_ys if side else ys
+        for k in range(1, 4, 2):
+            nx = rxs[k] - rxs[0]
+            ny = rys[k] - rys[0]
+            low = high = nx * xs[0] + ny * ys[0]
+            t_low = t_high = nx * t_xs[0] + ny * t_ys[0]
+            for m in range(1, 4):
+                d = nx * xs[m] + ny * ys[m]
+                if d < low:
+                    low = d
+                elif d > high:
+                    high = d
+                d = nx * t_xs[m] + ny * t_ys[m]
+                if d < t_low:
+                    t_low = d
+                elif d > t_high:
+                    t_high = d
+            if high < t_low or t_high < low:
+                return 1
+    return 0
+
+
+cdef bint apart(dict bounds, dict tbounds):
+    '''Early-outs between two frames with tiers: bounding circles, then
+        oriented boxes (if either frame has them enabled).
+    '''
+    cdef double[::1] tiers = bounds['tiers'], t_tiers = tbounds['tiers']
+    cdef bint obb = tiers[13] != 0 or t_tiers[13] != 0
+    cdef Tiers a, b
+
+    world_tiers(bounds['points'], bounds['anchors'], tiers, bounds['hints'],
+                bounds['length'], obb, &a)
+    world_tiers(tbounds['points'], tbounds['anchors'], t_tiers,
+                tbounds['hints'], tbounds['length'], obb, &b)
+    if ((a.x - b.x) * (a.x - b.x) + (a.y - b.y) * (a.y - b.y)
+            > (a.r + b.r) * (a.r + b.r)):
+        return 1
+    return obb and rects_apart(a.xs, a.ys, b.xs, b.ys)
+
+
+cdef bint apart_box(dict bounds, double[::1] box):
+    '''Early-outs between a frame with tiers and a widget's box.'''
+    cdef double[::1] tiers = bounds['tiers']
+    cdef bint obb = tiers[13] != 0
+    cdef Tiers a
+    cdef double dx, dy
+    cdef double xs[4]
+    cdef double ys[4]
+
+    world_tiers(bounds['points'], bounds['anchors'], tiers, bounds['hints'],
+                bounds['length'], obb, &a)
+    dx = box[0] - a.x if a.x < box[0] else (a.x - box[2] if a.x > box[2] else 0)
+    dy = box[1] - a.y if a.y < box[1] else (a.y - box[3] if a.y > box[3] else 0)
+    if dx * dx + dy * dy > a.r * a.r:
+        return 1
+    if not obb:
+        return 0
+    xs[0] = xs[3] = box[0]
+    xs[1] = xs[2] = box[2]
+    ys[0] = ys[1] = box[1]
+    ys[2] = ys[3] = box[3]
+    return rects_apart(a.xs, a.ys, xs, ys)
+
+
 cpdef collide_bounds(rid, wid, frame='bounds', tframe='bounds'):
     '''
         Axis-aligned bounding box testing.
@@ -502,9 +996,14 @@ cpdef collide_bounds(rid, wid, frame='bounds', tframe='bounds'):
     try:
         tbounds = that[tframe]
     except UnboundLocalError:
+        if 'tiers' in bounds and apart_box(bounds, that_box):
+            return False
         return intersection_w(bounds['points'], bounds['pt_ids'],
                               bounds['pol_lens'], bounds['opens'], that_box)
 
+    if 'tiers' in bounds and 'tiers' in tbounds and apart(bounds, tbounds):
+        return False
+
     if this['seg']:
         if not (this['pre_check'] and that['pre_check'] and that['seg']):
             return intersection(bounds['points'], bounds['pt_ids'],
@@ -541,25 +1040,274 @@ cpdef point_in_bounds(x, y, rid, frame='bounds'):
         the point is inside; if it's even, the point is outside.
         Note that if the ray crosses a polygon's vertex, it will count both 
         concerned sides, giving an innacurate reading.
+        A point outside the bounds' bbox (or, in membership mode with
+        pre_check, outside a polygon's box) is rejected without scanning any
+        sides.
     '''
-    bounds = peers[rid][frame]
-    cdef Py_ssize_t r, j, i, strt = 0
-    cdef int rang
+    cdef dict frames = peers[rid]
+    cdef double[::1] bbox = frames['bbox']
+    if bbox.shape[0] == 4 and (x < bbox[0] or x > bbox[2]
+                               or y < bbox[1] or y > bbox[3]):
+        return False
+    bounds = frames[frame]
+    if not frames['seg'] and frames['pre_check']:
+        return point_in(x, y, bounds['points'], bounds['pol_lens'],
+                        bounds['lefts'], bounds['botts'], bounds['rights'],
+                        bounds['tops'], 1)
+    return point_in(x, y, bounds['points'], bounds['pol_lens'],
+                    None, None, None, None, 0)
+
+
+cdef bint point_in(double x, double y, double[::1] pts, int[::1] plens,
+                   double[::1] lefts, double[::1] botts, double[::1] rghts,
+                   double[::1] tops, bint boxed):
+    cdef Py_ssize_t r, j, i, end, strt = 0
+    cdef double x1, y1, x2, y2
     cdef bint c
-    for r, rang in enumerate(bounds['pol_lens']):
+    for r in range(plens.shape[0]):
+        end = strt + plens[r] * 2
+        if boxed and (x < lefts[r] or x > rghts[r]
+                      or y < botts[r] or y > tops[r]):
+            strt = end
+            continue
         c = 0
-        j = strt + rang * 2 - 2
-        for i in range(strt, strt + rang * 2, 2):
-            x1, y1 = bounds['points'][j], bounds['points'][j+1]
-            x2, y2 = bounds['points'][i], bounds['points'][i+1]
+        j = end - 2
+        for i in range(strt, end, 2):
+            x1 = pts[j]
+            y1 = pts[j + 1]
+            x2 = pts[i]
+            y2 = pts[i + 1]
             if (((y2 > y) != (y1 > y)) and
                     x < (x1 - x2) * (y - y2) / (y1 - y2) + x2):
                 c = not c
             j = i
         if c:
-            return c
-        strt = strt + rang * 2
-    return False
+            return 1
+        strt = end
+    return 0
+
+
+cdef int rect_sides(Side *sides, int n, double[::1] box):
+    '''Appending to [sides] (from [n] on) the four sides of a non-Rotabox
+        widget's box. Returns the new count.
+    '''
+    cdef double xs[5]
+    cdef double ys[5]
+    cdef int k
+
+    xs[0] = xs[3] = xs[4] = box[0]
+    xs[1] = xs[2] = box[2]
+    ys[0] = ys[1] = ys[4] = box[1]
+    ys[2] = ys[3] = box[3]
+    for k in range(4):
+        sides[n].x1 = xs[k]
+        sides[n].y1 = ys[k]
+        sides[n].x2 = xs[k + 1]
+        sides[n].y2 = ys[k + 1]
+        sides[n].left = xs[k] if xs[k] < xs[k + 1] else xs[k + 1]
+        sides[n].right = xs[k + 1] if xs[k] < xs[k + 1] else xs[k]
+        sides[n].bott = ys[k] if ys[k] < ys[k + 1] else ys[k + 1]
+        sides[n].top = ys[k + 1] if ys[k] < ys[k + 1] else ys[k]
+        sides[n].pol = 0
+        sides[n].pt = k
+        sides[n].k = 1
+        n += 1
+    return n
+
+
+cdef contact(Side *sides, int n, int m, double[::1] box, double[::1] t_box):
+    '''
+        Contact kernel: all the crossings between the sides of two frames
+        ([sides] before and after [n]) in a single pass (see [intersection]),
+        and the contact manifold they make, as [points, normal, depth], or
+        None.
+        The contact line runs through the crossing points' centroid, along
+        their principal axis (along the crossed side, for a single point).
+        The normal is perpendicular to it, pointing from this frame's bbox
+        center towards the other's, and the depth adds up how far the
+        crossing sides of each frame reach past the line, into the other
+        frame.
+    '''
+    cdef Py_ssize_t e, f, c, count
+    cdef Side *side
+    cdef Side *other
+    cdef double v10, v11, v20, v21, v30, v31, v40, v41, d1, d2, t
+    cdef double mx = 0, my = 0, sxx = 0, syy = 0, sxy = 0, dx, dy, angle
+    cdef double ax, ay, nx, ny, norm, d, depth = 0, t_depth = 0
+    cdef list points = [], pairs = []
+
+    for e in range(n):
+        side = &sides[e]
+        for f in range(n, m):
+            other = &sides[f]
+            if (side.right < other.left or side.left > other.right
+                    or side.top < other.bott or side.bott > other.top):
+                continue
+            v10 = side.x1
+            v11 = side.y1
+            v20 = side.x2
+            v21 = side.y2
+            v30 = other.x1
+            v31 = other.y1
+            v40 = other.x2
+            v41 = other.y2
+            d1 = (v40 - v30) * (v11 - v31) - (v10 - v30) * (v41 - v31)
+            d2 = (v40 - v30) * (v21 - v31) - (v20 - v30) * (v41 - v31)
+            if (d1 > 0) == (d2 > 0):
+                continue
+            if (((v20 - v10) * (v31 - v11)
+                 - (v30 - v10) * (v21 - v11) > 0)
+                    == ((v20 - v10) * (v41 - v11)
+                        - (v40 - v10) * (v21 - v11) > 0)):
+                continue
+            # The crossing point divides v1-v2 as v1 and v2's distances from
+            # v3-v4 (d1 and d2, of opposite signs).
+            t = d1 / (d1 - d2)
+            points.append((v10 + (v20 - v10) * t, v11 + (v21 - v11) * t))
+            pairs.append((e, f))
+
+    count = len(points)
+    if not count:
+        return None
+    for c in range(count):
+        mx += <double>points[c][0]
+        my += <double>points[c][1]
+    mx /= count
+    my /= count
+    for c in range(count):
+        dx = <double>points[c][0] - mx
+        dy = <double>points[c][1] - my
+        sxx += dx * dx
+        syy += dy * dy
+        sxy += dx * dy
+    if sxx + syy > 1e-9:
+        angle = .5 * atan2(2. * sxy, sxx - syy)
+        ax = cos(angle)
+        ay = sin(angle)
+    else:
+        other = &sides[<int>pairs[0][1]]
+        ax = other.x2 - other.x1
+        ay = other.y2 - other.y1
+        norm = sqrt(ax * ax + ay * ay)
+        ax = ax / norm
+        ay = ay / norm
+    nx = -ay
+    ny = ax
+    if (nx * (t_box[0] + t_box[2] - box[0] - box[2])
+            + ny * (t_box[1] + t_box[3] - box[1] - box[3]) < 0):
+        nx = ay
+        ny = -ax
+    for c in range(count):
+        side = &sides[<int>pairs[c][0]]
+        other = &sides[<int>pairs[c][1]]
+        d = (side.x1 - mx) * nx + (side.y1 - my) * ny
+        if d > depth:
+            depth = d
+        d = (mx - other.x1) * nx + (my - other.y1) * ny
+        if d > t_depth:
+            t_depth = d
+        d = (side.x2 - mx) * nx + (side.y2 - my) * ny
+        if d > depth:
+            depth = d
+        d = (mx - other.x2) * nx + (my - other.y2) * ny
+        if d > t_depth:
+            t_depth = d
+    return [points, (nx, ny), depth + t_depth]
+
+
+cdef contained(dict this, that, double[::1] box, double[::1] t_box, rid, wid,
+               frame, tframe):
+    '''
+        The contact manifold of two frames with no crossing sides, if one
+        contains the other (unless both are in segment mode), or False:
+        no points, the normal from this frame's bbox center towards the
+        other's, and the depth by the bboxes' projections on it.
+    '''
+    cdef double nx, ny, norm, high, t_low
+
+    if this['seg'] and (that is None or that['seg']):
+        return False
+    if that is None:
+        if not ((t_box[0] <= box[0] and box[2] <= t_box[2]
+                 and t_box[1] <= box[1] and box[3] <= t_box[3])
+                or point_in_bounds(t_box[0], t_box[1], rid, frame)):
+            return False
+    elif not (collide_bounds(rid, wid, frame, tframe)
+              or collide_bounds(wid, rid, tframe, frame)):
+        return False
+    nx = t_box[0] + t_box[2] - box[0] - box[2]
+    ny = t_box[1] + t_box[3] - box[1] - box[3]
+    norm = sqrt(nx * nx + ny * ny)
+    if norm:
+        nx = nx / norm
+        ny = ny / norm
+    else:
+        nx = 0.
+        ny = 1.
+    high = ((box[2] if nx > 0 else box[0]) * nx
+            + (box[3] if ny > 0 else box[1]) * ny)
+    t_low = ((t_box[0] if nx > 0 else t_box[2]) * nx
+             + (t_box[1] if ny > 0 else t_box[3]) * ny)
+    return [[], (nx, ny), high - t_low]
+
+
+cpdef contact_bounds(rid, wid, frame='bounds', tframe='bounds'):
+    '''
+        [collide_bounds], returning the contact manifold of a collision
+        ([points, normal, depth], see [contact]) instead of the first
+        crossing, or False.
+    '''
+    cdef double[::1] box, t_box
+    cdef Side *sides
+    cdef int n, m, t_length = 8
+
+    try:
+        this = peers[rid]
+    except KeyError:
+        return False
+    box = this['bbox']
+    try:
+        that = peers[wid]
+    except TypeError:
+        that = None
+        t_box = array.array('d', wid)
+    else:
+        t_box = that['bbox']
+    if (box.shape[0] < 4 or t_box.shape[0] < 4
+            or box[2] < t_box[0] or box[0] > t_box[2]
+            or box[3] < t_box[1] or box[1] > t_box[3]):
+        return False
+    bounds = this[frame]
+    if that is None:
+        if 'tiers' in bounds and apart_box(bounds, t_box):
+            return False
+    else:
+        tbounds = that[tframe]
+        if 'tiers' in bounds and 'tiers' in tbounds and apart(bounds, tbounds):
+            return False
+        t_length = tbounds['length']
+    sides = <Side *>malloc(((bounds['length'] + t_length) // 2 + 1)
+                           * sizeof(Side))
+    if sides == NULL:
+        raise MemoryError()
+    try:
+        n = near_sides(sides, 0, 0, bounds['points'], bounds['pt_ids'],
+                       bounds['pol_ids'], bounds['pol_lens'],
+                       bounds['opens'] if this['seg'] else iarray,
+                       bounds['length'], t_box)
+        if that is None:
+            m = rect_sides(sides, n, t_box)
+        else:
+            m = near_sides(sides, n, 1, tbounds['points'], tbounds['pt_ids'],
+                           tbounds['pol_ids'], tbounds['pol_lens'],
+                           tbounds['opens'] if that['seg'] else iarray,
+                           tbounds['length'], box)
+        result = contact(sides, n, m, box, t_box)
+    finally:
+        free(sides)
+    if result is not None:
+        return result
+    return contained(this, that, box, t_box, rid, wid, frame, tframe)
 
 
 cpdef update_bounds(motion, angle, origin, rid, frame='bounds'):
@@ -577,57 +1325,93 @@ cpdef update_bounds(motion, angle, origin, rid, frame='bounds'):
     if angle:
         rotate(bounds['points'], bounds['length'], angle, origin[0], origin[1])
 
-    bbox = array.array('d', [float("inf"), float("inf"), 0., 0.])
-
-    if not peers[rid]['pre_check']:
-        calc_bbox(bounds['points'], bounds['length'], bbox)
-    elif peers[rid]['seg']:
-        calc_segboxes(bounds['points'], bounds['pol_ids'], bounds['pt_ids'],
-                      bounds['pol_lens'], bounds['length'], bbox,
-                      bounds['lefts'], bounds['botts'], bounds['rights'],
-                      bounds['tops'])
-    else:
-        calc_polboxes(bounds['points'], bounds['pol_lens'], bbox,
-                      bounds['lefts'], bounds['botts'], bounds['rights'],
-                      bounds['tops'])
-
-    peers[rid]['bbox'] = bbox
+    bounds['state'] = None
+    peers[rid]['bbox'] = calc_boxes(bounds, peers[rid])
+    bump_version(rid)
 
 
 cpdef aniupdate_bounds(motion, pos, angle, origin, rid, frame='bounds'):
     '''
         Updating the elements of the collision detection checks in case of an 
         animation.
+        The frame is placed straight from its hints, at the size of the last
+        [aniresize]. A frame already placed at the same size, position and
+        angle just gets its bbox back.
     '''
+    cdef double pos0 = 0., pos1 = 0.
     try:
         bounds = peers[rid][frame]
     except TypeError:
         return
 
     if motion:
-        bounds['mov_pts'][:] = bounds['sca_pts']
-        move(bounds['mov_pts'], bounds['length'], pos[0], pos[1])
-        bounds['points'][:] = bounds['mov_pts']
+        pos0, pos1 = pos[0], pos[1]
+    elif bounds.get('state'):  # Where the frame was last placed
+        pos0, pos1 = bounds['state'][2:4]
+    width, height = bounds.get('size', (1., 1.))
+    if place(bounds, peers[rid], width, height, pos0, pos1, angle or 0.,
+             origin[0], origin[1]):
+        bump_version(rid)
 
-    if angle:
-        bounds['points'][:] = bounds['mov_pts']
-        rotate(bounds['points'], bounds['length'], angle, origin[0], origin[1])
 
-    bbox = array.array('d', [float("inf"), float("inf"), 0., 0.])
+cpdef transform_bounds(width, height, pos, angle, origin, rid,
+                       frame='bounds'):
+    '''
+        Updating the elements of the collision detection checks, straight from
+        the hints, using the whole transformation instead of its last changes.
+        Nothing is done if neither the transformation nor the frame have
+        changed since the last call.
+    '''
+    try:
+        bounds = peers[rid][frame]
+    except TypeError:
+        return
 
-    if not peers[rid]['pre_check']:
-        calc_bbox(bounds['points'], bounds['length'], bbox)
-    elif peers[rid]['seg']:
-        calc_segboxes(bounds['points'], bounds['pol_ids'], bounds['pt_ids'],
-                      bounds['pol_lens'], bounds['length'], bbox,
-                      bounds['lefts'], bounds['botts'], bounds['rights'],
-                      bounds['tops'])
-    else:
-        calc_polboxes(bounds['points'], bounds['pol_lens'], bbox,
-                      bounds['lefts'], bounds['botts'], bounds['rights'],
-                      bounds['tops'])
+    if place(bounds, peers[rid], width, height, pos[0], pos[1], angle,
+             origin[0], origin[1]):
+        bump_version(rid)
 
-    peers[rid]['bbox'] = bbox
+
+cpdef batch_transform_bounds(rids, frames, double[::1] sizes,
+                             double[::1] positions, double[::1] angles,
+                             double[::1] origins):
+    '''
+        [transform_bounds] for many bounds in a single call.
+        [sizes], [positions] and [origins] are flat arrays of x, y pairs
+        (e.g. array('d', [x0, y0, x1, y1, ...])), in the order of [rids].
+    '''
+    cdef Py_ssize_t n, n2
+    cdef dict body
+
+    for n in range(len(rids)):
+        n2 = n * 2
+        body = peers[rids[n]]
+        if place(body[frames[n]], body, sizes[n2], sizes[n2 + 1],
+                 positions[n2], positions[n2 + 1], angles[n],
+                 origins[n2], origins[n2 + 1]):
+            bump_version(rids[n])
+
+
+cdef bint place(dict bounds, dict body, double width, double height,
+                double pos0, double pos1, double angle, double orig0,
+                double orig1):
+    '''
+        Transforming a frame's hints into its points and refilling its bbox,
+        unless the frame is current and its transformation the same.
+        Returns whether the points were transformed.
+    '''
+    state = (width, height, pos0, pos1, angle, orig0, orig1)
+    bbox = bounds.get('bbox')
+    if bbox is not None and bounds['state'] == state:
+        body['bbox'] = bbox
+        return 0
+
+    transform(bounds['hints'], bounds['points'], bounds['length'], width,
+              height, pos0, pos1, angle, orig0, orig1)
+
+    bounds['state'] = state
+    body['bbox'] = bounds['bbox'] = calc_boxes(bounds, body, bbox)
+    return 1
 
 
 cpdef resize(width, height, rid):
@@ -636,70 +1420,256 @@ cpdef resize(width, height, rid):
             bounds = peers[rid]['bounds']
             bounds['points'][:] = bounds['hints']
             scale(bounds['points'], bounds['length'], width, height)
+            bounds['state'] = None
             break
     else:
         for k, frame in peers[rid].items():
             if k != 'bbox' and k != 'seg' and k != 'pre_check':
                 frame['points'][:] = frame['hints']
                 scale(frame['points'], frame['length'], width, height)
+                frame['state'] = None
+    bump_version(rid)
 
 
 cpdef aniresize(width, height, rid):
+    '''
+        Recording the size of an animation's frames. Each frame is scaled by
+        [aniupdate_bounds], when it's shown.
+    '''
+    size = (width, height)
     for k, frame in peers[rid].items():
-        if k == 'bounds':
-            bounds = peers[rid]['bounds']
-            bounds['sca_pts'][:] = bounds['hints']
-            scale(bounds['sca_pts'], bounds['length'], width, height)
-            break
-    else:
-        for k, frame in peers[rid].items():
-            if k != 'bbox' and k != 'seg' and k != 'pre_check':
-                frame['sca_pts'][:] = frame['hints']
-                scale(frame['sca_pts'], frame['length'], width, height)
+        if k != 'bbox' and k != 'seg' and k != 'pre_check':
+            frame['size'] = size
+
+
+# _______________________________________________________________________ STORE
+# The frames' own arrays (points and boxes) are slices of a few large float
+# ('d') buffers, shared by all the bounds. Each frame takes a single contiguous
+# run. The buffers grow a block at a time and a released run is reused by the
+# next frame of the same size. The rest of a frame's data is its template's
+# (see define_bounds).
+cdef Py_ssize_t BLOCK = 1 << 16
+cdef tuple FLOATS = ('points', 'lefts', 'botts', 'rights', 'tops')
+
+cdef dict store = {'d': []}
+cdef dict tails = {'d': 0}
+cdef dict free_runs = {'d': {}}
+cdef dict slots = {}
+
 
+cdef allocate(kind, Py_ssize_t size, rid):
+    cdef double[::1] dblock
+    cdef Py_ssize_t b, start
 
-cdef define_frame(list frame, dict bounds, int[::1] opens,
-                   bint seg_mode, bint ani, bint pre_check):
-    cdef Py_ssize_t p, i
+    runs = free_runs[kind].get(size)
+    if runs:
+        b, start = runs.pop()
+    else:
+        blocks = store[kind]
+        b = len(blocks) - 1
+        if b < 0 or tails[kind] + size > len(blocks[b]):
+            blocks.append(array.array(kind, [0]) * max(BLOCK, size))
+            tails[kind] = 0
+            b = b + 1
+        start = tails[kind]
+        tails[kind] += size
+    slots.setdefault(rid, []).append((kind, b, start, size))
+    dblock = store[kind][b]
+    return dblock[start:start + size]
+
+
+cdef free_slots(rid):
+    for kind, b, start, size in slots.pop(rid, ()):
+        free_runs[kind].setdefault(size, []).append((b, start))
+
+
+cdef pack_frame(dict bounds, rid):
+    cdef Py_ssize_t start = 0, stop
+
+    keys = [key for key in FLOATS if key in bounds]
+    run = allocate('d', sum([len(bounds[key]) for key in keys]), rid)
+    for key in keys:
+        stop = start + len(bounds[key])
+        if stop > start:  # (An empty slice takes the array for a scalar.)
+            run[start:stop] = bounds[key]
+        bounds[key] = run[start:stop]
+        start = stop
+
+
+cpdef release_bounds(rid):
+    '''
+        Removing [rid]'s bounds and returning their store runs for reuse.
+    '''
+    peers.pop(rid, None)
+    versions.pop(rid, None)
+    free_slots(rid)
+    drop_template(rid)
+
+
+# ____________________________________________________________________ VERSIONS
+# A version for each rid's bounds, changed whenever their points are, to
+# validate the results cached for them. Versions come from a single counter,
+# so bounds defined again under a released rid never get an old one back.
+cdef dict versions = {}
+cdef long long version_clock = 0
+
+
+cpdef bump_version(rid):
+    global version_clock
+    version_clock += 1
+    versions[rid] = version_clock
+
+
+# ___________________________________________________________________ TEMPLATES
+# The frames built from a definition (hints, indices, polygons' lengths and
+# open flags), shared by all the bounds defined identically, for as long as
+# any bounds use them.
+cdef dict templates = {}  # {definition: [frames, users]}
+cdef dict template_keys = {}  # {rid: definition}
+
+
+cdef frozen(hints):
+    '''A hashable copy of [custom_bounds] or [open_bounds].'''
+    if isinstance(hints, dict):
+        return tuple(sorted([(key, frozen(item))
+                             for key, item in hints.items()]))
+    if not isinstance(hints, (list, tuple)):  # A CompiledFrame (rotabounds)
+        return hints.key
+    if not hints or not isinstance(hints[0], (list, tuple)):
+        return tuple(hints)
+    if hints[0] and isinstance(hints[0][0], (list, tuple)):
+        return tuple([frozen(item) for item in hints])
+    return tuple(map(tuple, hints))
+
+
+cdef drop_template(rid):
+    key = template_keys.pop(rid, None)
+    if key is not None:
+        entry = templates[key]
+        entry[1] -= 1
+        if not entry[1]:
+            del templates[key]
+
+
+cdef define_frame(frame, dict bounds, int[::1] opens,
+                   bint seg_mode, bint pre_check):
+    '''
+        Filling a frame's arrays from its polygons, in a single pass over
+        buffers sized from the polygons' lengths.
+        A CompiledFrame's (see rotabounds) arrays are copied whole.
+    '''
+    cdef Py_ssize_t p, i, j = 0, count = 0, length
     cdef int plen
     cdef list pol
-    for p in range(len(frame)):
+    cdef array.array hints, pol_ids, pt_ids, pol_lens
+    cdef double[::1] hs
+    cdef int[::1] pols, pts, lens
+    cdef bint compiled = not isinstance(frame, list)
+
+    if compiled:
+        pol_lens = array.copy(frame.lens)
+        hints = array.copy(frame.hints)
+        lens = pol_lens
+        count = len(hints)
+    else:
+        pol_lens = array.clone(iarray, len(frame), False)
+        lens = pol_lens
+        for p in range(len(frame)):
+            lens[p] = len(frame[p])
+            count += lens[p]
+        count *= 2
+        hints = array.clone(darray, count, False)
+    pol_ids = array.clone(iarray, count, False)
+    pt_ids = array.clone(iarray, count, False)
+    hs = hints
+    pols = pol_ids
+    pts = pt_ids
+    for p in range(len(lens)):
+        plen = lens[p]
+        if compiled:
+            for i in range(plen):
+                pols[j] = pols[j + 1] = p
+                pts[j] = pts[j + 1] = i
+                j += 2
+            continue
         pol = frame[p]
-        plen = len(pol)
-        array.extend(bounds['pol_lens'], array.array('i', [plen]))
         for i in range(plen):
-            array.extend(bounds['hints'], array.array('d', [pol[i][0], pol[i][1]]))
-            array.extend(bounds['pol_ids'], array.array('i', [p, p]))
-            array.extend(bounds['pt_ids'], array.array('i', [i, i]))
-            bounds['length'] += 2
+            point = pol[i]
+            hs[j] = point[0]
+            hs[j + 1] = point[1]
+            pols[j] = pols[j + 1] = p
+            pts[j] = pts[j + 1] = i
+            j += 2
+
+    bounds['hints'] = hints
+    bounds['pol_ids'] = pol_ids
+    bounds['pt_ids'] = pt_ids
+    bounds['pol_lens'] = pol_lens
+    bounds['length'] = count
 
     if  pre_check:
         if seg_mode:
-            length = bounds['length']
+            length = count
         else:
-            length = len(bounds['pol_lens'])
-        bounds['lefts'] = array.array('d', [float("inf")] * length)
-        bounds['botts'] = array.array('d', [float("inf")] * length)
-        bounds['rights'] = array.array('d', [0.] * length)
-        bounds['tops'] = array.array('d', [0.] * length)
+            length = len(frame)
+        bounds['lefts'] = filled(length, INFINITY)
+        bounds['botts'] = filled(length, INFINITY)
+        bounds['rights'] = array.clone(darray, length, True)
+        bounds['tops'] = array.clone(darray, length, True)
 
     bounds['opens'] = array.array('i', opens)
 
-    if ani:
-        bounds['mov_pts'][:] = bounds['sca_pts'][:] = bounds['hints']
-    bounds['points'][:] = bounds['hints']
+    bounds['points'] = array.copy(hints)
+
+
+cdef array.array filled(Py_ssize_t length, double value):
+    cdef array.array arr = array.clone(darray, length, False)
+    cdef double[::1] view = arr
+    cdef Py_ssize_t i
+    for i in range(length):
+        view[i] = value
+    return arr
 
 
 cpdef define_bounds(custom_bounds, open_bounds, segment_mode, rid, pre_check):
     '''Organising the data from the user's [custom_bounds] hints
     for 'segment intersection' detection method.
+    The frames are built once per definition and shared. Each bounds only gets
+    its own points and boxes (and a 'shared' reference to its template frame).
     '''
     cdef dict frames = {}
+    cdef dict bounds
+
+    free_slots(rid)
+    drop_template(rid)
+    key = (frozen(custom_bounds), frozen(open_bounds), bool(segment_mode),
+           bool(pre_check))
+    entry = templates.get(key)
+    if entry is None:
+        entry = templates[key] = [build_frames(custom_bounds, open_bounds,
+                                               segment_mode, pre_check), 0]
+    entry[1] += 1
+    template_keys[rid] = key
+
+    for k, template in entry[0].items():
+        bounds = dict(template)
+        bounds['shared'] = template
+        pack_frame(bounds, rid)
+        frames[k] = bounds
+    frames['bbox'] = array.array('d', [])
+    frames['seg'] = segment_mode
+    frames['pre_check'] = pre_check
+
+    peers[rid] = frames
+    bump_version(rid)
+
+
+cdef dict build_frames(custom_bounds, open_bounds, segment_mode, pre_check):
+    cdef dict frames = {}
 
     if isinstance(custom_bounds, dict):   # Animation case
         for key, frame in custom_bounds.items():
-            bounds = {'hints': array.array('d'), 'sca_pts': array.array('d'),
-                      'mov_pts': array.array('d'), 'points': array.array('d'),
+            bounds = {'hints': array.array('d'), 'points': array.array('d'),
                       'pol_ids': array.array('i'), 'pt_ids': array.array('i'),
                       'pol_lens': array.array('i'), 'length': 0}
             if isinstance(open_bounds, dict):
@@ -707,24 +1677,28 @@ cpdef define_bounds(custom_bounds, open_bounds, segment_mode, rid, pre_check):
             else:
                 opens = array.array('i', open_bounds)
 
-            define_frame(frame, bounds, opens, segment_mode, 1, pre_check)
+            define_frame(frame, bounds, opens, segment_mode, pre_check)
 
             frames[key] = bounds
 
-    elif isinstance(custom_bounds, list):  # Single image case
+    else:  # Single image case
         bounds = {'hints': array.array('d'), 'points': array.array('d'),
                   'pol_ids': array.array('i'), 'pt_ids': array.array('i'),
                   'pol_lens': array.array('i'), 'length': 0}
         define_frame(custom_bounds, bounds, array.array('i', open_bounds),
-                     segment_mode, 0, pre_check)
+                     segment_mode, pre_check)
         frames['bounds'] = bounds
 
-    frames['bbox'] = array.array('d', [])
-    frames['seg'] = segment_mode
-    frames['pre_check'] = pre_check
-
-    peers[rid] = frames
+    return frames
 
 
 cpdef get_peers():
     return peers
+
+
+cpdef get_store():
+    return store, slots
+
+
+cpdef get_versions():
+    return versions
@@ -0,0 +1,3527 @@
+"""
+
+ROTABOUNDS                                              python 2.7 / python 3.7
+==========
+
+The collision engine of Rotabox, without Kivy: the bounds' definitions,
+transformations and checks (cybounds, NumPy or Python functions), their
+registry, the broad phase and the bounds files. It can be imported on its own,
+e.g. by a game server running the same collision logic without a window.
+
+Its bounds are owned either by Rotabox widgets or by *Body* objects, the
+plain-Python equivalent, and each can be checked against the other.
+
+____
+Body
+
+**Body(custom_bounds=None, open_bounds=None, segment_mode=True, size=(100, 100),
+pos=(0, 0), angle=0, origin=None, frame=None, ...)** *Class*
+    Creates and registers bounds, from [custom_bounds] hints relative to
+    [size] (as a Rotabox's *custom_bounds*, a dict for animation frames, with
+    [frame] the frame in use). By default, a rectangle.
+    The keyword arguments *convex_pieces*, *local_index*, *obb_check*,
+    *lazy_update*, *pre_check* and *static* work as the Rotabox properties.
+    The bounds are released when the Body is *release*d or, once it's garbage
+    collected, at the next query of the registry.
+
+**set_transform(pos=None, angle=None, size=None, origin=None, frame=None)**
+*Method*
+    Places the bounds (the omitted arguments keep their values). [angle] is in
+    degrees, around [origin] (by default, the Body's center).
+
+**collide(other)** *Method*
+    Checks against another Body, a Rotabox or a box ([x, y, right, top]),
+    like Rotabox's *collide_widget*.
+
+**contact(other)** *Method*
+    The contact manifold of a collision, like Rotabox's *collide_contact*.
+
+**collide_point(x, y)** *Method*
+    Whether the point is inside the bounds.
+
+**release()** *Method*
+    Removes the bounds from the registry.
+
+The module functions (*collide_all*, *broad_phase*, *count_bounds*,
+*compile_bounds* etc.) are those of Rotabox's module interface, which imports
+them from here.
+"""
+
+__author__ = 'unjuan'
+__version__ = '0.14.0'
+
+__all__ = ('Body', 'collide_all', 'broad_phase', 'collide_static',
+           'index_statics', 'cached_check', 'coherent_check', 'release_bounds',
+           'count_bounds', 'get_store', 'compile_bounds')
+
+from math import radians, sin, cos, atan2, sqrt, ceil, copysign, pi
+from array import array
+from functools import partial
+from collections import deque
+from itertools import count
+from operator import itemgetter
+from weakref import WeakValueDictionary, ref
+import json, mmap, os, struct, sys
+
+if sys.version_info < (3, 0):  # Python 2.x
+    from codecs import open
+    range = xrange
+from future.utils import iteritems, itervalues
+
+try:
+    from cybounds import define_bounds, resize, aniresize, get_peers, \
+        update_bounds, aniupdate_bounds, transform_bounds, \
+        batch_transform_bounds, point_in_bounds, collide_bounds, \
+        sat_bounds, contact_bounds, release_bounds, get_store, \
+        bump_version, get_versions, separates, local_crossing, fit_radius
+    peers = get_peers()
+    versions = get_versions()
+except ImportError:
+    import logging
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+        logging.log(30,  "[Rotabox     ] cybounds module NOT found. "
+                         "Using internal functions instead.\n")
+    else:
+        logging.log(30,  "[Rotabox     ] cybounds module NOT found. "
+                         "Using numpy functions instead.\n")
+
+    peers = {}
+
+    def scale(points, length, width, height):
+        for h in range(0, length, 2):
+            points[h] = points[h] * width
+            points[h+1] = points[h+1] * height
+
+    def move(points, length, pos0, pos1):
+        for i in range(0, length, 2):
+            points[i] = points[i] + pos0
+            points[i+1] = points[i+1] + pos1
+
+    def rotate(points, length, angle, orig0, orig1):
+        c = cos(angle)
+        s = sin(angle)
+
+        for j in range(0, length, 2):
+            points[j] = points[j] - orig0
+            points[j+1] = points[j+1] - orig1
+            pj = points[j]
+            points[j] = pj * c - points[j+1] * s
+            points[j+1] = pj * s + points[j+1] * c
+            points[j] = points[j] + orig0
+            points[j+1] = points[j+1] + orig1
+
+    def calc_segboxes(points, polids, ptids, plens, length, bbox, blefts, bbotts,
+                      brghts, btops):
+        for k in range(0, length, 2):
+            k1 = k + 1
+            off = plens[polids[k]] * 2 - 2
+            if ptids[k] < plens[polids[k]] - 1:
+                k2 = k1 + 1
+                k3 = k2 + 1
+            else:
+                k2 = k - off
+                k3 = k2 + 1
+
+            blefts[k] = points[k] if points[k] <= points[k2] else points[k2]
+            bbotts[k] = points[k1] if points[k1] <= points[k3] else points[k3]
+            brghts[k] = points[k] if points[k] >= points[k2] else points[k2]
+            btops[k] = points[k1] if points[k1] >= points[k3] else points[k3]
+
+            if blefts[k] < bbox[0]:
+                bbox[0] = blefts[k]
+            if brghts[k] > bbox[2]:
+                bbox[2] = brghts[k]
+            if bbotts[k] < bbox[1]:
+                bbox[1] = bbotts[k]
+            if btops[k] > bbox[3]:
+                bbox[3] = btops[k]
+
+    def calc_polboxes(points, plens, bbox, blefts, bbotts, brghts, btops):
+        strt = 0
+        for p in range(len(plens)):
+            left = float("inf")
+            bottom = float("inf")
+            right = 0.
+            top = 0.
+            for l in range(strt, strt + plens[p] * 2, 2):
+                l1 = l + 1
+
+                if points[l] < left:
+                    left = points[l]
+                if points[l] > right:
+                    right = points[l]
+                if points[l1] < bottom:
+                    bottom = points[l1]
+                if points[l1] > top:
+                    top = points[l1]
+
+            if left < bbox[0]:
+                bbox[0] = left
+            if right > bbox[2]:
+                bbox[2] = right
+            if bottom < bbox[1]:
+                bbox[1] = bottom
+            if top > bbox[3]:
+                bbox[3] = top
+
+            blefts[p] = left
+            bbotts[p] = bottom
+            brghts[p] = right
+            btops[p] = top
+
+            strt = strt + plens[p] * 2
+
+    def transform(hints, points, length, width, height, pos0, pos1, angle,
+                  orig0, orig1):
+        '''Scaling, moving and rotating the hints into points in one pass.'''
+        c = cos(angle)
+        s = sin(angle)
+
+        for j in range(0, length, 2):
+            x = hints[j] * width + pos0 - orig0
+            y = hints[j+1] * height + pos1 - orig1
+            points[j] = x * c - y * s + orig0
+            points[j+1] = x * s + y * c + orig1
+
+    def calc_boxes(bounds, seg_mode, bbox=None):
+        '''Segments' (or polygons') bounding boxes and the frame's bbox
+        (refilled in place, if given).'''
+        if bbox is None:
+            bbox = array('d', [float("inf"), float("inf"), 0., 0.])
+        else:
+            bbox[0] = bbox[1] = float("inf")
+            bbox[2] = bbox[3] = 0.
+
+        if seg_mode:
+            calc_segboxes(bounds['points'], bounds['pol_ids'], bounds['pt_ids'],
+                          bounds['pol_lens'], bounds['length'], bbox,
+                          bounds['lefts'], bounds['botts'], bounds['rights'],
+                          bounds['tops'])
+        else:
+            calc_polboxes(bounds['points'], bounds['pol_lens'], bbox,
+                          bounds['lefts'], bounds['botts'], bounds['rights'],
+                          bounds['tops'])
+        return bbox
+
+    def intersection_w(pts, ptids, plens, opens, t_box):
+        t_pts = [t_box[0], t_box[1], t_box[2], t_box[1],
+                 t_box[2], t_box[3], t_box[0], t_box[3]]
+        o = 0
+        strt = 0
+        for p in range(len(plens)):
+            o = 2 if p in opens else 0
+            for i in range(strt, strt + plens[p] * 2 - o, 2):
+                i1 = i + 1
+                off = plens[p] * 2 - 2
+                if ptids[i] < plens[p] - 1:
+                    i2 = i1 + 1
+                    i3 = i2 + 1
+                else:
+                    i2 = i - off
+                    i3 = i2 + 1
+                v10 = pts[i]
+                v11 = pts[i1]
+                v20 = pts[i2]
+                v21 = pts[i3]
+
+                for j in range(0, 8, 2):
+                    j1 = j + 1
+                    t_off = 6
+                    if j < 6:
+                        j2 = j1 + 1
+                        j3 = j2 + 1
+                    else:
+                        j2 = j - t_off
+                        j3 = j2 + 1
+                    v30 = t_pts[j]
+                    v31 = t_pts[j1]
+                    v40 = t_pts[j2]
+                    v41 = t_pts[j3]
+                    # Segment intersection detection method:
+                    # If the vertices v1 and v2 are not on opposite sides of the
+                    # segment v3, v4, or the vertices v3 and v4 are not on
+                    # opposite sides of the segment v1, v2, there's no
+                    # intersection.
+                    if (((v40 - v30) * (v11 - v31) -
+                         (v10 - v30) * (v41 - v31) > 0) ==
+                        ((v40 - v30) * (v21 - v31) -
+                         (v20 - v30) * (v41 - v31) > 0)):
+                        continue
+                    elif (((v20 - v10) * (v31 - v11) -
+                           (v30 - v10) * (v21 - v11) > 0) ==
+                          ((v20 - v10) * (v41 - v11) -
+                           (v40 - v10) * (v21 - v11) > 0)):
+                        continue
+
+                    return [p, ptids[i], 0, j/2]
+            strt = strt + plens[p] * 2
+        return False
+
+    def intersection_f(pts, ptids, plens, opens, t_pts, t_polis, t_ptis, t_plens):
+        o = 0
+        strt = 0
+        for p in range(len(plens)):
+            o = 2 if p in opens else 0
+            for i in range(strt, strt + plens[p] * 2 - o, 2):
+                i1 = i + 1
+                off = plens[p] * 2 - 2
+                if ptids[i] < plens[p] - 1:
+                    i2 = i1 + 1
+                    i3 = i2 + 1
+                else:
+                    i2 = i - off
+                    i3 = i2 + 1
+                v10 = pts[i]
+                v11 = pts[i1]
+                v20 = pts[i2]
+                v21 = pts[i3]
+
+                t_strt = 0
+                for t_p in range(len(t_plens)):
+                    for j in range(t_strt, t_strt + t_plens[t_p] * 2, 2):
+                        j1 = j + 1
+                        t_off = t_plens[t_polis[j]] * 2 - 2
+                        if t_ptis[j] < t_plens[t_polis[j]] - 1:
+                            j2 = j1 + 1
+                            j3 = j2 + 1
+                        else:
+                            j2 = j - t_off
+                            j3 = j2 + 1
+                        v30 = t_pts[j]
+                        v31 = t_pts[j1]
+                        v40 = t_pts[j2]
+                        v41 = t_pts[j3]
+                        # Segment intersection detection method:
+                        # If the vertices v1 and v2 are not on opposite sides of
+                        # the segment v3, v4, or the vertices v3 and v4 are not
+                        # on opposite sides of the segment v1, v2, there's no
+                        # intersection.
+                        if (((v40 - v30) * (v11 - v31) -
+                             (v10 - v30) * (v41 - v31) > 0) ==
+                            ((v40 - v30) * (v21 - v31) -
+                             (v20 - v30) * (v41 - v31) > 0)):
+                            continue
+                        elif (((v20 - v10) * (v31 - v11) -
+                               (v30 - v10) * (v21 - v11) > 0) ==
+                              ((v20 - v10) * (v41 - v11) -
+                               (v40 - v10) * (v21 - v11) > 0)):
+                            continue
+
+                        return [p, ptids[i], t_p, t_ptis[j]]
+                    t_strt = t_strt + t_plens[t_p] * 2
+            strt = strt + plens[p] * 2
+        return False
+
+    def intersection(pts, ptids, le, plens, opens, lefts, botts, rghts, tops,
+                     t_box, t_pts, t_ptis, t_le, t_plens, t_opens, t_lefts,
+                     t_botts, t_rghts, t_tops):
+        o = 0
+        t_o = 0
+        strt = 0
+        for p in range(len(plens)):
+            o = 2 if p in opens else 0
+            for i in range(strt, strt + plens[p] * 2 - o, 2):
+                if rghts[i] < t_box[0]:
+                    continue
+                if lefts[i] > t_box[2]:
+                    continue
+                if tops[i] < t_box[1]:
+                    continue
+                if botts[i] > t_box[3]:
+                    continue
+                i1 = i + 1
+                off = plens[p] * 2 - 2
+                if ptids[i] < plens[p] - 1:
+                    i2 = (i1 + 1) % le
+                    i3 = i2 + 1
+                else:
+                    i2 = i - off
+                    i3 = i2 + 1
+                v10 = pts[i]
+                v11 = pts[i1]
+                v20 = pts[i2]
+                v21 = pts[i3]
+
+                t_strt = 0
+                for t_p in range(len(t_plens)):
+                    t_o = 2 if t_p in t_opens else 0
+                    for j in range(t_strt, t_strt + t_plens[t_p] * 2 - t_o, 2):
+                        if rghts[i] < t_lefts[j]:
+                            continue
+                        if lefts[i] > t_rghts[j]:
+                            continue
+                        if tops[i] < t_botts[j]:
+                            continue
+                        if botts[i] > t_tops[j]:
+                            continue
+                        j1 = j + 1
+                        t_off = t_plens[t_p] * 2 - 2
+                        if t_ptis[j] < t_plens[t_p] - 1:
+                            j2 = (j1+1) % t_le
+                            j3 = j2 + 1
+                        else:
+                            j2 = j - t_off
+                            j3 = j2 + 1
+                        v30 = t_pts[j]
+                        v31 = t_pts[j1]
+                        v40 = t_pts[j2]
+                        v41 = t_pts[j3]
+                        # Segment intersection detection method:
+                        # If the vertices v1 and v2 are not on opposite sides of
+                        # the segment v3, v4, or the vertices v3 and v4 are not
+                        # on opposite sides of the segment v1, v2, there's no
+                        # intersection.
+                        if (((v40 - v30) * (v11 - v31) -
+                             (v10 - v30) * (v41 - v31) > 0) ==
+                            ((v40 - v30) * (v21 - v31) -
+                             (v20 - v30) * (v41 - v31) > 0)):
+                            continue
+                        elif (((v20 - v10) * (v31 - v11) -
+                               (v30 - v10) * (v21 - v11) > 0) ==
+                              ((v20 - v10) * (v41 - v11) -
+                               (v40 - v10) * (v21 - v11) > 0)):
+                            continue
+
+                        return [p, ptids[i], t_p, t_ptis[j]]
+                    t_strt = t_strt + t_plens[t_p] * 2
+            strt = strt + plens[p] * 2
+        return False
+
+    def local_crossing(pts, ptids, plens, opens, box, m, grid, cells, sides,
+                       segs, ids):
+        '''Segment intersection between a frame's sides and the indexed sides
+        of another (see [define_index]), in the latter's hint space: Each side
+        that reaches the other frame's [box] is mapped through [m] (world to
+        hint space) and checked against the sides listed in the grid cells
+        that its box covers.
+        '''
+        a, b, c, d, e, f = m
+        left, bott, sx, sy = grid[0], grid[1], grid[2], grid[3]
+        cols = int(grid[4])
+        rows = int(grid[5])
+        strt = 0
+        for p in range(len(plens)):
+            pl = plens[p]
+            o = 2 if p in opens else 0
+            for i in range(strt, strt + pl * 2 - o, 2):
+                i2 = i + 2 if ptids[i] < pl - 1 else strt
+                x1 = pts[i]
+                y1 = pts[i + 1]
+                x2 = pts[i2]
+                y2 = pts[i2 + 1]
+                if (max(x1, x2) < box[0] or min(x1, x2) > box[2]
+                        or max(y1, y2) < box[1] or min(y1, y2) > box[3]):
+                    continue
+                v10 = a * x1 + b * y1 + e
+                v11 = c * x1 + d * y1 + f
+                v20 = a * x2 + b * y2 + e
+                v21 = c * x2 + d * y2 + f
+                u0 = (min(v10, v20) - left) * sx
+                u1 = (max(v10, v20) - left) * sx
+                w0 = (min(v11, v21) - bott) * sy
+                w1 = (max(v11, v21) - bott) * sy
+                if u1 < 0 or u0 > cols or w1 < 0 or w0 > rows:
+                    continue
+                c0 = min(max(int(u0), 0), cols - 1)
+                c1 = min(int(u1), cols - 1)
+                r0 = min(max(int(w0), 0), rows - 1)
+                r1 = min(int(w1), rows - 1)
+                for row in range(r0, r1 + 1):
+                    for col in range(c0, c1 + 1):
+                        cell = row * cols + col
+                        for k in range(cells[cell], cells[cell + 1]):
+                            s = sides[k] * 4
+                            v30 = segs[s]
+                            v31 = segs[s + 1]
+                            v40 = segs[s + 2]
+                            v41 = segs[s + 3]
+                            # Segment intersection detection method (see
+                            # [intersection]).
+                            if (((v40 - v30) * (v11 - v31) -
+                                 (v10 - v30) * (v41 - v31) > 0) ==
+                                ((v40 - v30) * (v21 - v31) -
+                                 (v20 - v30) * (v41 - v31) > 0)):
+                                continue
+                            elif (((v20 - v10) * (v31 - v11) -
+                                   (v30 - v10) * (v21 - v11) > 0) ==
+                                  ((v20 - v10) * (v41 - v11) -
+                                   (v40 - v10) * (v21 - v11) > 0)):
+                                continue
+                            return [p, ptids[i], ids[sides[k] * 2],
+                                    ids[sides[k] * 2 + 1]]
+            strt = strt + pl * 2
+        return False
+
+    def membership(pts, plens, lefts, botts, rghts, tops,
+                   t_box, t_pts, t_polis, t_le):
+        strt = 0
+        for p, pl in enumerate(plens):
+            # Preliminary 1: pol's bbox vs widget's bbox.
+            if rghts[p] < t_box[0]:
+                strt = strt + pl * 2
+                continue
+            if lefts[p] > t_box[2]:
+                strt = strt + pl * 2
+                continue
+            if tops[p] < t_box[1]:
+                strt = strt + pl * 2
+                continue
+            if botts[p] > t_box[3]:
+                strt = strt + pl * 2
+                continue
+
+            for k in range(0, t_le, 2):
+                x = t_pts[k]
+                y = t_pts[k + 1]
+                # Preliminary 2: pol's bbox vs widget's points to filter out.
+                if rghts[p] < x:
+                    continue
+                if lefts[p] > x:
+                    continue
+                if tops[p] < y:
+                    continue
+                if botts[p] > y:
+                    continue
+                # Point-in-polygon (oddeven) collision detection method:
+                # Checking the membership of each poby assuming a ray at 0 angle
+                # from that poto infinity (through window right) and counting
+                # the number of times that this ray crosses the polygon line.
+                # If this number is odd, the pois inside; if it's even, the pois
+                # outside.
+                c = 0
+                j = strt + pl * 2 - 2
+                for i in range(strt, strt + pl * 2, 2):
+                    x1 = pts[j]
+                    y1 = pts[j+1]
+                    x2 = pts[i]
+                    y2 = pts[i+1]
+                    if (((y2 > y) != (y1 > y))
+                            and x < (x1 - x2) * (y - y2) / (y1 - y2) + x2):
+                        c = not c
+                    j = i
+                if c:
+                    return [p, t_polis[k]]
+            strt = strt + pl * 2
+        return False
+
+    def near_sides(pts, ptids, polids, plens, opens, le, box):
+        '''The sides of a frame that might touch [box], as (left, right,
+        bottom, top, x1, y1, x2, y2, pol, side) tuples.
+        '''
+        sides = []
+        for i in range(0, le, 2):
+            p = polids[i]
+            pl = plens[p]
+            if ptids[i] < pl - 1:
+                i2 = i + 2
+            elif p in opens:
+                continue
+            else:
+                i2 = i - pl * 2 + 2
+            x1 = pts[i]
+            y1 = pts[i + 1]
+            x2 = pts[i2]
+            y2 = pts[i2 + 1]
+            left, right = (x1, x2) if x1 < x2 else (x2, x1)
+            bott, top = (y1, y2) if y1 < y2 else (y2, y1)
+            if right < box[0] or left > box[2] or top < box[1] or bott > box[3]:
+                continue
+            sides.append((left, right, bott, top, x1, y1, x2, y2, p, ptids[i]))
+        return sides
+
+    def rect_sides(box):
+        '''The four sides of a non-Rotabox widget's box, as [near_sides].'''
+        xs = (box[0], box[2], box[2], box[0], box[0])
+        ys = (box[1], box[1], box[3], box[3], box[1])
+        return [(min(xs[k], xs[k + 1]), max(xs[k], xs[k + 1]),
+                 min(ys[k], ys[k + 1]), max(ys[k], ys[k + 1]),
+                 xs[k], ys[k], xs[k + 1], ys[k + 1], 0, k) for k in range(4)]
+
+    def contact(sides, t_sides):
+        '''Contact kernel: all the crossings between two frames' sides (see
+        [intersection]). Returns the crossing points' coordinates, the ends of
+        the sides involved (each frame's) and the first crossed side of the
+        other frame, for [manifold].
+        '''
+        xs = []
+        ys = []
+        ends = []
+        t_ends = []
+        axis = None
+        for side in sides:
+            left, right, bott, top, v10, v11, v20, v21 = side[:8]
+            for t_side in t_sides:
+                if (right < t_side[0] or left > t_side[1]
+                        or top < t_side[2] or bott > t_side[3]):
+                    continue
+                v30, v31, v40, v41 = t_side[4:8]
+                d1 = (v40 - v30) * (v11 - v31) - (v10 - v30) * (v41 - v31)
+                d2 = (v40 - v30) * (v21 - v31) - (v20 - v30) * (v41 - v31)
+                if (d1 > 0) == (d2 > 0):
+                    continue
+                if (((v20 - v10) * (v31 - v11) -
+                     (v30 - v10) * (v21 - v11) > 0) ==
+                    ((v20 - v10) * (v41 - v11) -
+                     (v40 - v10) * (v21 - v11) > 0)):
+                    continue
+                # The crossing point divides v1-v2 as v1 and v2's distances
+                # from v3-v4 (d1 and d2, of opposite signs).
+                t = d1 / (d1 - d2)
+                xs.append(v10 + (v20 - v10) * t)
+                ys.append(v11 + (v21 - v11) * t)
+                ends.extend((v10, v11, v20, v21))
+                t_ends.extend((v30, v31, v40, v41))
+                if axis is None:
+                    axis = (v40 - v30, v41 - v31)
+        return xs, ys, ends, t_ends, axis
+
+    def manifold(xs, ys, ends, t_ends, axis, box, t_box):
+        '''The contact manifold of two frames, from their crossings (see
+        [contact]), as [points, normal, depth]:
+        The contact line runs through the crossing points' centroid, along
+        their principal axis (along the crossed side, for a single point).
+        The normal is perpendicular to it, pointing from this frame's bbox
+        center towards the other's, and the depth adds up how far the crossing
+        sides of each frame reach past the line, into the other frame.
+        '''
+        n = len(xs)
+        mx = sum(xs) / n
+        my = sum(ys) / n
+        sxx = syy = sxy = 0.
+        for k in range(n):
+            dx = xs[k] - mx
+            dy = ys[k] - my
+            sxx += dx * dx
+            syy += dy * dy
+            sxy += dx * dy
+        if sxx + syy > 1e-9:
+            angle = .5 * atan2(2. * sxy, sxx - syy)
+            ax = cos(angle)
+            ay = sin(angle)
+        else:
+            norm = sqrt(axis[0] * axis[0] + axis[1] * axis[1])
+            ax = axis[0] / norm
+            ay = axis[1] / norm
+        nx = -ay
+        ny = ax
+        if (nx * (t_box[0] + t_box[2] - box[0] - box[2])
+                + ny * (t_box[1] + t_box[3] - box[1] - box[3]) < 0):
+            nx = ay
+            ny = -ax
+        depth = t_depth = 0.
+        for k in range(0, len(ends), 2):
+            d = (ends[k] - mx) * nx + (ends[k + 1] - my) * ny
+            if d > depth:
+                depth = d
+            d = (mx - t_ends[k]) * nx + (my - t_ends[k + 1]) * ny
+            if d > t_depth:
+                t_depth = d
+        return [list(zip(xs, ys)), (nx, ny), depth + t_depth]
+
+    def containment(box, t_box):
+        '''The contact manifold of two frames when one contains the other:
+        no points, the normal from this frame's bbox center towards the
+        other's, and the depth by the bboxes' projections on it.
+        '''
+        nx = t_box[0] + t_box[2] - box[0] - box[2]
+        ny = t_box[1] + t_box[3] - box[1] - box[3]
+        norm = sqrt(nx * nx + ny * ny)
+        if norm:
+            nx /= norm
+            ny /= norm
+        else:
+            nx = 0.
+            ny = 1.
+        high = (box[2] if nx > 0 else box[0]) * nx + \
+            (box[3] if ny > 0 else box[1]) * ny
+        t_low = (t_box[0] if nx > 0 else t_box[2]) * nx + \
+            (t_box[1] if ny > 0 else t_box[3]) * ny
+        return [[], (nx, ny), high - t_low]
+
+    def contact_bounds(rid, wid, frame='bounds', tframe='bounds'):
+        '''[collide_bounds], returning the contact manifold of a collision
+        ([points, normal, depth], see [manifold]) instead of the first
+        crossing, or False.
+        All the crossings are found in a single pass over the sides. With
+        none found, the bounds (unless both in segment mode) may still
+        contain one another.
+        '''
+        try:
+            this = peers[rid]
+            box = this['bbox']
+        except KeyError:
+            return False
+        try:
+            that = peers[wid]
+            t_box = that['bbox']
+        except TypeError:
+            that = None
+            t_box = wid
+        if (len(box) < 4 or len(t_box) < 4
+                or box[2] < t_box[0] or box[0] > t_box[2]
+                or box[3] < t_box[1] or box[1] > t_box[3]):
+            return False
+        bounds = this[frame]
+        if that is None:
+            if 'tiers' in bounds and apart_box(bounds, t_box):
+                return False
+            t_sides = rect_sides(t_box)
+        else:
+            tbounds = that[tframe]
+            if ('tiers' in bounds and 'tiers' in tbounds
+                    and apart(bounds, tbounds)):
+                return False
+            t_sides = near_sides(tbounds['points'], tbounds['pt_ids'],
+                                 tbounds['pol_ids'], tbounds['pol_lens'],
+                                 tbounds['opens'] if that['seg'] else (),
+                                 tbounds['length'], box)
+        sides = near_sides(bounds['points'], bounds['pt_ids'],
+                           bounds['pol_ids'], bounds['pol_lens'],
+                           bounds['opens'] if this['seg'] else (),
+                           bounds['length'], t_box)
+        xs, ys, ends, t_ends, axis = contact(sides, t_sides)
+        if xs:
+            return manifold(xs, ys, ends, t_ends, axis, box, t_box)
+        return contained(this, that, box, t_box, rid, wid, frame, tframe)
+
+    def contained(this, that, box, t_box, rid, wid, frame, tframe):
+        '''[containment] if one of two frames with no crossing sides contains
+        the other (see [contact_bounds]), else False.
+        '''
+        if this['seg'] and (that is None or that['seg']):
+            return False
+        if that is None:
+            if not ((t_box[0] <= box[0] and box[2] <= t_box[2]
+                     and t_box[1] <= box[1] and box[3] <= t_box[3])
+                    or point_in_bounds(t_box[0], t_box[1], rid, frame)):
+                return False
+        elif not (collide_bounds(rid, wid, frame, tframe)
+                  or collide_bounds(wid, rid, tframe, frame)):
+            return False
+        return containment(box, t_box)
+
+    def separated(axes, a_strt, al, m, t_pts, t_ppts, t_strt, tpl):
+        '''Whether any of a convex piece's axes (see [define_pieces]) is a
+        separating axis, i.e. the piece's projection on it and that of the
+        other piece's points don't overlap. The axes and the piece's own
+        projections are mapped from hint space to the piece's pose by the
+        transpose of [m], its frame's map from world to hint space (see
+        [local_map]).
+        '''
+        a, b, c, d, e, f = m
+        for k in range(a_strt * 4, (a_strt + al) * 4, 4):
+            hx = axes[k]
+            hy = axes[k + 1]
+            nx = a * hx + c * hy
+            ny = b * hx + d * hy
+            off = hx * e + hy * f
+            i = t_ppts[t_strt]
+            t_low = t_high = nx * t_pts[i] + ny * t_pts[i + 1]
+            for k2 in range(t_strt + 1, t_strt + tpl):
+                i = t_ppts[k2]
+                dot = nx * t_pts[i] + ny * t_pts[i + 1]
+                if dot < t_low:
+                    t_low = dot
+                elif dot > t_high:
+                    t_high = dot
+            if axes[k + 3] - off < t_low or t_high < axes[k + 2] - off:
+                return True
+        return False
+
+    def separates(bounds, tbounds, nx, ny):
+        '''Whether the projections of two frames' points on the axis (nx, ny)
+        don't overlap (then, neither do the bounds).
+        '''
+        pts = bounds['points']
+        t_pts = tbounds['points']
+        ds = [nx * pts[i] + ny * pts[i + 1]
+              for i in range(0, bounds['length'], 2)]
+        t_ds = [nx * t_pts[i] + ny * t_pts[i + 1]
+                for i in range(0, tbounds['length'], 2)]
+        return max(ds) < min(t_ds) or max(t_ds) < min(ds)
+
+    def piece_boxes(pts, plens, ppts):
+        boxes = []
+        strt = 0
+        for pl in plens:
+            xs = [pts[i] for i in ppts[strt:strt + pl]]
+            ys = [pts[i + 1] for i in ppts[strt:strt + pl]]
+            boxes.append((min(xs), min(ys), max(xs), max(ys)))
+            strt += pl
+        return boxes
+
+    def sat(pts, plens, ppts, ppols, axes, alens, m, t_pts, t_plens, t_ppts,
+            t_ppols, t_axes, t_alens, t_m):
+        '''Separating axis test between the convex pieces of two frames:
+        Two convex polygons don't overlap if (and only if) the projections
+        of their points on one of their edges' normals don't overlap.
+        Each pair of pieces with overlapping boxes is checked, and the indices
+        of the first overlapping pair's polygons are returned.
+        '''
+        boxes = piece_boxes(pts, plens, ppts)
+        t_boxes = piece_boxes(t_pts, t_plens, t_ppts)
+        strt = a_strt = 0
+        for p, pl in enumerate(plens):
+            box = boxes[p]
+            t_strt = t_a_strt = 0
+            for t_p, tpl in enumerate(t_plens):
+                t_box = t_boxes[t_p]
+                if not (box[2] < t_box[0] or box[0] > t_box[2]
+                        or box[3] < t_box[1] or box[1] > t_box[3]
+                        or separated(axes, a_strt, alens[p], m,
+                                     t_pts, t_ppts, t_strt, tpl)
+                        or separated(t_axes, t_a_strt, t_alens[t_p], t_m,
+                                     pts, ppts, strt, pl)):
+                    return [ppols[p], t_ppols[t_p]]
+                t_strt += tpl
+                t_a_strt += t_alens[t_p]
+            strt += pl
+            a_strt += alens[p]
+        return False
+
+    def sat_bounds(rid, wid, frame='bounds', tframe='bounds'):
+        '''[collide_bounds], using the separating axis test when both parties
+        have convex pieces (see [define_pieces]).
+        '''
+        try:
+            this = peers[rid]
+            that = peers[wid]
+            bounds = this[frame]
+            tbounds = that[tframe]
+        except (KeyError, TypeError):
+            return collide_bounds(rid, wid, frame, tframe)
+        if (bounds.get('piece_lens') is None
+                or tbounds.get('piece_lens') is None):
+            return collide_bounds(rid, wid, frame, tframe)
+        box = this['bbox']
+        t_box = that['bbox']
+        if (len(box) < 4 or len(t_box) < 4
+                or box[2] < t_box[0] or box[0] > t_box[2]
+                or box[3] < t_box[1] or box[1] > t_box[3]):
+            return False
+        m = local_map(rid, frame)
+        t_m = local_map(wid, tframe)
+        if m is None or t_m is None:
+            return collide_bounds(rid, wid, frame, tframe)
+        return sat(bounds['points'], bounds['piece_lens'],
+                   bounds['piece_pts'], bounds['piece_pols'],
+                   bounds['piece_axes'], bounds['axis_lens'], m,
+                   tbounds['points'], tbounds['piece_lens'],
+                   tbounds['piece_pts'], tbounds['piece_pols'],
+                   tbounds['piece_axes'], tbounds['axis_lens'], t_m)
+
+    def circle_radius(hints, le, cx, cy, w, h):
+        '''The radius of the bounding circle at [w], [h] scale.'''
+        r = 0.
+        for i in range(0, le, 2):
+            dx = (hints[i] - cx) * w
+            dy = (hints[i + 1] - cy) * h
+            if dx * dx + dy * dy > r:
+                r = dx * dx + dy * dy
+        return r ** .5
+
+    def fit_radius(bounds, w, h):
+        '''Recalculating a frame's bounding circle radius for the [w], [h]
+        scale, unless it's already that of the last one (to rounding).
+        '''
+        tiers = bounds['tiers']
+        if abs(w - tiers[3]) > 1e-9 * w or abs(h - tiers[4]) > 1e-9 * h:
+            tiers[2] = circle_radius(bounds['hints'], bounds['length'],
+                                     tiers[18], tiers[19], w, h)
+            tiers[3] = w
+            tiers[4] = h
+
+    def world_tiers(bounds, obb):
+        '''A frame's bounding circle (x, y, radius) and (if [obb]) its oriented
+        box's corners, mapped from hint space through the frame's anchor
+        points. The radius is only recalculated when the scale changes.
+        '''
+        pts = bounds['points']
+        tiers = bounds['tiers']
+        i0, i1, i2 = bounds['anchors']
+        p0x = pts[i0]
+        p0y = pts[i0 + 1]
+        ux = pts[i1] - p0x
+        uy = pts[i1 + 1] - p0y
+        vx = pts[i2] - p0x
+        vy = pts[i2 + 1] - p0y
+        ax = ux * tiers[14] + vx * tiers[16]
+        ay = uy * tiers[14] + vy * tiers[16]
+        bx = ux * tiers[15] + vx * tiers[17]
+        by = uy * tiers[15] + vy * tiers[17]
+        fit_radius(bounds, (ax * ax + ay * ay) ** .5,
+                   (bx * bx + by * by) ** .5)
+        circle = (p0x + ux * tiers[0] + vx * tiers[1],
+                  p0y + uy * tiers[0] + vy * tiers[1], tiers[2])
+        if not obb:
+            return circle, None
+        corners = [(p0x + ux * tiers[k] + vx * tiers[k + 1],
+                    p0y + uy * tiers[k] + vy * tiers[k + 1])
+                   for k in range(5, 13, 2)]
+        return circle, corners
+
+    def box_corners(box):
+        return [(box[0], box[1]), (box[2], box[1]), (box[2], box[3]),
+                (box[0], box[3])]
+
+    def boxes_apart(corners, t_corners):
+        '''Separating axis test between two rectangles (lists of corners).'''
+        for rect in (corners, t_corners):
+            for k in (1, 3):
+                nx = rect[k][0] - rect[0][0]
+                ny = rect[k][1] - rect[0][1]
+                ds = [nx * x + ny * y for x, y in corners]
+                t_ds = [nx * x + ny * y for x, y in t_corners]
+                if max(ds) < min(t_ds) or max(t_ds) < min(ds):
+                    return True
+        return False
+
+    def apart(bounds, tbounds):
+        '''Early-outs between two frames with tiers: bounding circles, then
+        oriented boxes (if either frame has them enabled).'''
+        obb = bounds['tiers'][13] or tbounds['tiers'][13]
+        (x, y, r), corners = world_tiers(bounds, obb)
+        (t_x, t_y, t_r), t_corners = world_tiers(tbounds, obb)
+        if (x - t_x) ** 2 + (y - t_y) ** 2 > (r + t_r) ** 2:
+            return True
+        return obb and boxes_apart(corners, t_corners)
+
+    def apart_box(bounds, box):
+        '''Early-outs between a frame with tiers and a widget's box.'''
+        obb = bounds['tiers'][13]
+        (x, y, r), corners = world_tiers(bounds, obb)
+        dx = max(box[0] - x, 0., x - box[2])
+        dy = max(box[1] - y, 0., y - box[3])
+        if dx * dx + dy * dy > r * r:
+            return True
+        return obb and boxes_apart(corners, box_corners(box))
+
+    def collide_bounds(rid, wid, frame='bounds', tframe='bounds'):
+
+        try:
+            this_box = peers[rid]['bbox']
+        except KeyError:
+            return False
+
+        try:
+            that_box = peers[wid]['bbox']
+        except TypeError:
+            that_box = wid
+
+        try:
+            if this_box[2] < that_box[0]:
+                return False
+        except IndexError:
+            return False
+        if this_box[0] > that_box[2]:
+            return False
+        if this_box[3] < that_box[1]:
+            return False
+        if this_box[1] > that_box[3]:
+            return False
+
+        bounds = peers[rid][frame]
+        try:
+            tbounds = peers[wid][tframe]
+        except TypeError:
+            if 'tiers' in bounds and apart_box(bounds, that_box):
+                return False
+            return intersection_w(bounds['points'], bounds['pt_ids'],
+                                  bounds['pol_lens'], bounds['opens'], that_box)
+
+        if 'tiers' in bounds and 'tiers' in tbounds and apart(bounds, tbounds):
+            return False
+
+        if peers[rid]['seg']:
+            if peers[wid]['seg']:
+                return intersection(bounds['points'], bounds['pt_ids'],
+                                    bounds['length'], bounds['pol_lens'],
+                                    bounds['opens'], bounds['lefts'],
+                                    bounds['botts'], bounds['rights'],
+                                    bounds['tops'], that_box,
+                                    tbounds['points'], tbounds['pt_ids'],
+                                    tbounds['length'], tbounds['pol_lens'],
+                                    tbounds['opens'], tbounds['lefts'],
+                                    tbounds['botts'], tbounds['rights'],
+                                    tbounds['tops'])
+            else:
+                return intersection_f(bounds['points'], bounds['pt_ids'],
+                                      bounds['pol_lens'], bounds['opens'],
+                                      tbounds['points'], tbounds['pol_ids'],
+                                      tbounds['pt_ids'], tbounds['pol_lens'])
+        else:
+            return membership(bounds['points'], bounds['pol_lens'],
+                              bounds['lefts'], bounds['botts'], bounds['rights'],
+                              bounds['tops'], that_box, tbounds['points'],
+                              tbounds['pol_ids'],
+                              tbounds['length'])
+
+    def point_in_bounds(x, y, rid, frame='bounds'):
+            '''"Oddeven" point-in-polygon method:
+            Checking the membership of touch poby assuming a ray at 0 angle
+            from that poto infinity (through window right) and counting the
+            number of polygon sides that this ray crosses. If this number is
+            odd, the pois inside; if it's even, the pois outside.
+            A point outside the bounds' bbox (or, in membership mode, outside
+            a polygon's box) is rejected without scanning any sides.
+            '''
+            body = peers[rid]
+            bbox = body['bbox']
+            if len(bbox) == 4 and (x < bbox[0] or x > bbox[2]
+                                   or y < bbox[1] or y > bbox[3]):
+                return False
+            bounds = body[frame]
+            pts = bounds['points']
+            boxed = not body['seg']
+            lefts = bounds['lefts']
+            botts = bounds['botts']
+            rights = bounds['rights']
+            tops = bounds['tops']
+            strt = 0
+            for r, rang in enumerate(bounds['pol_lens']):
+                end = strt + rang * 2
+                if boxed and (x < lefts[r] or x > rights[r]
+                              or y < botts[r] or y > tops[r]):
+                    strt = end
+                    continue
+                c = 0
+                j = end - 2
+                for i in range(strt, end, 2):
+                    x1, y1 = pts[j], pts[j+1]
+                    x2, y2 = pts[i], pts[i+1]
+                    if (((y2 > y) != (y1 > y)) and
+                            x < (x1 - x2) * (y - y2) / (y1 - y2) + x2):
+                        c = not c
+                    j = i
+                if c:
+                    return c
+                strt = end
+            return False
+
+    def update_bounds(motion, angle, origin, rid, frame='bounds'):
+        '''Updating the elements of the collision detection checks.
+        '''
+        try:
+            bounds = peers[rid][frame]
+        except TypeError:
+            return
+
+        if motion:
+            move(bounds['points'], bounds['length'], motion[0], motion[1])
+
+        if angle:
+            rotate(bounds['points'], bounds['length'], angle, origin[0],
+                   origin[1])
+
+        bounds['state'] = None
+        peers[rid]['bbox'] = calc_boxes(bounds, peers[rid]['seg'])
+        bump_version(rid)
+
+    def aniupdate_bounds(motion, pos, angle, origin, rid, frame='bounds'):
+        '''Updating the elements of the collision detection checks,
+        in case of an animation.
+        The frame is placed straight from its hints, at the size of the last
+        [aniresize]. A frame already placed at the same size, position and
+        angle (e.g. a loop's frame coming round again on a still widget)
+        just gets its bbox back.
+        '''
+        try:
+            bounds = peers[rid][frame]
+        except TypeError:
+            return
+
+        if motion:
+            pos0, pos1 = pos[0], pos[1]
+        elif bounds.get('state'):  # Where the frame was last placed
+            pos0, pos1 = bounds['state'][2:4]
+        else:
+            pos0 = pos1 = 0.
+        width, height = bounds.get('size', (1., 1.))
+        if place(bounds, peers[rid], width, height, pos0, pos1, angle or 0.,
+                 origin[0], origin[1]):
+            bump_version(rid)
+
+    def transform_bounds(width, height, pos, angle, origin, rid,
+                         frame='bounds'):
+        '''Updating the elements of the collision detection checks, straight
+        from the hints, using the whole transformation instead of its last
+        changes. Nothing is done if neither the transformation nor the frame
+        have changed since the last call.
+        '''
+        try:
+            bounds = peers[rid][frame]
+        except TypeError:
+            return
+
+        if place(bounds, peers[rid], width, height, pos[0], pos[1], angle,
+                 origin[0], origin[1]):
+            bump_version(rid)
+
+    # No batch version of [transform_bounds] here: a loop over the frames
+    # would be all it does. The NumPy one below transforms all the frames'
+    # hints as one array and the Cython one runs the whole loop in C; without
+    # either, [update_rotaboxes] calls [transform_bounds] for each widget.
+    batch_transform_bounds = None
+
+    def place(bounds, body, width, height, pos0, pos1, angle, orig0, orig1):
+        '''Transforming a frame's hints into its points and refilling its
+        bbox, unless the frame is current and its transformation the same.
+        Returns whether the points were transformed.'''
+        state = (width, height, pos0, pos1, angle, orig0, orig1)
+        bbox = bounds.get('bbox')
+        if bbox is not None and bounds['state'] == state:
+            body['bbox'] = bbox
+            return False
+
+        transform(bounds['hints'], bounds['points'], bounds['length'], width,
+                  height, pos0, pos1, angle, orig0, orig1)
+
+        bounds['state'] = state
+        body['bbox'] = bounds['bbox'] = calc_boxes(bounds, body['seg'], bbox)
+        return True
+
+    def resize(width, height, rid):
+        for k, frame in iteritems(peers[rid]):
+            if k == 'bounds':
+                bounds = peers[rid]['bounds']
+                bounds['points'][:] = bounds['hints']
+                scale(bounds['points'], bounds['length'], width, height)
+                bounds['state'] = None
+                break
+        else:
+            for k, frame in iteritems(peers[rid]):
+                if k != 'bbox' and k != 'vbbox' and k != 'hhits' and k != 'seg' \
+                        and k != 'friendly':
+                    frame['points'][:] = frame['hints']
+                    scale(frame['points'], frame['length'], width, height)
+                    frame['state'] = None
+        bump_version(rid)
+
+    def aniresize(width, height, rid):
+        '''Recording the size of an animation's frames. Nothing is scaled
+        here; each frame is scaled by [aniupdate_bounds], when it's shown.
+        '''
+        size = (width, height)
+        for k, frame in iteritems(peers[rid]):
+            if k != 'bbox' and k != 'seg':
+                frame['size'] = size
+
+    # ___________________________________________________________________ STORE
+    # The frames' own arrays (points and boxes) are slices of a few large
+    # float ('d') buffers, shared by all the bounds. Each frame takes a single
+    # contiguous run, so all its data lie together. The buffers grow a block at
+    # a time and a released run is reused by the next frame of the same size
+    # (e.g. a respawn). The rest of a frame's data is its template's (see
+    # [define_bounds]).
+    BLOCK = 1 << 16
+    FLOATS = ('points', 'lefts', 'botts', 'rights', 'tops')
+
+    store = {'d': []}  # The blocks of each kind.
+    tails = {'d': 0}  # First unused index of each kind's last block.
+    free_runs = {'d': {}}  # {size: [(block, start), ...]}
+    slots = {}  # {rid: [(kind, block, start, size), ...]}
+
+    def new_block(kind, size):
+        return array(kind, [0]) * size
+
+    try:
+        memoryview(array('d'))
+        views = memoryview
+    except TypeError:  # Python 2.x arrays don't expose their buffer.
+        views = None
+
+    def allocate(kind, size, rid):
+        '''A run of [size] items in the [kind] buffers, owned by [rid].'''
+        runs = free_runs[kind].get(size)
+        if runs:
+            b, start = runs.pop()
+        else:
+            blocks = store[kind]
+            if not blocks or tails[kind] + size > len(blocks[-1]):
+                blocks.append(new_block(kind, max(BLOCK, size)))
+                tails[kind] = 0
+            b = len(blocks) - 1
+            start = tails[kind]
+            tails[kind] += size
+        slots.setdefault(rid, []).append((kind, b, start, size))
+        return views(store[kind][b])[start:start + size]
+
+    def free_slots(rid):
+        for kind, b, start, size in slots.pop(rid, ()):
+            free_runs[kind].setdefault(size, []).append((b, start))
+
+    def pack_frame(bounds, rid):
+        '''Copying a frame's own arrays into the store.'''
+        keys = [key for key in FLOATS if key in bounds]
+        if views is None:
+            for key in keys:
+                bounds[key] = bounds[key][:]
+            return
+        run = allocate('d', sum(len(bounds[key]) for key in keys), rid)
+        start = 0
+        for key in keys:
+            stop = start + len(bounds[key])
+            run[start:stop] = bounds[key]
+            bounds[key] = run[start:stop]
+            start = stop
+
+    def release_bounds(rid):
+        '''Removing [rid]'s bounds and returning their store runs for reuse.'''
+        peers.pop(rid, None)
+        versions.pop(rid, None)
+        free_slots(rid)
+        drop_template(rid)
+
+    def get_store():
+        return store, slots
+
+    # ________________________________________________________________ VERSIONS
+    # A version for each rid's bounds, changed whenever their points are, to
+    # validate the results cached for them (see [cached_check]). Versions come
+    # from a single counter, so bounds defined again under a released rid
+    # never get an old one back.
+    versions = {}
+    version_clock = count(1)
+
+    def bump_version(rid):
+        versions[rid] = next(version_clock)
+
+    def get_versions():
+        return versions
+
+    def define_frame(frame, opens, seg_mode, bounds):
+        '''Filling a frame's arrays from its polygons. The index arrays are
+        sized from the polygons' lengths and filled a polygon at a time.
+        A [CompiledFrame]'s arrays are copied whole.
+        '''
+        if isinstance(frame, CompiledFrame):
+            plens = frame.lens[:]
+            hints = frame.hints[:]
+        else:
+            plens = array('i', [len(pol) for pol in frame])
+            hints = array('d', [coord for pol in frame for point in pol
+                                for coord in (point[0], point[1])])
+        count = len(hints)
+        pol_ids = array('i', [0]) * count
+        pt_ids = array('i', [0]) * count
+        pairs = array('i', [i >> 1 for i in range(max(plens or [0]) * 2)])
+        strt = 0
+        for p, plen in enumerate(plens):
+            end = strt + plen * 2
+            pol_ids[strt:end] = array('i', [p]) * (plen * 2)
+            pt_ids[strt:end] = pairs[:plen * 2]
+            strt = end
+
+        bounds['hints'] = hints
+        bounds['pol_ids'] = pol_ids
+        bounds['pt_ids'] = pt_ids
+        bounds['pol_lens'] = plens
+        bounds['length'] = count
+
+        if seg_mode:
+            length = count
+        else:
+            length = len(plens)
+        bounds['lefts'] = array('d', [float("inf")]) * length
+        bounds['botts'] = array('d', [float("inf")]) * length
+        bounds['rights'] = array('d', [0.]) * length
+        bounds['tops'] = array('d', [0.]) * length
+
+        if seg_mode:
+            bounds['opens'] = array('i', opens)
+
+        bounds['points'] = hints[:]
+
+    # _______________________________________________________________ TEMPLATES
+    # The frames built from a definition (hints, indices, polygons' lengths and
+    # open flags), shared by all the bounds defined identically. They're kept
+    # as long as any bounds use them.
+    templates = {}  # {definition: [frames, users]}
+    template_keys = {}  # {rid: definition}
+
+    def frozen(hints):
+        '''A hashable copy of [custom_bounds] or [open_bounds].'''
+        if isinstance(hints, CompiledFrame):
+            return hints.key
+        if isinstance(hints, dict):
+            return tuple(sorted((key, frozen(item))
+                                for key, item in iteritems(hints)))
+        if not hints or not isinstance(hints[0], (list, tuple)):
+            return tuple(hints)
+        if hints[0] and isinstance(hints[0][0], (list, tuple)):
+            return tuple([frozen(item) for item in hints])
+        return tuple(map(tuple, hints))
+
+    def drop_template(rid):
+        key = template_keys.pop(rid, None)
+        if key is not None:
+            entry = templates[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del templates[key]
+
+    def define_bounds(custom_bounds, open_bounds, segment_mode, rid, pc):
+        '''Organising the data from the user's [self.custom_bounds] hints.
+        The frames are built once per definition and shared. Each bounds only
+        gets its own points and boxes (and a 'shared' reference to its
+        template frame, for the module functions to keep what they derive
+        from the hints).
+        The [pc] parameter is not used. It's here for compatibility with the
+        equivalent function in the cython module.
+        '''
+        free_slots(rid)
+        drop_template(rid)
+        key = (frozen(custom_bounds), frozen(open_bounds), bool(segment_mode))
+        entry = templates.get(key)
+        if entry is None:
+            entry = templates[key] = [build_frames(custom_bounds, open_bounds,
+                                                   segment_mode), 0]
+        entry[1] += 1
+        template_keys[rid] = key
+
+        frames = {}
+        for k, template in iteritems(entry[0]):
+            bounds = dict(template)
+            bounds['shared'] = template
+            pack_frame(bounds, rid)
+            frames[k] = bounds
+        frames['bbox'] = array('d', [])
+        frames['seg'] = segment_mode
+
+        peers[rid] = frames
+        bump_version(rid)
+
+    def build_frames(custom_bounds, open_bounds, segment_mode):
+        frames = {}
+
+        if isinstance(custom_bounds, dict):   # Animation case
+            for key, frame in iteritems(custom_bounds):
+                bounds = {'hints': array('d'), 'points': array('d'),
+                          'pol_ids': array('i'), 'pt_ids': array('i'),
+                          'pol_lens': array('i'), 'length': 0}
+                if isinstance(open_bounds, dict):
+                    opens = array('i', open_bounds[key])
+                else:
+                    opens = array('i', open_bounds)
+
+                define_frame(frame, opens, segment_mode, bounds)
+
+                frames[key] = bounds
+
+        else:  # Single image case
+            bounds = {'hints': array('d'), 'points': array('d'),
+                      'pol_ids': array('i'), 'pt_ids': array('i'),
+                      'pol_lens': array('i'), 'length': 0}
+            define_frame(custom_bounds, open_bounds, segment_mode, bounds)
+
+            frames['bounds'] = bounds
+
+        return frames
+
+    if np is not None:
+        # ___________________________________________________ NUMPY FUNCTIONS
+        # Whole-array equivalents of the above. Each frame's data are kept in
+        # contiguous numpy arrays, along with a few index arrays (built once in
+        # [define_frame]) that replace the per point bookkeeping of the loops.
+
+        def new_block(kind, size):
+            return np.zeros(size, np.float64 if kind == 'd' else np.intp)
+
+        def views(block):
+            return block
+
+        def scale(points, length, width, height):
+            points[0::2] *= width
+            points[1::2] *= height
+
+        def move(points, length, pos0, pos1):
+            points[0::2] += pos0
+            points[1::2] += pos1
+
+        def rotate(points, length, angle, orig0, orig1):
+            c = cos(angle)
+            s = sin(angle)
+            xs = points[0::2] - orig0
+            ys = points[1::2] - orig1
+            points[0::2] = xs * c - ys * s + orig0
+            points[1::2] = xs * s + ys * c + orig1
+
+        def transform(hints, points, length, width, height, pos0, pos1, angle,
+                      orig0, orig1):
+            c = cos(angle)
+            s = sin(angle)
+            xs = hints[0::2] * width + (pos0 - orig0)
+            ys = hints[1::2] * height + (pos1 - orig1)
+            points[0::2] = xs * c - ys * s + orig0
+            points[1::2] = xs * s + ys * c + orig1
+
+        def calc_boxes(bounds, seg_mode, bbox=None):
+            xs = bounds['points'][0::2]
+            ys = bounds['points'][1::2]
+            if seg_mode:
+                nexts = bounds['nexts']
+                lefts = np.minimum(xs, xs[nexts])
+                botts = np.minimum(ys, ys[nexts])
+                rights = np.maximum(xs, xs[nexts])
+                tops = np.maximum(ys, ys[nexts])
+                bounds['lefts'][0::2] = lefts
+                bounds['botts'][0::2] = botts
+                bounds['rights'][0::2] = rights
+                bounds['tops'][0::2] = tops
+            else:
+                starts = bounds['starts']
+                lefts = bounds['lefts']
+                botts = bounds['botts']
+                rights = bounds['rights']
+                tops = bounds['tops']
+                np.minimum.reduceat(xs, starts, out=lefts)
+                np.minimum.reduceat(ys, starts, out=botts)
+                np.maximum.reduceat(xs, starts, out=rights)
+                np.maximum.reduceat(ys, starts, out=tops)
+                np.maximum(rights, 0., out=rights)
+                np.maximum(tops, 0., out=tops)
+
+            if bbox is None:
+                bbox = array('d', [0., 0., 0., 0.])
+            bbox[0] = lefts.min()
+            bbox[1] = botts.min()
+            bbox[2] = max(rights.max(), 0.)
+            bbox[3] = max(tops.max(), 0.)
+            return bbox
+
+        def batch_transform_bounds(rids, frames, sizes, positions, angles,
+                                   origins):
+            '''[transform_bounds] for many bounds in a single call.
+            [sizes], [positions] and [origins] are flat sequences of x, y
+            pairs (e.g. array('d', [x0, y0, x1, y1, ...])), in the order of
+            [rids]. The hints of all the frames that moved are concatenated
+            and transformed at once, then each frame gets its points back and
+            its boxes refilled.
+            '''
+            moved = []
+            for n in range(len(rids)):
+                n2 = n * 2
+                body = peers[rids[n]]
+                bounds = body[frames[n]]
+                state = (sizes[n2], sizes[n2 + 1], positions[n2],
+                         positions[n2 + 1], angles[n], origins[n2],
+                         origins[n2 + 1])
+                bbox = bounds.get('bbox')
+                if bbox is not None and bounds['state'] == state:
+                    body['bbox'] = bbox
+                    continue
+                bounds['state'] = state
+                moved.append((n, rids[n], body, bounds))
+            if not moved:
+                return
+
+            ns = np.array([m[0] for m in moved])
+            counts = np.array([len(m[3]['hints']) // 2 for m in moved])
+            sizes = np.asarray(sizes, np.float64).reshape(-1, 2)[ns]
+            shifts = (np.asarray(positions, np.float64).reshape(-1, 2)[ns]
+                      - np.asarray(origins, np.float64).reshape(-1, 2)[ns])
+            origins = np.asarray(origins, np.float64).reshape(-1, 2)[ns]
+            angles = np.asarray(angles, np.float64)[ns]
+            cs = np.repeat(np.cos(angles), counts)
+            ss = np.repeat(np.sin(angles), counts)
+            hints = np.concatenate([m[3]['hints'] for m in moved])
+            xs = (hints[0::2] * np.repeat(sizes[:, 0], counts)
+                  + np.repeat(shifts[:, 0], counts))
+            ys = (hints[1::2] * np.repeat(sizes[:, 1], counts)
+                  + np.repeat(shifts[:, 1], counts))
+            wxs = xs * cs - ys * ss + np.repeat(origins[:, 0], counts)
+            wys = xs * ss + ys * cs + np.repeat(origins[:, 1], counts)
+
+            at = 0
+            for n, rid, body, bounds in moved:
+                points = bounds['points']
+                stop = at + len(points) // 2
+                points[0::2] = wxs[at:stop]
+                points[1::2] = wys[at:stop]
+                at = stop
+                body['bbox'] = bounds['bbox'] = calc_boxes(
+                    bounds, body['seg'], bounds.get('bbox'))
+                bump_version(rid)
+
+        def circle_radius(hints, le, cx, cy, w, h):
+            return float(np.hypot((hints[0:le:2] - cx) * w,
+                                  (hints[1:le:2] - cy) * h).max())
+
+        def sides(bounds, box, closed=False):
+            '''Sides of a frame that might touch [box] (indices and ends).
+            If [closed] is True, the closing sides of open polygons count too.
+            '''
+            pts = bounds['points']
+            ids = bounds['all_sides'] if closed else bounds['sides']
+            nexts = bounds['nexts'][ids]
+            x1 = pts[ids * 2]
+            y1 = pts[ids * 2 + 1]
+            x2 = pts[nexts * 2]
+            y2 = pts[nexts * 2 + 1]
+            near = ((np.maximum(x1, x2) >= box[0])
+                    & (np.minimum(x1, x2) <= box[2])
+                    & (np.maximum(y1, y2) >= box[1])
+                    & (np.minimum(y1, y2) <= box[3]))
+            return ids[near], x1[near], y1[near], x2[near], y2[near]
+
+        def box_sides(box):
+            '''The four sides of a non-Rotabox widget's box.'''
+            return (np.arange(4), np.array([box[0], box[2], box[2], box[0]]),
+                    np.array([box[1], box[1], box[3], box[3]]),
+                    np.array([box[2], box[2], box[0], box[0]]),
+                    np.array([box[1], box[3], box[3], box[1]]))
+
+        def intersection_np(this, that):
+            '''Segment intersection detection method, for all the pairs of
+            sides at once (see [intersection] above).
+            Returns the indices of the first intersecting pair or None.
+            '''
+            ids, v10, v11, v20, v21 = this
+            t_ids, v30, v31, v40, v41 = that
+            if not len(ids) or not len(t_ids):
+                return None
+            v10 = v10[:, None]
+            v11 = v11[:, None]
+            v20 = v20[:, None]
+            v21 = v21[:, None]
+            hits = ((((v40 - v30) * (v11 - v31)
+                      - (v10 - v30) * (v41 - v31)) > 0)
+                    != (((v40 - v30) * (v21 - v31)
+                         - (v20 - v30) * (v41 - v31)) > 0))
+            hits &= ((((v20 - v10) * (v31 - v11)
+                       - (v30 - v10) * (v21 - v11)) > 0)
+                     != (((v20 - v10) * (v41 - v11)
+                          - (v40 - v10) * (v21 - v11)) > 0))
+            first = hits.argmax()
+            i, j = divmod(first, len(t_ids))
+            if not hits[i, j]:
+                return None
+            return ids[i], t_ids[j]
+
+        def inside(bounds, p, xs, ys):
+            '''Oddeven membership of each point (xs[k], ys[k]) in polygon p.'''
+            pts = bounds['points']
+            strt = bounds['starts'][p]
+            ids = np.arange(strt, strt + bounds['pol_lens'][p])
+            prevs = bounds['prevs'][ids]
+            x1 = pts[prevs * 2]
+            y1 = pts[prevs * 2 + 1]
+            x2 = pts[ids * 2]
+            y2 = pts[ids * 2 + 1]
+            xs = xs[:, None]
+            ys = ys[:, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cross = (((y2 > ys) != (y1 > ys))
+                         & (xs < (x1 - x2) * (ys - y2) / (y1 - y2) + x2))
+            return np.count_nonzero(cross, axis=1) % 2 == 1
+
+        def membership_np(bounds, t_box, tbounds):
+            t_xs = tbounds['points'][0::2]
+            t_ys = tbounds['points'][1::2]
+            for p in range(len(bounds['pol_lens'])):
+                left = bounds['lefts'][p]
+                bott = bounds['botts'][p]
+                rght = bounds['rights'][p]
+                top = bounds['tops'][p]
+                # Preliminary 1: pol's bbox vs widget's bbox.
+                if (rght < t_box[0] or left > t_box[2]
+                        or top < t_box[1] or bott > t_box[3]):
+                    continue
+                # Preliminary 2: pol's bbox vs widget's points to filter out.
+                ks = np.flatnonzero((t_xs >= left) & (t_xs <= rght)
+                                    & (t_ys >= bott) & (t_ys <= top))
+                if not len(ks):
+                    continue
+                hits = np.flatnonzero(inside(bounds, p, t_xs[ks], t_ys[ks]))
+                if len(hits):
+                    return [p, int(tbounds['pol_ids'][ks[hits[0]] * 2])]
+            return False
+
+        def contact_np(this, that):
+            '''[contact], for all the pairs of sides at once.'''
+            ids, x1, y1, x2, y2 = this
+            t_ids, v30, v31, v40, v41 = that
+            if not len(ids) or not len(t_ids):
+                return [], [], [], [], None
+            v10 = x1[:, None]
+            v11 = y1[:, None]
+            v20 = x2[:, None]
+            v21 = y2[:, None]
+            d1 = (v40 - v30) * (v11 - v31) - (v10 - v30) * (v41 - v31)
+            d2 = (v40 - v30) * (v21 - v31) - (v20 - v30) * (v41 - v31)
+            hits = (d1 > 0) != (d2 > 0)
+            hits &= ((((v20 - v10) * (v31 - v11)
+                       - (v30 - v10) * (v21 - v11)) > 0)
+                     != (((v20 - v10) * (v41 - v11)
+                          - (v40 - v10) * (v21 - v11)) > 0))
+            i, j = np.nonzero(hits)
+            if not len(i):
+                return [], [], [], [], None
+            d1 = d1[i, j]
+            t = d1 / (d1 - d2[i, j])
+            xs = x1[i] + (x2[i] - x1[i]) * t
+            ys = y1[i] + (y2[i] - y1[i]) * t
+            ends = np.column_stack((x1[i], y1[i], x2[i], y2[i]))
+            t_ends = np.column_stack((v30[j], v31[j], v40[j], v41[j]))
+            axis = (float(v40[j[0]] - v30[j[0]]), float(v41[j[0]] - v31[j[0]]))
+            return (xs.tolist(), ys.tolist(), ends.ravel().tolist(),
+                    t_ends.ravel().tolist(), axis)
+
+        def contact_bounds(rid, wid, frame='bounds', tframe='bounds'):
+            try:
+                this = peers[rid]
+                box = this['bbox']
+            except KeyError:
+                return False
+            try:
+                that = peers[wid]
+                t_box = that['bbox']
+            except TypeError:
+                that = None
+                t_box = wid
+            if (len(box) < 4 or len(t_box) < 4
+                    or box[2] < t_box[0] or box[0] > t_box[2]
+                    or box[3] < t_box[1] or box[1] > t_box[3]):
+                return False
+            bounds = this[frame]
+            if that is None:
+                if 'tiers' in bounds and apart_box(bounds, t_box):
+                    return False
+                t_sides = box_sides(t_box)
+            else:
+                tbounds = that[tframe]
+                if ('tiers' in bounds and 'tiers' in tbounds
+                        and apart(bounds, tbounds)):
+                    return False
+                t_sides = sides(tbounds, box)
+            xs, ys, ends, t_ends, axis = contact_np(sides(bounds, t_box),
+                                                    t_sides)
+            if xs:
+                return manifold(xs, ys, ends, t_ends, axis, box, t_box)
+            return contained(this, that, box, t_box, rid, wid, frame, tframe)
+
+        def pieces_np(bounds):
+            '''The x, y arrays of each convex piece of a frame.'''
+            pts = bounds['points']
+            ids = np.split(np.asarray(bounds['piece_pts']),
+                           np.cumsum(bounds['piece_lens'])[:-1])
+            return [(pts[i], pts[i + 1]) for i in ids]
+
+        def axes_np(bounds, m):
+            '''The pieces' axes at the frame's pose (see [separated]), as an
+            (nx, ny, low, high) array for each piece.'''
+            a, b, c, d, e, f = m
+            axes = np.asarray(bounds['piece_axes']).reshape(-1, 4)
+            waxes = np.empty_like(axes)
+            waxes[:, 0] = a * axes[:, 0] + c * axes[:, 1]
+            waxes[:, 1] = b * axes[:, 0] + d * axes[:, 1]
+            off = axes[:, 0] * e + axes[:, 1] * f
+            waxes[:, 2] = axes[:, 2] - off
+            waxes[:, 3] = axes[:, 3] - off
+            return np.split(waxes, np.cumsum(bounds['axis_lens'])[:-1])
+
+        def separated_np(axes, t_piece):
+            '''[separated], on all the axes of a piece at once.'''
+            t_xs, t_ys = t_piece
+            ds = axes[:, 0, None] * t_xs + axes[:, 1, None] * t_ys
+            return bool(((axes[:, 3] < ds.min(axis=1))
+                         | (ds.max(axis=1) < axes[:, 2])).any())
+
+        scan_local = local_crossing
+
+        def local_crossing(pts, ptids, plens, opens, *index):
+            '''[local_crossing] over plain lists of the (few) sides mapped,
+            which are faster to read one at a time than arrays.'''
+            return scan_local(np.asarray(pts).tolist(),
+                              np.asarray(ptids).tolist(),
+                              np.asarray(plens).tolist(), list(opens), *index)
+
+        def separates(bounds, tbounds, nx, ny):
+            '''[separates], projecting all the points at once.'''
+            le = bounds['length']
+            t_le = tbounds['length']
+            pts = bounds['points']
+            t_pts = tbounds['points']
+            ds = nx * pts[0:le:2] + ny * pts[1:le:2]
+            t_ds = nx * t_pts[0:t_le:2] + ny * t_pts[1:t_le:2]
+            return bool(ds.max() < t_ds.min() or t_ds.max() < ds.min())
+
+        def sat_bounds(rid, wid, frame='bounds', tframe='bounds'):
+            try:
+                this = peers[rid]
+                that = peers[wid]
+                bounds = this[frame]
+                tbounds = that[tframe]
+            except (KeyError, TypeError):
+                return collide_bounds(rid, wid, frame, tframe)
+            if (bounds.get('piece_lens') is None
+                    or tbounds.get('piece_lens') is None):
+                return collide_bounds(rid, wid, frame, tframe)
+            box = this['bbox']
+            t_box = that['bbox']
+            if (len(box) < 4 or len(t_box) < 4
+                    or box[2] < t_box[0] or box[0] > t_box[2]
+                    or box[3] < t_box[1] or box[1] > t_box[3]):
+                return False
+            m = local_map(rid, frame)
+            t_m = local_map(wid, tframe)
+            if m is None or t_m is None:
+                return collide_bounds(rid, wid, frame, tframe)
+            pieces = pieces_np(bounds)
+            t_pieces = pieces_np(tbounds)
+            axes = axes_np(bounds, m)
+            t_axes = axes_np(tbounds, t_m)
+            boxes = [(xs.min(), ys.min(), xs.max(), ys.max())
+                     for xs, ys in pieces]
+            t_boxes = [(xs.min(), ys.min(), xs.max(), ys.max())
+                       for xs, ys in t_pieces]
+            for p, piece in enumerate(pieces):
+                box = boxes[p]
+                for t_p, t_piece in enumerate(t_pieces):
+                    t_box = t_boxes[t_p]
+                    if not (box[2] < t_box[0] or box[0] > t_box[2]
+                            or box[3] < t_box[1] or box[1] > t_box[3]
+                            or separated_np(axes[p], t_piece)
+                            or separated_np(t_axes[t_p], piece)):
+                        return [int(bounds['piece_pols'][p]),
+                                int(tbounds['piece_pols'][t_p])]
+            return False
+
+        def collide_bounds(rid, wid, frame='bounds', tframe='bounds'):
+            try:
+                this_box = peers[rid]['bbox']
+            except KeyError:
+                return False
+
+            try:
+                that_box = peers[wid]['bbox']
+            except TypeError:
+                that_box = wid
+
+            try:
+                if this_box[2] < that_box[0]:
+                    return False
+            except IndexError:
+                return False
+            if this_box[0] > that_box[2]:
+                return False
+            if this_box[3] < that_box[1]:
+                return False
+            if this_box[1] > that_box[3]:
+                return False
+
+            bounds = peers[rid][frame]
+            try:
+                tbounds = peers[wid][tframe]
+            except TypeError:
+                if 'tiers' in bounds and apart_box(bounds, that_box):
+                    return False
+                hit = intersection_np(sides(bounds, that_box),
+                                      box_sides(that_box))
+                if hit is None:
+                    return False
+                return [int(bounds['pol_ids'][hit[0] * 2]),
+                        int(bounds['pt_ids'][hit[0] * 2]), 0, int(hit[1])]
+
+            if ('tiers' in bounds and 'tiers' in tbounds
+                    and apart(bounds, tbounds)):
+                return False
+
+            if peers[rid]['seg']:
+                hit = intersection_np(sides(bounds, that_box),
+                                      sides(tbounds, this_box,
+                                            closed=not peers[wid]['seg']))
+                if hit is None:
+                    return False
+                i, j = hit
+                return [int(bounds['pol_ids'][i * 2]),
+                        int(bounds['pt_ids'][i * 2]),
+                        int(tbounds['pol_ids'][j * 2]),
+                        int(tbounds['pt_ids'][j * 2])]
+            else:
+                return membership_np(bounds, that_box, tbounds)
+
+        def point_in_bounds(x, y, rid, frame='bounds'):
+            '''"Oddeven" point-in-polygon method, for all polygons at once.
+            A point outside the bounds' bbox (or, in membership mode, outside
+            all the polygons' boxes) is rejected without any array operations.
+            '''
+            body = peers[rid]
+            bbox = body['bbox']
+            if len(bbox) == 4 and (x < bbox[0] or x > bbox[2]
+                                   or y < bbox[1] or y > bbox[3]):
+                return False
+            bounds = body[frame]
+            if not body['seg'] and not ((bounds['lefts'] <= x)
+                                        & (bounds['rights'] >= x)
+                                        & (bounds['botts'] <= y)
+                                        & (bounds['tops'] >= y)).any():
+                return False
+            pts = bounds['points']
+            prevs = bounds['prevs']
+            x1 = pts[prevs * 2]
+            y1 = pts[prevs * 2 + 1]
+            x2 = pts[0::2]
+            y2 = pts[1::2]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cross = (((y2 > y) != (y1 > y))
+                         & (x < (x1 - x2) * (y - y2) / (y1 - y2) + x2))
+            counts = np.add.reduceat(cross, bounds['starts'], dtype=np.intp)
+            return bool((counts % 2).any())
+
+        def define_frame(frame, opens, seg_mode, bounds):
+            if isinstance(frame, CompiledFrame):
+                plens = np.frombuffer(frame.lens, np.intc).astype(np.intp)
+                hints = np.frombuffer(frame.hints, np.float64).copy()
+            else:
+                plens = np.array([len(pol) for pol in frame], dtype=np.intp)
+                hints = np.array([coord for pol in frame for point in pol
+                                  for coord in point[:2]], dtype=np.float64)
+            count = int(plens.sum())
+            starts = np.zeros(len(plens), dtype=np.intp)
+            np.cumsum(plens[:-1], out=starts[1:])
+            ends = starts + plens - 1
+            polids = np.repeat(np.arange(len(plens)), plens)
+            ptids = np.arange(count) - np.repeat(starts, plens)
+
+            nexts = np.arange(1, count + 1)
+            nexts[ends] = starts
+            prevs = np.arange(-1, count - 1)
+            prevs[starts] = ends
+            bounds['nexts'] = nexts
+            bounds['prevs'] = prevs
+            bounds['starts'] = starts
+            bounds['all_sides'] = np.arange(count)
+            if seg_mode and len(opens):
+                bounds['sides'] = np.delete(bounds['all_sides'],
+                                            ends[np.array(opens, np.intp)])
+            else:
+                bounds['sides'] = bounds['all_sides']
+
+            bounds['hints'] = hints
+            bounds['pol_lens'] = plens
+            bounds['pol_ids'] = np.repeat(polids, 2)
+            bounds['pt_ids'] = np.repeat(ptids, 2)
+            bounds['length'] = count * 2
+
+            if seg_mode:
+                length = bounds['length']
+            else:
+                length = len(plens)
+            bounds['lefts'] = np.full(length, np.inf)
+            bounds['botts'] = np.full(length, np.inf)
+            bounds['rights'] = np.zeros(length)
+            bounds['tops'] = np.zeros(length)
+
+            if seg_mode:
+                bounds['opens'] = array('i', opens)
+
+            bounds['points'] = hints.copy()
+
+
+def cross(pol, a, b, c):
+    '''The cross product of the vectors ab and bc (positive if the turn at
+    [b] is counterclockwise).'''
+    return ((pol[b][0] - pol[a][0]) * (pol[c][1] - pol[b][1])
+            - (pol[b][1] - pol[a][1]) * (pol[c][0] - pol[b][0]))
+
+
+def triangulate(pol, ids):
+    '''Ear clipping: cutting off, one after the other, the convex vertices
+    whose triangle contains no other vertex, until only one triangle is left.
+    Collinear vertices are dropped. None if no ear is found (e.g. a
+    self-intersecting polygon).
+    '''
+    ids = ids[:]
+    tris = []
+    i = 0
+    while len(ids) > 3:
+        n = len(ids)
+        for step in range(n):
+            k = (i + step) % n
+            a, b, c = ids[k - 1], ids[k], ids[(k + 1) % n]
+            turn = cross(pol, a, b, c)
+            if not turn:
+                break
+            if turn < 0:
+                continue
+            for m in ids:
+                if m in (a, b, c) or pol[m] in (pol[a], pol[b], pol[c]):
+                    continue
+                if (cross(pol, a, b, m) >= 0 and cross(pol, b, c, m) >= 0
+                        and cross(pol, c, a, m) >= 0):
+                    break
+            else:
+                tris.append([a, b, c])
+                break
+        else:
+            return None
+        del ids[k]
+        i = k - 1 if k else 0
+    if len(ids) == 3:
+        tris.append(ids)
+    return tris
+
+
+def self_crossing(pol):
+    '''Whether any two sides of a polygon (not next to each other) cross.'''
+    n = len(pol)
+    for i in range(n):
+        (x1, y1), (x2, y2) = pol[i - 1], pol[i]
+        for j in range(i + 1, n):
+            if j - i == n - 1 or j == i + 1:
+                continue
+            (x3, y3), (x4, y4) = pol[j - 1], pol[j]
+            if crossing(x1, y1, x2, y2, x3, y3, x4, y4):
+                return True
+    return False
+
+
+def piece_axes(pol, piece):
+    '''A convex piece's axes: the normals of its sides (one for each
+    direction) and the piece's own projection on each, as (nx, ny, low,
+    high), in hint space.
+    '''
+    axes = []
+    j = piece[-1]
+    for i in piece:
+        nx = pol[j][1] - pol[i][1]
+        ny = pol[i][0] - pol[j][0]
+        j = i
+        if (not nx and not ny) or any(abs(nx * ay - ny * ax)
+                                      <= 1e-12 * (abs(nx) + abs(ny))
+                                      * (abs(ax) + abs(ay))
+                                      for ax, ay, low, high in axes):
+            continue
+        ds = [nx * pol[k][0] + ny * pol[k][1] for k in piece]
+        axes.append((nx, ny, min(ds), max(ds)))
+    return axes
+
+
+def decompose(pol):
+    '''Hertel-Mehlhorn convex decomposition of a polygon (a list of points):
+    Triangulating it and then removing every diagonal whose two pieces make a
+    convex one when merged. Returns the pieces as lists of point indices, in
+    counterclockwise order. At most four times the minimum number of pieces.
+    None if the polygon doesn't decompose (degenerate or self-intersecting).
+    '''
+    ids = list(range(len(pol)))
+    area = sum(pol[i - 1][0] * pol[i][1] - pol[i][0] * pol[i - 1][1]
+               for i in ids)
+    if not area or self_crossing(pol):
+        return None
+    if area < 0:
+        ids.reverse()
+    n = len(ids)
+    if all(cross(pol, ids[k - 2], ids[k - 1], ids[k]) >= 0 for k in range(n)):
+        return [ids]
+
+    tris = triangulate(pol, ids)
+    if tris is None:
+        return None
+    pieces = dict(enumerate(tris))
+    # Each (directed) side to the piece that has it.
+    owners = {}
+    for key, piece in iteritems(pieces):
+        for k in range(len(piece)):
+            owners[(piece[k - 1], piece[k])] = key
+    for a, b in list(owners.keys()):
+        key = owners.get((a, b))
+        t_key = owners.get((b, a))
+        if key is None or t_key is None or t_key == key:
+            continue
+        # Both pieces, each starting at its own end of the diagonal.
+        piece = pieces[key]
+        k = piece.index(b)
+        piece = piece[k:] + piece[:k]
+        t_piece = pieces[t_key]
+        k = t_piece.index(a)
+        t_piece = t_piece[k:] + t_piece[:k]
+        if (cross(pol, piece[-2], a, t_piece[1]) < 0
+                or cross(pol, t_piece[-2], b, piece[1]) < 0):
+            continue
+        merged = piece + t_piece[1:-1]
+        del pieces[t_key]
+        pieces[key] = merged
+        del owners[(a, b)]
+        del owners[(b, a)]
+        for k in range(len(merged)):
+            owners[(merged[k - 1], merged[k])] = key
+    return list(pieces.values())
+
+
+def define_pieces(rid, custom_bounds):
+    '''Decomposing each polygon of [custom_bounds] into convex pieces (in
+    hint space, so once for all sizes and poses) and adding them to [rid]'s
+    frames, for the separating axis test (see [sat_bounds]).
+    The pieces are indices to the frame's points, so they follow the bounds'
+    updates with no extra work. Each piece's axes (see [piece_axes]) are in
+    'piece_axes', as many for each piece as in 'axis_lens', mapped to the
+    frame's pose at check time through its anchors (see [anchor_points]).
+    They're kept in the frame's template too, for the bounds defined
+    identically.
+    A frame with any polygon that doesn't decompose gets None 'piece_lens'
+    and its checks go through [collide_bounds].
+    '''
+    if isinstance(custom_bounds, dict):
+        frames = iteritems(custom_bounds)
+    else:
+        frames = [('bounds', custom_bounds)]
+    for key, frame in frames:
+        bounds = peers[rid][key]
+        if 'piece_lens' in bounds:  # From the template
+            continue
+        plens = array('i')
+        ppts = array('i')
+        ppols = array('i')
+        axes = array('d')
+        alens = array('i')
+        strt = 0
+        for p, pol in enumerate(frame):
+            pol = [tuple(point[:2]) for point in pol]
+            pieces = decompose(pol)
+            if pieces is None:
+                plens = None
+                break
+            for piece in pieces:
+                plens.append(len(piece))
+                ppts.extend([(strt + i) * 2 for i in piece])
+                ppols.append(p)
+                paxes = piece_axes(pol, piece)
+                alens.append(len(paxes))
+                for axis in paxes:
+                    axes.extend(axis)
+            strt += len(pol)
+        anchors = anchor_points(bounds['hints'], bounds['length'])
+        for frame in (bounds, bounds.get('shared', bounds)):
+            frame['piece_lens'] = plens
+            frame['piece_pts'] = ppts
+            frame['piece_pols'] = ppols
+            frame['piece_axes'] = axes
+            frame['axis_lens'] = alens
+            if anchors is not None:
+                frame['anchors'] = anchors
+
+
+def decomposed(rid, frame='bounds'):
+    '''Whether [rid]'s [frame] has convex pieces, i.e. [sat_bounds] runs the
+    separating axis test for it (which checks both ways at once) instead of
+    falling back to [collide_bounds].
+    '''
+    return peers[rid][frame].get('piece_lens') is not None
+
+
+def define_tiers(rid, obb=False):
+    '''Adding early-out tiers to each of [rid]'s frames, checked by
+    [collide_bounds] before the narrow phase: a bounding circle and an oriented
+    bounding box (only checked if [obb] is True, or the other party's is).
+    Both are defined in hint space, relatively to three anchor points of the
+    frame, so they follow the bounds through any update or animation with no
+    extra work. The circle's radius is recalculated when the scale changes.
+    A frame's 'tiers' array holds:
+        0-1: the circle's center, 2: its radius, 3-4: the radius' scale,
+        5-12: the box's corners, 13: the obb switch,
+        14-17: the inverse of the anchors' basis, 18-19: the center in hints.
+    Points are kept as (s, t), i.e. p0 + s * (p1 - p0) + t * (p2 - p0).
+    A copy is kept in the frame's template, for the bounds defined identically.
+    '''
+    for key, bounds in iteritems(peers[rid]):
+        if not isinstance(bounds, dict):
+            continue
+        shared = bounds.get('shared', {})
+        if 'tier_base' in shared:
+            bounds['tiers'] = tiers = array('d', shared['tier_base'])
+            tiers[13] = 1. if obb else 0.
+            bounds['anchors'] = shared['anchors']
+            continue
+        hints = bounds['hints']
+        anchors = anchor_points(hints, bounds['length'])
+        if anchors is None:  # Flat frame
+            continue
+        xs = [hints[i] for i in range(0, bounds['length'], 2)]
+        ys = [hints[i] for i in range(1, bounds['length'], 2)]
+        x0 = xs[0]
+        y0 = ys[0]
+        ux = hints[anchors[1]] - x0
+        uy = hints[anchors[1] + 1] - y0
+        vx = hints[anchors[2]] - x0
+        vy = hints[anchors[2] + 1] - y0
+        det = ux * vy - uy * vx
+        basis = (vy / det, -vx / det, -uy / det, ux / det)
+
+        def anchored(x, y):
+            return (basis[0] * (x - x0) + basis[1] * (y - y0),
+                    basis[2] * (x - x0) + basis[3] * (y - y0))
+
+        left = min(xs)
+        right = max(xs)
+        bott = min(ys)
+        top = max(ys)
+        cx = (left + right) * .5
+        cy = (bott + top) * .5
+        tiers = array('d', anchored(cx, cy))
+        tiers.extend((0., -1., -1.))
+        for x, y in ((left, bott), (right, bott), (right, top), (left, top)):
+            tiers.extend(anchored(x, y))
+        tiers.append(1. if obb else 0.)
+        tiers.extend(basis)
+        tiers.extend((cx, cy))
+        bounds['tiers'] = tiers
+        shared['tier_base'] = array('d', tiers)
+        bounds['anchors'] = shared['anchors'] = anchors
+
+
+def anchor_points(hints, length):
+    '''Three anchor points of a frame, as indices to its [hints]: the first
+    point, the farthest one from it and the farthest one from their line.
+    None for a flat frame.
+    '''
+    xs = [hints[i] for i in range(0, length, 2)]
+    ys = [hints[i] for i in range(1, length, 2)]
+    if len(xs) < 3:
+        return None
+    x0 = xs[0]
+    y0 = ys[0]
+    ids = range(len(xs))
+    a1 = max(ids, key=lambda k: (xs[k] - x0) ** 2 + (ys[k] - y0) ** 2)
+    ux = xs[a1] - x0
+    uy = ys[a1] - y0
+    a2 = max(ids, key=lambda k: abs(ux * (ys[k] - y0) - uy * (xs[k] - x0)))
+    if not ux * (ys[a2] - y0) - uy * (xs[a2] - x0):
+        return None
+    return array('i', [0, a1 * 2, a2 * 2])
+
+
+def side_coords(coords, plens, opens):
+    '''The sides of a frame's polygons, from its hints or points ([coords]),
+    as their ends (x1, y1, x2, y2) and their polygon and point indices. The
+    closing sides of open polygons are left out.
+    '''
+    segs = array('d')
+    ids = array('i')
+    strt = 0
+    for p in range(len(plens)):
+        pl = plens[p]
+        for k in range(pl - 1 if p in opens else pl):
+            i = strt + k * 2
+            i2 = i + 2 if k < pl - 1 else strt
+            segs.extend((coords[i], coords[i + 1], coords[i2], coords[i2 + 1]))
+            ids.extend((p, k))
+        strt += pl * 2
+    return segs, ids
+
+
+def define_index(rid):
+    '''Indexing the sides of each of [rid]'s frames in a uniform grid over
+    their hints, for [local_bounds] to check another frame's sides against
+    those in the cells they cross, in this frame's local (hint) space.
+    The index is built once for all sizes and poses, and kept in the frame's
+    template too, for the bounds defined identically.
+    A frame's 'local_grid' holds the grid's left and bottom, the inverse of its
+    cells' width and height, and its columns and rows. 'local_cells' holds
+    where each cell's entries start in 'local_sides' (and where the last one
+    ends). These are numbers of sides (see [side_coords]), whose ends are in
+    'local_segs' and whose polygon and point indices are in 'local_ids'.
+    Only segment mode bounds are indexed, since [local_bounds] only checks
+    sides; membership mode bounds go through [collide_bounds] as usual.
+    '''
+    if not peers[rid]['seg']:
+        return
+    for key, bounds in iteritems(peers[rid]):
+        if not isinstance(bounds, dict) or 'local_grid' in bounds:
+            continue
+        segs, ids = side_coords(bounds['hints'], bounds['pol_lens'],
+                                bounds['opens'])
+        n = len(ids) // 2
+        if not n:
+            continue
+        xs = list(segs[0::4]) + list(segs[2::4])
+        ys = list(segs[1::4]) + list(segs[3::4])
+        left = min(xs)
+        bott = min(ys)
+        right = max(xs)
+        top = max(ys)
+        cols = rows = max(int((n * .5) ** .5), 1)  # About 2 sides per cell
+        sx = cols / (right - left) if right > left else 0.
+        sy = rows / (top - bott) if top > bott else 0.
+        grid = [[] for _ in range(cols * rows)]
+        for s in range(n):
+            x1, y1, x2, y2 = segs[s * 4:s * 4 + 4]
+            c0 = min(int((min(x1, x2) - left) * sx), cols - 1)
+            c1 = min(int((max(x1, x2) - left) * sx), cols - 1)
+            r0 = min(int((min(y1, y2) - bott) * sy), rows - 1)
+            r1 = min(int((max(y1, y2) - bott) * sy), rows - 1)
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    grid[row * cols + col].append(s)
+        cells = array('i', [0])
+        sides = array('i')
+        for cell in grid:
+            sides.extend(cell)
+            cells.append(len(sides))
+        for frame in (bounds, bounds.get('shared', bounds)):
+            frame['local_grid'] = array('d', [left, bott, sx, sy, cols, rows])
+            frame['local_cells'] = cells
+            frame['local_sides'] = sides
+            frame['local_segs'] = segs
+            frame['local_ids'] = ids
+
+
+# Living owners of bounds (Rotaboxes and Bodies) by [rid], to resolve their
+# current frame and checks in the broad phase.
+owners = WeakValueDictionary()
+
+# Released rids, issued again before any new ones.
+free_rids = []
+rid_counter = count()
+# Weak references to the owners, releasing their rids when collected.
+finalizers = {}
+# The rids of collected owners, as (rid, owner_ref), waiting for [reap_rids].
+dead_rids = deque()
+
+
+def new_rid(owner):
+    '''A unique key for [owner]'s bounds, released when it's collected.'''
+    reap_rids()
+    if free_rids:
+        rid = free_rids.pop()
+    else:
+        rid = next(rid_counter)
+        while rid in peers:  # Taken outside of Rotabox.
+            rid = next(rid_counter)
+    finalizers[rid] = ref(owner, partial(bury, rid))
+    return rid
+
+
+def bury(rid, owner_ref):
+    '''The finalizers' callback. It runs wherever the collection happens (on
+    any thread, in the middle of any loop over the registry), so the rid is
+    only queued, to be retired by [reap_rids].
+    '''
+    dead_rids.append((rid, owner_ref))
+
+
+def reap_rids():
+    '''Retiring the rids of the collected owners. Called on the main thread,
+    before the registry is read (see [bury]).
+    '''
+    while dead_rids:
+        retire(*dead_rids.popleft())
+
+
+def retire(rid, owner_ref=None):
+    '''Releasing [rid]'s bounds and recycling it.'''
+    if owner_ref is not None and finalizers.get(rid) is not owner_ref:
+        return  # A late callback for a rid already retired.
+    finalizers.pop(rid, None)
+    owners.pop(rid, None)
+    moved_rids.discard(rid)
+    pending.pop(rid, None)
+    unindex_box(rid)
+    unbake_bounds(rid)
+    forget_witnesses(rid)
+    release_bounds(rid)
+    free_rids.append(rid)
+
+
+def count_bounds():
+    '''The number of live entries in the bounds' registry.'''
+    return len(peers)
+
+
+def frame_key(rid):
+    '''The frame of [rid]'s bounds currently in use.'''
+    try:
+        return owners[rid].curr_key
+    except KeyError:
+        return 'bounds'
+
+
+def narrow_phase(rid, wid):
+    '''The collision check for a pair of bounds, according to their owners'
+    [convex_pieces] and [local_index] options.'''
+    this = owners.get(rid)
+    that = owners.get(wid)
+    if this is None or that is None:
+        return collide_bounds
+    if this.convex_pieces and that.convex_pieces:
+        return sat_bounds
+    if this.local_index or that.local_index:
+        return local_bounds
+    return collide_bounds
+
+
+def broad_phase(rids=None):
+    '''Sort and sweep broad phase:
+    Sorting the bounding boxes of the registered bounds by their left side and
+    sweeping through them from left to right, keeping a list of the boxes
+    still open at each step. Only the boxes in that list can overlap the
+    current one on the x axis, so only those pairs are checked on the y axis.
+    Returns a list of (rid, wid) pairs with overlapping bounding boxes.
+    '''
+    if rids is None:
+        rids = list(peers.keys())
+    boxes = []
+    for rid in rids:
+        if rid in static_segs:  # See [collide_static].
+            continue
+        try:
+            box = peers[rid]['bbox']
+        except KeyError:
+            continue
+        if len(box) == 4:  # Not updated yet if empty.
+            boxes.append((box[0], rid, box))
+    boxes.sort(key=itemgetter(0))
+
+    pairs = []
+    active = []
+    for left, rid, box in boxes:
+        active = [entry for entry in active if entry[2][2] >= left]
+        for entry in active:
+            t_box = entry[2]
+            if box[3] < t_box[1] or box[1] > t_box[3]:
+                continue
+            pairs.append((entry[1], rid))
+        active.append((left, rid, box))
+    return pairs
+
+
+# Deferred transformations of the bounds ([lazy_update]), by rid.
+pending = {}
+
+
+def defer_bounds(width, height, pos, angle, origin, rid, frame='bounds'):
+    '''[transform_bounds], postponed until [flush_bounds] (i.e. until a query
+    needs the points). Meanwhile, the bbox is that of the frame's bounding
+    circle (see [define_tiers]), placed by the transformation alone.
+    '''
+    body = peers[rid]
+    bounds = body[frame]
+    state = (width, height, pos[0], pos[1], angle, origin[0], origin[1])
+    if bounds.get('state') == state and 'bbox' in bounds:  # Already in place
+        if pending.pop(rid, None) is not None:
+            bump_version(rid)  # Results found at the cancelled pose are stale.
+        body['bbox'] = bounds['bbox']
+        return
+    tiers = bounds.get('tiers')
+    if tiers is None:
+        pending.pop(rid, None)
+        transform_bounds(width, height, pos, angle, origin, rid, frame)
+        return
+
+    fit_radius(bounds, width, height)
+    # The circle's center, scaled, moved and rotated around [origin].
+    x = tiers[18] * width + pos[0] - origin[0]
+    y = tiers[19] * height + pos[1] - origin[1]
+    c = cos(angle)
+    s = sin(angle)
+    x, y = x * c - y * s + origin[0], x * s + y * c + origin[1]
+    r = tiers[2]
+    body['bbox'] = array('d', [x - r, y - r, x + r, y + r])
+    pending[rid] = (width, height, (pos[0], pos[1]), angle,
+                    (origin[0], origin[1]), rid, frame)
+    bump_version(rid)
+
+
+def flush_bounds(rid):
+    '''Running [rid]'s deferred transformation, if any. The bounds keep their
+    version: it changed when the transformation was deferred (see
+    [cached_check]).
+    '''
+    args = pending.pop(rid, None)
+    if args is not None:
+        version = versions.get(rid)
+        transform_bounds(*args)
+        versions[rid] = version
+
+
+def flush_pair(rid, wid, local=False):
+    '''Running the deferred transformations of [rid] and [wid] before a
+    collision check, unless their bboxes don't overlap (returns False then).
+    If [local] (a [local_bounds] check), the check itself runs only those it
+    needs.
+    '''
+    try:
+        box = peers[rid]['bbox']
+        t_box = peers[wid]['bbox']
+    except KeyError:
+        return True
+    if (len(box) == 4 and len(t_box) == 4
+            and (box[2] < t_box[0] or box[0] > t_box[2]
+                 or box[3] < t_box[1] or box[1] > t_box[3])):
+        return False
+    if not local:
+        flush_bounds(rid)
+        flush_bounds(wid)
+    return True
+
+
+def local_map(rid, frame='bounds'):
+    '''The affine map from world space to the hint space of [rid]'s [frame],
+    as array('d', [a, b, c, d, e, f]), i.e. (a * x + b * y + e, c * x + d * y
+    + f). Taken from the deferred transformation, if any (so that the points
+    aren't needed), or else from the frame's anchor points (see
+    [define_tiers]). None for a flat or unanchored frame.
+    '''
+    args = pending.get(rid)
+    if args is not None and args[6] == frame:
+        width, height, pos, angle, origin = args[:5]
+        if not width or not height:
+            return None
+        # The points are R(S * hints + pos - origin) + origin.
+        co = cos(angle)
+        si = sin(angle)
+        return array('d', [co / width, si / width, -si / height,
+                           co / height,
+                           (origin[0] - pos[0] - co * origin[0]
+                            - si * origin[1]) / width,
+                           (origin[1] - pos[1] + si * origin[0]
+                            - co * origin[1]) / height])
+    flush_bounds(rid)
+    bounds = peers[rid][frame]
+    anchors = bounds.get('anchors')
+    if anchors is None:
+        return None
+    pts = bounds['points']
+    hints = bounds['hints']
+    i0, i1, i2 = anchors
+    wx1 = pts[i1] - pts[i0]
+    wy1 = pts[i1 + 1] - pts[i0 + 1]
+    wx2 = pts[i2] - pts[i0]
+    wy2 = pts[i2 + 1] - pts[i0 + 1]
+    det = wx1 * wy2 - wx2 * wy1
+    if not det:
+        return None
+    hx1 = hints[i1] - hints[i0]
+    hy1 = hints[i1 + 1] - hints[i0 + 1]
+    hx2 = hints[i2] - hints[i0]
+    hy2 = hints[i2 + 1] - hints[i0 + 1]
+    # The hints' basis times the inverse of the points' basis
+    a = (hx1 * wy2 - hx2 * wy1) / det
+    b = (hx2 * wx1 - hx1 * wx2) / det
+    c = (hy1 * wy2 - hy2 * wy1) / det
+    d = (hy2 * wx1 - hy1 * wx2) / det
+    return array('d', [a, b, c, d, hints[i0] - a * pts[i0] - b * pts[i0 + 1],
+                       hints[i0 + 1] - c * pts[i0] - d * pts[i0 + 1]])
+
+
+def local_bounds(rid, wid, frame='bounds', tframe='bounds'):
+    '''[collide_bounds] between segment mode bounds, in the local (hint) space
+    of the party with a local index (see [define_index]) and at least as many
+    points as the other: the other's sides are mapped there and checked
+    against the indexed sides in the cells they cross. The indexed party's
+    points aren't needed, so its deferred transformation (see [lazy_update])
+    stays deferred. Other pairs go through [collide_bounds].
+    '''
+    this = peers[rid]
+    try:
+        that = peers[wid]
+    except TypeError:
+        that = None
+    if that is not None and this['seg'] and that['seg']:
+        bounds = this[frame]
+        tbounds = that[tframe]
+        box = this['bbox']
+        t_box = that['bbox']
+        if (len(box) < 4 or len(t_box) < 4
+                or box[2] < t_box[0] or box[0] > t_box[2]
+                or box[3] < t_box[1] or box[1] > t_box[3]):
+            return False
+        if ('local_grid' in bounds
+                and bounds['length'] >= tbounds['length']):
+            m = local_map(rid, frame)
+            if m is not None:
+                flush_bounds(wid)
+                hit = local_crossing(
+                    tbounds['points'], tbounds['pt_ids'], tbounds['pol_lens'],
+                    tbounds['opens'], box, m, bounds['local_grid'],
+                    bounds['local_cells'], bounds['local_sides'],
+                    bounds['local_segs'], bounds['local_ids'])
+                return hit and [hit[2], hit[3], hit[0], hit[1]]
+        elif ('local_grid' in tbounds
+                and tbounds['length'] >= bounds['length']):
+            m = local_map(wid, tframe)
+            if m is not None:
+                flush_bounds(rid)
+                return local_crossing(
+                    bounds['points'], bounds['pt_ids'], bounds['pol_lens'],
+                    bounds['opens'], t_box, m, tbounds['local_grid'],
+                    tbounds['local_cells'], tbounds['local_sides'],
+                    tbounds['local_segs'], tbounds['local_ids'])
+        flush_bounds(wid)
+    flush_bounds(rid)
+    return collide_bounds(rid, wid, frame, tframe)
+
+
+# The last result of each pair check, with the versions of the two bounds it
+# was found at: {(check, rid, frame, wid, tframe): (version, tversion, result)}
+pair_cache = {}
+MAX_PAIRS = 1 << 14
+
+
+def cached_check(check, rid, wid, frame='bounds', tframe='bounds'):
+    '''[check](rid, wid, frame, tframe) (e.g. [collide_bounds]), or its last
+    result for the same pair and frames, if neither bounds have changed since
+    (see [bump_version]). When full, the cache starts over.
+    '''
+    key = (check, rid, frame, wid, tframe)
+    version = versions.get(rid)
+    tversion = versions.get(wid)
+    entry = pair_cache.get(key)
+    if entry is not None and entry[0] == version and entry[1] == tversion:
+        return entry[2]
+    result = coherent_check(check, rid, wid, frame, tframe)
+    if len(pair_cache) >= MAX_PAIRS:
+        pair_cache.clear()
+    pair_cache[key] = (version, tversion, result)
+    return result
+
+
+# What decided each pair's last check, tried first by the next one: the
+# crossing sides of a segment mode hit, or an axis that separated the two
+# frames' points on a miss.
+# {(rid, frame, wid, tframe): (body, t_body, witness)}, where [body] and
+# [t_body] are the two bounds' entries in [peers], so that a witness is only
+# used for the same definitions of both bounds.
+witnesses = {}
+witnessed = {}  # {rid: keys of the witnesses of its pairs}
+
+
+def coherent_check(check, rid, wid, frame='bounds', tframe='bounds'):
+    '''[check](rid, wid, frame, tframe), unless the pair's witness from the
+    last check still holds: If the two sides that crossed still cross, the
+    same hit is returned; if the axis that separated the frames still does,
+    False is returned. Otherwise, the full check runs and its result leaves
+    the next witness.
+    Only [collide_bounds] and [local_bounds] hits between
+    segment mode bounds leave crossing sides. An entry is dropped when either
+    bounds are defined again or released. Pairs with a deferred transformation
+    (see [lazy_update]) go straight to the check.
+    '''
+    try:
+        body = peers[rid]
+        t_body = peers[wid]
+        box = body['bbox']
+        t_box = t_body['bbox']
+    except (KeyError, TypeError):
+        return check(rid, wid, frame, tframe)
+    if (len(box) < 4 or len(t_box) < 4
+            or box[2] < t_box[0] or box[0] > t_box[2]
+            or box[3] < t_box[1] or box[1] > t_box[3]):
+        return check(rid, wid, frame, tframe)  # Their boxes are enough.
+    if rid in pending or wid in pending:  # Points left to the check
+        return check(rid, wid, frame, tframe)
+    bounds = body[frame]
+    tbounds = t_body[tframe]
+
+    key = (rid, frame, wid, tframe)
+    entry = witnesses.get(key)
+    if entry is not None:
+        if entry[0] is body and entry[1] is t_body:
+            witness = entry[2]
+            if len(witness) == 2:
+                if separates(bounds, tbounds, *witness):
+                    return False
+            elif check in (collide_bounds, local_bounds):
+                pts = bounds['points']
+                t_pts = tbounds['points']
+                i, i2, j, j2 = witness[1:]
+                if crossing(pts[i], pts[i + 1], pts[i2], pts[i2 + 1],
+                            t_pts[j], t_pts[j + 1], t_pts[j2], t_pts[j2 + 1]):
+                    return witness[0]
+        else:
+            del witnesses[key]
+
+    result = check(rid, wid, frame, tframe)
+    witness = None
+    if result:
+        if (body['seg'] and t_body['seg']
+                and check in (collide_bounds, local_bounds)):
+            witness = ((result,) + side_ends(bounds, result[0], result[1])
+                       + side_ends(tbounds, result[2], result[3]))
+    else:
+        # The axis through the boxes' centers
+        nx = t_box[0] + t_box[2] - box[0] - box[2]
+        ny = t_box[1] + t_box[3] - box[1] - box[3]
+        if (nx or ny) and separates(bounds, tbounds, nx, ny):
+            witness = nx, ny
+    if witness is None:
+        witnesses.pop(key, None)
+        return result
+    if len(witnesses) >= MAX_PAIRS:
+        witnesses.clear()
+        witnessed.clear()
+    witnesses[key] = body, t_body, witness
+    witnessed.setdefault(rid, set()).add(key)
+    witnessed.setdefault(wid, set()).add(key)
+    return result
+
+
+def forget_witnesses(rid):
+    '''Dropping the witnesses of [rid]'s pairs (from the other parties' keys
+    too).'''
+    for key in witnessed.pop(rid, ()):
+        witnesses.pop(key, None)
+        keys = witnessed.get(key[2] if key[0] == rid else key[0])
+        if keys is not None:
+            keys.discard(key)
+
+
+def side_ends(bounds, p, pt):
+    '''The indices of side [pt] of polygon [p]'s ends, in a frame's points.'''
+    plens = bounds['pol_lens']
+    strt = 0
+    for k in range(p):
+        strt += plens[k] * 2
+    i = strt + pt * 2
+    if pt < plens[p] - 1:
+        return int(i), int(i + 2)
+    return int(i), int(strt)
+
+
+def collide_all(rids=None):
+    '''Runs the broad phase over the registered bounds (or just [rids]) and the
+    narrow phase over its candidate pairs only.
+    Returns a list of [rid, wid, result] for every colliding pair, where
+    [result] is what [rid]'s collide_bounds against [wid] returned.
+    Membership mode pairs are checked both ways (mutual check), so [rid] is the
+    side that detected the collision, unless both frames have convex pieces
+    (see [decomposed]).
+    Static bounds (see [bake_bounds]) are left out of the broad phase and the
+    others are checked against the static index instead ([collide_static]).
+    '''
+    reap_rids()
+    hits = []
+    for rid, wid in broad_phase(rids):
+        rkey = frame_key(rid)
+        wkey = frame_key(wid)
+        check = narrow_phase(rid, wid)
+        if check is not local_bounds:
+            flush_bounds(rid)
+            flush_bounds(wid)
+        try:
+            result = cached_check(check, rid, wid, rkey, wkey)
+            if (not result and not peers[rid]['seg']
+                    and not (check is sat_bounds and decomposed(rid, rkey)
+                             and decomposed(wid, wkey))):
+                result = cached_check(collide_bounds, wid, rid, wkey, rkey)
+                if result:
+                    hits.append([wid, rid, result])
+                continue
+        except KeyError:  # Frame not defined (yet).
+            continue
+        if result:
+            hits.append([rid, wid, result])
+    if not static_grid:
+        return hits
+    members = set(peers.keys() if rids is None else rids)
+    for rid in members.difference(static_segs):
+        try:
+            statics = collide_static(rid, frame_key(rid))
+        except KeyError:  # Frame not defined (yet).
+            continue
+        for wid, result in statics:
+            if wid in members:
+                if len(result) == 2:  # A membership mode wid detected it.
+                    hits.append([wid, rid, result])
+                else:
+                    hits.append([rid, wid, result])
+    return hits
+
+
+# Poses are (width, height, pos0, pos1, angle, orig0, orig1), angle in radians.
+# Turns larger than this are swept in steps (see [time_of_impact]).
+SWEEP_TURN = radians(10)
+# A plain widget's bounds, for the swept checks.
+RECT = {'hints': array('d', [0., 0., 1., 0., 1., 1., 0., 1.]), 'length': 8,
+        'pol_lens': array('i', [4])}
+
+
+def posed(bounds, pose):
+    '''A frame's points at [pose], from its hints.'''
+    width, height, pos0, pos1, angle, orig0, orig1 = pose
+    c = cos(angle)
+    s = sin(angle)
+    hints = bounds['hints']
+    pts = []
+    for i in range(0, bounds['length'], 2):
+        x = hints[i] * width + pos0 - orig0
+        y = hints[i + 1] * height + pos1 - orig1
+        pts.append(x * c - y * s + orig0)
+        pts.append(x * s + y * c + orig1)
+    return pts
+
+
+def between(last_pose, pose, t):
+    '''The pose at [t] (0 to 1) of the way from [last_pose] to [pose], turning
+    the short way round.
+    '''
+    turn = (pose[4] - last_pose[4] + pi) % (2 * pi) - pi
+    mid = [a + (b - a) * t for a, b in zip(last_pose, pose)]
+    mid[4] = last_pose[4] + turn * t
+    return mid
+
+
+def frame_sides(bounds, seg):
+    '''The (first, second) point indices of each side of a frame (open
+    polygons have no closing side in segment mode).
+    '''
+    opens = bounds.get('opens', ()) if seg else ()
+    sides = []
+    strt = 0
+    for p, plen in enumerate(bounds['pol_lens']):
+        for i in range(plen - 1 if p in opens else plen):
+            sides.append((strt + i, strt + (i + 1) % plen))
+        strt += plen
+    return sides
+
+
+def pol_side(bounds, k):
+    '''[pol_index, point_index] of a frame's [k]th point ([-1, -1] if [k] is
+    -1).'''
+    if k < 0:
+        return [-1, -1]
+    for p, plen in enumerate(bounds['pol_lens']):
+        if k < plen:
+            return [p, int(k)]
+        k -= plen
+    return [-1, -1]
+
+
+def side_boxes(sides, pts0, pts1):
+    '''Each side, with the box it sweeps from [pts0] to [pts1].'''
+    boxes = []
+    for a, b in sides:
+        xs = (pts0[a * 2], pts0[b * 2], pts1[a * 2], pts1[b * 2])
+        ys = (pts0[a * 2 + 1], pts0[b * 2 + 1], pts1[a * 2 + 1],
+              pts1[b * 2 + 1])
+        boxes.append((a, b, min(xs), min(ys), max(xs), max(ys)))
+    return boxes
+
+
+def roots(a, b, c):
+    '''The roots of a * t**2 + b * t + c in [0, 1], in ascending order.'''
+    if not a:
+        if not b:
+            return ()
+        ts = (-c / b,)
+    else:
+        d = b * b - 4 * a * c
+        if d < 0:
+            return ()
+        q = -.5 * (b + copysign(sqrt(d), b))
+        ts = sorted((q / a, c / q)) if q else (0.,)
+    return [t for t in ts if 0. <= t <= 1.]
+
+
+def first_hit(pts0, pts1, tboxes, tpts0, tpts1, limit):
+    '''The first time (before [limit]) a point of a body meets a side of the
+    other, all the points moving straight from [pts0] to [pts1] (and [tpts0]
+    to [tpts1]): (t, point, side's first point, side's second point), or
+    None.
+    A point P meets a side QaQb when (Qb - Qa) x (P - Qa) = 0, a quadratic in
+    t, with P's projection on the side between its ends.
+    '''
+    hit = None
+    for k in range(0, len(pts0), 2):
+        p0x = pts0[k]
+        p0y = pts0[k + 1]
+        dpx = pts1[k] - p0x
+        dpy = pts1[k + 1] - p0y
+        left = min(p0x, p0x + dpx)
+        right = max(p0x, p0x + dpx)
+        bott = min(p0y, p0y + dpy)
+        top = max(p0y, p0y + dpy)
+        for a, b, sl, sb, sr, st in tboxes:
+            if sr < left or sl > right or st < bott or sb > top:
+                continue
+            qax = tpts0[a * 2]
+            qay = tpts0[a * 2 + 1]
+            dqax = tpts1[a * 2] - qax
+            dqay = tpts1[a * 2 + 1] - qay
+            e0x = tpts0[b * 2] - qax
+            e0y = tpts0[b * 2 + 1] - qay
+            dex = tpts1[b * 2] - tpts0[b * 2] - dqax
+            dey = tpts1[b * 2 + 1] - tpts0[b * 2 + 1] - dqay
+            r0x = p0x - qax
+            r0y = p0y - qay
+            drx = dpx - dqax
+            dry = dpy - dqay
+            for t in roots(dex * dry - dey * drx,
+                           e0x * dry - e0y * drx + dex * r0y - dey * r0x,
+                           e0x * r0y - e0y * r0x):
+                if t >= limit:
+                    break
+                ex = e0x + dex * t
+                ey = e0y + dey * t
+                dot = (r0x + drx * t) * ex + (r0y + dry * t) * ey
+                if 0. <= dot <= ex * ex + ey * ey:
+                    limit = t
+                    hit = (t, k // 2, a, b)
+                    break
+    return hit
+
+
+def crossing(x1, y1, x2, y2, x3, y3, x4, y4):
+    '''Whether the segments (x1, y1)-(x2, y2) and (x3, y3)-(x4, y4) cross.'''
+    d1 = (x4 - x3) * (y1 - y3) - (y4 - y3) * (x1 - x3)
+    d2 = (x4 - x3) * (y2 - y3) - (y4 - y3) * (x2 - x3)
+    d3 = (x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1)
+    d4 = (x2 - x1) * (y4 - y1) - (y2 - y1) * (x4 - x1)
+    return (d1 > 0) != (d2 > 0) and (d3 > 0) != (d4 > 0)
+
+
+def point_inside(x, y, pts, sides):
+    '''Even-odd point in closed polygons, given as [sides].'''
+    c = False
+    for a, b in sides:
+        x1 = pts[a * 2]
+        y1 = pts[a * 2 + 1]
+        x2 = pts[b * 2]
+        y2 = pts[b * 2 + 1]
+        if (y2 > y) != (y1 > y) and x < (x1 - x2) * (y - y2) / (y1 - y2) + x2:
+            c = not c
+    return c
+
+
+def overlap(pts, sides, tpts, tsides, membership):
+    '''Whether two posed bodies overlap: (side, side) of a crossing, or
+    (-1, -1) if one contains the other (checked in [membership] mode only).
+    '''
+    for a, b in sides:
+        x1 = pts[a * 2]
+        y1 = pts[a * 2 + 1]
+        x2 = pts[b * 2]
+        y2 = pts[b * 2 + 1]
+        for c, d in tsides:
+            if crossing(x1, y1, x2, y2, tpts[c * 2], tpts[c * 2 + 1],
+                        tpts[d * 2], tpts[d * 2 + 1]):
+                return a, c
+    if membership and (
+            (sides and point_inside(tpts[0], tpts[1], pts, sides))
+            or (tsides and point_inside(pts[0], pts[1], tpts, tsides))):
+        return -1, -1
+
+
+def contact_side(k, sides, pts, a, b, tpts):
+    '''Of the sides meeting at point [k], the one lying closest along the
+    other body's side [a]-[b] (at the time of contact).
+    '''
+    ax = tpts[a * 2]
+    ay = tpts[a * 2 + 1]
+    ex = tpts[b * 2] - ax
+    ey = tpts[b * 2 + 1] - ay
+    best = None
+    for c, d in sides:
+        if c == k or d == k:
+            o = d if c == k else c
+            dist = abs(ex * (pts[o * 2 + 1] - ay) - ey * (pts[o * 2] - ax))
+            if best is None or dist < best[0]:
+                best = (dist, c)
+    return best[1] if best else -1
+
+
+def time_of_impact(bounds, seg, last_pose, pose, tbounds, tseg, last_tpose,
+                   tpose):
+    '''Continuous collision check of two frames, each moving from its
+    [last_pose] to its [pose]: the earliest time of impact (0 to 1) and the
+    sides in contact (each as [pol_index, point_index], by its first point,
+    as in [collide_bounds]), as (t, side, tside), or None if they don't meet.
+    Between the poses, the points move in straight lines; turns larger than
+    [SWEEP_TURN] are swept in as many steps. Bodies already overlapping at
+    the last poses give t = 0 (and sides [-1, -1] if one contains the other).
+    '''
+    sides = frame_sides(bounds, seg)
+    tsides = frame_sides(tbounds, tseg)
+    turn = max(abs((pose[4] - last_pose[4] + pi) % (2 * pi) - pi),
+               abs((tpose[4] - last_tpose[4] + pi) % (2 * pi) - pi))
+    steps = max(1, int(ceil(turn / SWEEP_TURN)))
+
+    pts0 = posed(bounds, last_pose)
+    tpts0 = posed(tbounds, last_tpose)
+    contact = overlap(pts0, sides, tpts0, tsides, not (seg and tseg))
+    if contact:
+        return (0., pol_side(bounds, contact[0]),
+                pol_side(tbounds, contact[1]))
+    for step in range(steps):
+        t1 = (step + 1.) / steps
+        pts1 = posed(bounds, between(last_pose, pose, t1))
+        tpts1 = posed(tbounds, between(last_tpose, tpose, t1))
+        limit = 1.
+        hit = first_hit(pts0, pts1, side_boxes(tsides, tpts0, tpts1), tpts0,
+                        tpts1, limit)
+        if hit:
+            limit = hit[0]
+        thit = first_hit(tpts0, tpts1, side_boxes(sides, pts0, pts1), pts0,
+                         pts1, limit)
+        if hit or thit:
+            t = (thit or hit)[0]
+            at = [p0 + (p1 - p0) * t for p0, p1 in zip(pts0, pts1)]
+            tat = [p0 + (p1 - p0) * t for p0, p1 in zip(tpts0, tpts1)]
+            if thit:
+                t, k, side, b = thit
+                tside = contact_side(k, tsides, tat, side, b, at)
+            else:
+                t, k, tside, b = hit
+                side = contact_side(k, sides, at, tside, b, tat)
+            return (float(step + t) / steps, pol_side(bounds, side),
+                    pol_side(tbounds, tside))
+        pts0 = pts1
+        tpts0 = tpts1
+
+
+# Hit testing grid: a uniform grid over the registered bounding boxes, mapping
+# each (column, row) cell to the set of rids whose bbox overlaps it.
+hit_grid = {}
+# The cells of each indexed rid, to take it out of the grid when it moves.
+hit_cells = {}
+# rids spanning too many cells, checked on every query instead.
+hit_large = set()
+# rids whose bounds changed since they were indexed.
+moved_rids = set()
+# The grid's cell size (0 when not built yet).
+hit_cell = [0.]
+MAX_CELLS = 64
+
+
+def index_rotaboxes(cell=None):
+    '''(Re)builds the hit testing grid over all the registered bounds, with a
+    [cell] size (by default, the mean size of the bounding boxes).
+    It's built on the first [rotabox_at] query and kept up to date as the
+    widgets move, so this is only needed to change the cell size.
+    '''
+    reap_rids()
+    hit_grid.clear()
+    hit_cells.clear()
+    hit_large.clear()
+    moved_rids.clear()
+    boxes = [(rid, body['bbox']) for rid, body in iteritems(peers)
+             if len(body['bbox']) == 4]
+    if cell is None:
+        sizes = [max(box[2] - box[0], box[3] - box[1]) for rid, box in boxes]
+        cell = sum(sizes) / len(sizes) if sizes else 100.
+    hit_cell[0] = max(cell, 1.)
+    for rid, box in boxes:
+        index_box(rid, box)
+
+
+def index_box(rid, box):
+    if box[0] > box[2]:  # Empty
+        return
+    cell = hit_cell[0]
+    cols = range(int(box[0] // cell), int(box[2] // cell) + 1)
+    rows = range(int(box[1] // cell), int(box[3] // cell) + 1)
+    if len(cols) * len(rows) > MAX_CELLS:
+        hit_large.add(rid)
+        return
+    keys = [(col, row) for col in cols for row in rows]
+    for key in keys:
+        try:
+            hit_grid[key].add(rid)
+        except KeyError:
+            hit_grid[key] = set([rid])
+    hit_cells[rid] = keys
+
+
+def unindex_box(rid):
+    for key in hit_cells.pop(rid, ()):
+        rids = hit_grid[key]
+        rids.discard(rid)
+        if not rids:
+            del hit_grid[key]
+    hit_large.discard(rid)
+
+
+def rids_at(x, y):
+    '''The rids whose bounding boxes contain the point (x, y). Only the rids in
+    the grid cell of the point (and those spanning too many cells) are
+    checked. The grid is built on the first query and the bounds moved since
+    the last one are indexed again.
+    '''
+    reap_rids()
+    if not hit_cell[0]:
+        index_rotaboxes()
+    for rid in moved_rids:
+        unindex_box(rid)
+        try:
+            box = peers[rid]['bbox']
+        except KeyError:  # Released
+            continue
+        if len(box) == 4:
+            index_box(rid, box)
+    moved_rids.clear()
+
+    cell = hit_cell[0]
+    candidates = hit_grid.get((int(x // cell), int(y // cell)), ())
+    if hit_large:
+        candidates = hit_large.union(candidates)
+    rids = []
+    for rid in candidates:
+        box = peers[rid]['bbox']
+        if box[0] <= x <= box[2] and box[1] <= y <= box[3]:
+            rids.append(rid)
+    return rids
+
+
+# Static bounds ([static]): the sides of bounds that don't move, baked in world
+# space into a uniform grid shared by all of them. They're left out of the
+# broad phase, and the other bounds are checked against the grid instead
+# (see [collide_static]). Each (column, row) cell maps to a list of
+# (rid, side) entries, where [side] numbers the rid's sides in [static_segs]
+# and [static_ids] (see [side_coords]).
+static_grid = {}
+# The cells of each baked rid, to take it out of the grid.
+static_cells = {}
+static_segs = {}
+static_ids = {}
+# The baked frame of each membership mode rid, whose bounds can contain others
+# without any sides crossing.
+static_members = {}
+# The size of each baked rid's box (its larger side) and their sum.
+static_sizes = {}
+static_size = [0.]
+# The grid's cell size (0 until the first bounds are baked) and whether it was
+# set by [index_statics] (otherwise it follows the baked boxes' mean size).
+static_cell = [0., False]
+
+
+def bake_bounds(rid, frame='bounds'):
+    '''Baking the sides of [rid]'s [frame], where they are, into the static
+    index (replacing those baked before). Unless set by [index_statics], the
+    grid's cell size follows the baked boxes' mean size: the grid is rebuilt
+    whenever the mean drifts beyond half or twice the cell size.
+    '''
+    unbake_bounds(rid)
+    flush_bounds(rid)
+    body = peers[rid]
+    bounds = body[frame]
+    box = body['bbox']
+    size = max(box[2] - box[0], box[3] - box[1], 1.)
+    static_sizes[rid] = size
+    static_size[0] += size
+    static_segs[rid], static_ids[rid] = side_coords(
+        bounds['points'], bounds['pol_lens'], bounds.get('opens', ()))
+    if not body['seg']:
+        static_members[rid] = frame
+    cell = static_cell[0]
+    if not static_cell[1]:
+        mean = static_size[0] / len(static_sizes)
+        if not cell or mean > cell * 2 or mean < cell * .5:
+            regrid_statics(mean)
+            return
+    grid_sides(rid)
+
+
+def grid_sides(rid):
+    '''Adding [rid]'s baked sides to the cells they cross.'''
+    cell = static_cell[0]
+    segs = static_segs[rid]
+    keys = set()
+    for s in range(len(segs) // 4):
+        x1, y1, x2, y2 = segs[s * 4:s * 4 + 4]
+        for col in range(int(min(x1, x2) // cell),
+                         int(max(x1, x2) // cell) + 1):
+            for row in range(int(min(y1, y2) // cell),
+                             int(max(y1, y2) // cell) + 1):
+                key = (col, row)
+                try:
+                    static_grid[key].append((rid, s))
+                except KeyError:
+                    static_grid[key] = [(rid, s)]
+                keys.add(key)
+    static_cells[rid] = keys
+
+
+def unbake_bounds(rid):
+    '''Taking [rid]'s sides out of the static index.'''
+    for key in static_cells.pop(rid, ()):
+        entries = [entry for entry in static_grid[key] if entry[0] != rid]
+        if entries:
+            static_grid[key] = entries
+        else:
+            del static_grid[key]
+    static_segs.pop(rid, None)
+    static_ids.pop(rid, None)
+    static_members.pop(rid, None)
+    static_size[0] -= static_sizes.pop(rid, 0.)
+
+
+def index_statics(cell=None):
+    '''Rebuilds the static index with a [cell] size, kept for the bounds baked
+    later, or (by default) with the mean size of the baked bounds' boxes,
+    followed from then on (see [bake_bounds]).
+    '''
+    static_cell[1] = cell is not None
+    if cell is None:
+        cell = (static_size[0] / len(static_sizes) if static_sizes else 0.)
+    regrid_statics(cell)
+
+
+def regrid_statics(cell):
+    '''Rebuilding the static grid with a [cell] size.'''
+    static_cell[0] = max(cell, 1.)
+    static_grid.clear()
+    static_cells.clear()
+    for rid in static_segs:
+        grid_sides(rid)
+
+
+def collide_static(rid, frame='bounds'):
+    '''Checks [rid]'s sides against those in the static index, in the grid
+    cells they cross (a segment mode check, whatever the bounds' modes).
+    Returns a list of [wid, result] for each baked rid crossed, where [result]
+    is [rid_pol_index, rid_point_index, wid_pol_index, wid_point_index], as
+    in [collide_bounds].
+    A membership mode wid that isn't crossed, but whose bounding box contains
+    [rid]'s, is checked for [rid]'s points (wid's [collide_bounds] against
+    [rid]), so that bounds wholly inside it count too. Its [result] is then
+    [wid_pol_index, rid_pol_index].
+    '''
+    if not static_grid:
+        return []
+    body = peers[rid]
+    box = body['bbox']
+    if len(box) < 4:  # Not updated yet
+        return []
+    hits = {}
+    cell = static_cell[0]
+    cols = range(int(box[0] // cell), int(box[2] // cell) + 1)
+    rows = range(int(box[1] // cell), int(box[3] // cell) + 1)
+    if len(cols) * len(rows) > MAX_CELLS or any(
+            (col, row) in static_grid for col in cols for row in rows):
+        cross_statics(rid, frame, hits)
+    for wid, wframe in iteritems(static_members):
+        if wid == rid or wid in hits:
+            continue
+        w_box = peers[wid]['bbox']
+        if (w_box[0] <= box[0] and w_box[1] <= box[1]
+                and w_box[2] >= box[2] and w_box[3] >= box[3]):
+            flush_bounds(rid)
+            result = collide_bounds(wid, rid, wframe, frame)
+            if result:
+                hits[wid] = result
+    return [[wid, hit] for wid, hit in iteritems(hits)]
+
+
+def cross_statics(rid, frame, hits):
+    '''Adding to [hits] ({wid: result}) the baked rids whose sides [rid]'s
+    sides cross, in the grid cells they share (see [collide_static]).
+    '''
+    flush_bounds(rid)
+    cell = static_cell[0]
+    bounds = peers[rid][frame]
+    pts = bounds['points']
+    ptids = bounds['pt_ids']
+    plens = bounds['pol_lens']
+    opens = bounds.get('opens', ())
+    strt = 0
+    for p in range(len(plens)):
+        pl = plens[p]
+        o = 2 if p in opens else 0
+        for i in range(strt, strt + pl * 2 - o, 2):
+            i2 = i + 2 if ptids[i] < pl - 1 else strt
+            x1 = pts[i]
+            y1 = pts[i + 1]
+            x2 = pts[i2]
+            y2 = pts[i2 + 1]
+            for col in range(int(min(x1, x2) // cell),
+                             int(max(x1, x2) // cell) + 1):
+                for row in range(int(min(y1, y2) // cell),
+                                 int(max(y1, y2) // cell) + 1):
+                    for wid, s in static_grid.get((col, row), ()):
+                        if wid == rid or wid in hits:
+                            continue
+                        segs = static_segs[wid]
+                        k = s * 4
+                        if crossing(x1, y1, x2, y2, segs[k], segs[k + 1],
+                                    segs[k + 2], segs[k + 3]):
+                            ids = static_ids[wid]
+                            hits[wid] = [p, int(ptids[i]), ids[s * 2],
+                                         ids[s * 2 + 1]]
+        strt += pl * 2
+
+
+# Compiled bounds files (see [compile_bounds]): a header, a table of the
+# frames (key, number of polygons and of points, size the hints are relative
+# to) and then, 4-byte aligned, the polygons' lengths and open flags (int32)
+# and the hints (float64), little-endian.
+CBOUNDS = '.cbounds'
+MAGIC = b'RBXB'
+# Version 1 kept the hints as float32, version 2 didn't keep the frames' sizes.
+VERSION = 3
+HEADER = struct.Struct('<4sII')  # Magic, version, number of frames
+# Key's length (the key follows), polygons, points, width, height
+FRAME = struct.Struct('<HIIdd')
+
+# The bounds files read so far: {(path,) or (path, width, height):
+# (mtime, bounds, opens)}
+bounds_files = {}
+
+
+def project_frames(project):
+    '''A rotaboxer project's frames, as (key, polygons) with the polygons in
+    their order.
+    '''
+    for key, frame in iteritems(project):
+        if key in ('image', 'version'):
+            continue
+        yield key, sorted(itervalues(frame), key=itemgetter('number'))
+
+
+def image_sizes(filename, image):
+    '''A function returning the size of each frame of a project's [image]
+    (a .png or an .atlas, relative to the project's file [filename]).
+    '''
+    path = os.path.join(os.path.dirname(os.path.abspath(filename)), image)
+    if path.endswith('.atlas'):
+        with open(path, 'r', encoding="UTF8") as atlas:
+            rects = {}
+            for page in itervalues(json.load(atlas)):
+                rects.update(page)
+        return lambda key: rects[key][2:4]
+    with open(path, 'rb') as png:
+        head = png.read(24)
+    if head[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError('%s: no size given and not a .png or .atlas' % image)
+    size = struct.unpack('>II', head[16:24])
+    return lambda key: size
+
+
+def read_project(filename, width, height):
+    '''The (bounds, opens) of a rotaboxer project (see [Rotabox.read_bounds]),
+    with the points divided by [width] and [height]. Read once per size and
+    modification of the file.
+    '''
+    path = os.path.abspath(filename)
+    mtime = os.path.getmtime(path)
+    cached = bounds_files.get((path, width, height))
+    if cached and cached[0] == mtime:
+        return cached[1:]
+
+    with open(path, 'r', encoding="UTF8") as proj:
+        project = json.load(proj)
+    bounds = {}
+    opens = []
+    for f, pols in project_frames(project):
+        bounds[f] = []
+        for p, pol in enumerate(pols):
+            if pol.get('open'):
+                opens.append(p)
+            bounds[f].append([(round(float(point[0]) / width, 3),
+                               round(float(point[1]) / height, 3))
+                              for point in pol['points']])
+    bounds_files[(path, width, height)] = (mtime, bounds, opens)
+    return bounds, opens
+
+
+def to_bytes(items):
+    if sys.byteorder == 'big':
+        items.byteswap()
+    try:
+        return items.tobytes()
+    except AttributeError:  # Python 2.x
+        return items.tostring()
+
+
+def from_bytes(kind, data):
+    items = array(kind)
+    try:
+        items.frombytes(data)
+    except AttributeError:  # Python 2.x
+        items.fromstring(data)
+    if sys.byteorder == 'big':
+        items.byteswap()
+    return items
+
+
+def compile_bounds(filename, target=None, size=None):
+    '''Compiling a rotaboxer project ([filename], a .bounds file) into a
+    compiled bounds file, for [Rotabox.read_bounds] to load without parsing.
+    The points are divided by [size] or, if None, by the size of the project's
+    image (of each frame, for an .atlas) and rounded, as [read_bounds] does
+    for a Rotabox of its image's size. [target] defaults to [filename] with a
+    .cbounds extension. Returns [target].
+    '''
+    with open(filename, 'r', encoding="UTF8") as proj:
+        project = json.load(proj)
+    if size is None:
+        sizes = image_sizes(filename, project['image'])
+    else:
+        sizes = lambda key: size
+
+    table = []
+    lens = array('i')
+    flags = array('i')
+    hints = array('d')
+    for key, pols in project_frames(project):
+        width, height = (float(n) for n in sizes(key))
+        points = 0
+        for pol in pols:
+            lens.append(len(pol['points']))
+            flags.append(1 if pol.get('open') else 0)
+            for point in pol['points']:
+                hints.append(round(float(point[0]) / width, 3))
+                hints.append(round(float(point[1]) / height, 3))
+            points += len(pol['points'])
+        key = key.encode('utf8')
+        table.append(FRAME.pack(len(key), len(pols), points, width, height)
+                     + key)
+
+    head = HEADER.pack(MAGIC, VERSION, len(table)) + b''.join(table)
+    if target is None:
+        target = os.path.splitext(filename)[0] + CBOUNDS
+    with open(target, 'wb') as cbounds:
+        cbounds.write(head + b'\0' * (-len(head) % 4))
+        for items in (lens, flags, hints):
+            cbounds.write(to_bytes(items))
+    return target
+
+
+class CompiledFrame(object):
+    '''A frame of a compiled bounds file: its polygons' lengths ([lens]) and
+    hints ([hints]), as arrays, and the [size] the hints are relative to.
+    [define_bounds] copies them into the frame's arrays whole and keys the
+    frame's template by their bytes ([key]), so identical compiled frames
+    share it (a project file's bounds, though equal, get their own). Read as a
+    list of polygons (e.g. by [decompose]), it builds their points on first
+    use.
+    '''
+    def __init__(self, lens, hints, size):
+        self.lens = lens
+        self.hints = hints
+        self.size = size
+        self.key = (to_bytes(lens[:]), to_bytes(hints[:]))
+        self.pols = None
+
+    def scaled(self, width, height):
+        '''The frame with its hints relative to [width] and [height], rounded
+        as [read_project] rounds them (itself, if already).
+        '''
+        if self.size == (width, height):
+            return self
+        fx = self.size[0] / width
+        fy = self.size[1] / height
+        hints = self.hints.tolist()
+        hints[::2] = [round(x * fx, 3) for x in hints[::2]]
+        hints[1::2] = [round(y * fy, 3) for y in hints[1::2]]
+        return CompiledFrame(self.lens, array('d', hints), (width, height))
+
+    def polygons(self):
+        if self.pols is None:
+            hints = self.hints.tolist()
+            self.pols = []
+            strt = 0
+            for plen in self.lens:
+                end = strt + plen * 2
+                self.pols.append(list(zip(hints[strt:end:2],
+                                          hints[strt + 1:end:2])))
+                strt = end
+        return self.pols
+
+    def __len__(self):
+        return len(self.lens)
+
+    def __getitem__(self, index):
+        return self.polygons()[index]
+
+    def __iter__(self):
+        return iter(self.polygons())
+
+
+def load_bounds(filename, width=None, height=None):
+    '''The (bounds, opens) of a compiled bounds file (see [compile_bounds]):
+    each frame is a [CompiledFrame], its hints (float64) copied out of the
+    mapped file whole, with no per point work. Given a [width] and [height],
+    the frames compiled for another size are rescaled to it (a pass over their
+    hints), as [read_project] divides a project's points by the Rotabox's
+    size. Read once per modification of the file (and rescaling size); the
+    result is shared by all the readers.
+    '''
+    path = os.path.abspath(filename)
+    mtime = os.path.getmtime(path)
+    if width is not None:
+        width, height = float(width), float(height)
+        cached = bounds_files.get((path, width, height))
+        if cached and cached[0] == mtime:
+            return cached[1:]
+        bounds, opens = load_bounds(filename)
+        bounds = dict((key, frame.scaled(width, height))
+                      for key, frame in iteritems(bounds))
+        bounds_files[(path, width, height)] = (mtime, bounds, opens)
+        return bounds, opens
+
+    cached = bounds_files.get((path,))
+    if cached and cached[0] == mtime:
+        return cached[1:]
+
+    with open(path, 'rb') as cbounds:
+        data = mmap.mmap(cbounds.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, frames = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError('%s: not a compiled bounds file' % filename)
+        if version != VERSION:
+            raise ValueError('%s: compiled by an older version, compile it '
+                             'again' % filename)
+        at = HEADER.size
+        table = []
+        pols = points = 0
+        for f in range(frames):
+            klen, fpols, fpoints, fwidth, fheight = FRAME.unpack_from(data, at)
+            at += FRAME.size
+            table.append((data[at:at + klen].decode('utf8'), fpols,
+                          (fwidth, fheight)))
+            at += klen
+            pols += fpols
+            points += fpoints
+        at += -at % 4
+        lens = from_bytes('i', data[at:at + pols * 4])
+        at += pols * 4
+        flags = from_bytes('i', data[at:at + pols * 4])
+        at += pols * 4
+        hints = from_bytes('d', data[at:at + points * 16])
+    finally:
+        data.close()
+
+    bounds = {}
+    opens = []
+    p = h = 0
+    for key, fpols, size in table:
+        flens = lens[p:p + fpols]
+        end = h + sum(flens) * 2
+        bounds[key] = CompiledFrame(flens, hints[h:end], size)
+        opens.extend(q for q in range(fpols) if flags[p + q])
+        h = end
+        p += fpols
+    bounds_files[(path,)] = (mtime, bounds, opens)
+    return bounds, opens
+
+
+def read_file(filename, width, height):
+    '''The (bounds, opens) of a compiled bounds file or of a project file,
+    relative to [width] and [height].
+    '''
+    if filename.endswith(CBOUNDS):
+        return load_bounds(filename, width, height)
+    return read_project(filename, width, height)
+
+
+class Body(object):
+    '''Bounds without a widget (see the module's docstring).
+    It keeps the transformation of its bounds and answers to the same
+    attributes the broad phase reads from a Rotabox ([rid], [curr_key],
+    [convex_pieces] and [local_index]).
+    '''
+    def __init__(self, custom_bounds=None, open_bounds=None, segment_mode=True,
+                 size=(100., 100.), pos=(0., 0.), angle=0., origin=None,
+                 frame=None, convex_pieces=False, obb_check=False,
+                 lazy_update=False, pre_check=False, local_index=False,
+                 static=False):
+        if custom_bounds is None:
+            custom_bounds = [[(0, 0), (1, 0), (1, 1), (0, 1)]]
+        if open_bounds is None:
+            open_bounds = []
+        if frame is None:
+            frame = (min(custom_bounds) if isinstance(custom_bounds, dict)
+                     else 'bounds')
+        self.convex_pieces = convex_pieces
+        self.local_index = local_index
+        self.lazy_update = lazy_update
+        self.static = static
+        self.size = tuple(size)
+        self.pos = tuple(pos)
+        self.angle = angle
+        self.origin = origin
+        self.curr_key = frame
+        self.rid = new_rid(self)
+        define_bounds(custom_bounds, open_bounds, segment_mode, self.rid,
+                      pre_check)
+        if convex_pieces:
+            define_pieces(self.rid, custom_bounds)
+        define_tiers(self.rid, obb_check)
+        if local_index:
+            define_index(self.rid)
+        owners[self.rid] = self
+        self.set_transform()
+
+    def set_transform(self, pos=None, angle=None, size=None, origin=None,
+                      frame=None):
+        '''Placing the bounds from their hints (or deferring it, with
+        [lazy_update]). The omitted arguments keep their last values, but the
+        default [origin] (None) is the Body's center wherever it goes.
+        A [static] Body's sides are baked again where they land.
+        '''
+        if pos is not None:
+            self.pos = tuple(pos)
+        if angle is not None:
+            self.angle = angle
+        if size is not None:
+            self.size = tuple(size)
+        if origin is not None:
+            self.origin = tuple(origin)
+        if frame is not None:
+            self.curr_key = frame
+        width, height = self.size
+        origin = self.origin or (self.pos[0] + width * .5,
+                                 self.pos[1] + height * .5)
+        place = (defer_bounds if self.lazy_update and not self.static
+                 else transform_bounds)
+        place(width, height, self.pos, radians(self.angle % 360), origin,
+              self.rid, self.curr_key)
+        if self.static:
+            bake_bounds(self.rid, self.curr_key)
+        moved_rids.add(self.rid)
+
+    def collide(self, other):
+        '''Checking against another Body or a Rotabox (with the check their
+        options call for, as in [narrow_phase]) or a box (x, y, right, top).
+        '''
+        rid = self.rid
+        try:
+            wid = other.rid
+        except AttributeError:
+            flush_bounds(rid)
+            if peers[rid]['seg']:
+                return collide_bounds(rid, list(other), self.curr_key)
+            box = peers[rid]['bbox']
+            return not (box[2] < other[0] or box[0] > other[2]
+                        or box[3] < other[1] or box[1] > other[3])
+        check = narrow_phase(rid, wid)
+        if not flush_pair(rid, wid, check is local_bounds):
+            return False
+        try:
+            return cached_check(check, rid, wid, self.curr_key,
+                                other.curr_key)
+        except KeyError:
+            return False
+
+    def contact(self, other):
+        '''The contact manifold of a collision with another Body, a Rotabox
+        or a box (see [contact_bounds]), or False.
+        '''
+        rid = self.rid
+        try:
+            wid = other.rid
+        except AttributeError:
+            flush_bounds(rid)
+            return contact_bounds(rid, list(other), self.curr_key)
+        if not flush_pair(rid, wid):
+            return False
+        try:
+            return cached_check(contact_bounds, rid, wid, self.curr_key,
+                                other.curr_key)
+        except KeyError:
+            return False
+
+    def collide_point(self, x, y):
+        flush_bounds(self.rid)
+        return point_in_bounds(x, y, self.rid, self.curr_key)
+
+    def release(self):
+        '''Releasing the bounds (the Body is not usable after this).'''
+        if self.rid is not None:
+            retire(self.rid)
+            self.rid = None
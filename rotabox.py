@@ -43,7 +43,8 @@ Collision detection methods:
         ones when making the bounds in the editor.
 
     * Requires mutual collision checks (All involved widgets should check for
-        an accurate reading).
+        an accurate reading), unless both use *convex_pieces* and their
+        polygons decompose.
 
     * Interacts with Rotaboxes that use the same detection method and regular
         widgets (but behaving, itself, like a regular widget while doing so).
@@ -84,6 +85,15 @@ Cython option
     cybounds.pyd) for an about X5 speedup.
     User needs to compile it for specific systems using the provided
     cybounds.c file.
+    If the module is not found, *numpy* (if installed) is used for whole-array
+    calculations instead of the pure Python functions.
+
+Headless engine
+    The collision engine lives in the rotabounds module, which doesn't import
+    Kivy, so that it can run without a window (e.g. on a game server). Its
+    *Body* class is the plain-Python equivalent of a Rotabox: it defines the
+    same bounds from the same hints, places them by *set_transform* and
+    checks them against other Bodies, Rotaboxes or boxes.
 
 Restrictions
 * In order to be able to maintain any arbitrary aspect ratio (e.g. its image's
@@ -99,7 +109,9 @@ Restrictions
 API
 
 Basic Usage
-    To use Rotabox, just include *rotabox_full.py* in your project files.
+    To use Rotabox, include both *rotabox.py* and *rotabounds.py* in your
+    project files, in the same folder: *rotabox.py* imports its collision
+    engine from *rotabounds.py* and doesn't work on its own.
 
         from rotabox import Rotabox
         ...
@@ -193,6 +205,59 @@ Customizing the Collidable Area
     For small widgets (under 45 points), the tax of extra calculations
     outweighs any benefit in collision.
 
+**absolute_update** *BooleanProperty* (False):
+    If True, the bounds are calculated on every update from the hints of
+    *custom_bounds* and the widget's full size, position and angle, in a single
+    pass, instead of moving and rotating the previous points.
+    Floating point errors don't add up over long sessions, resizing needs no
+    separate pass and an unchanged widget costs nothing to update.
+
+**lazy_update** *BooleanProperty* (False):
+    Like *absolute_update*, but the bounds are only calculated when a query
+    needs them (*collide_widget*, *collide_point*, *get_point*, *collide_all*
+    etc.). Until then, an update only places the bounding circle, which gives
+    the bbox for the broad phase. Worth it for rotating decor that is rarely
+    checked.
+
+**convex_pieces** *BooleanProperty* (False):
+    If True, each polygon is decomposed into convex pieces when the bounds are
+    defined (no need to split the shapes by hand in the editor). Collision
+    checks between Rotaboxes that both use it, in either detection method,
+    then use a separating axis test between the pieces. It detects any overlap
+    of the areas, full containment included, with a single check, and returns
+    the indices of the overlapping polygons [this_pol_index, that_pol_index].
+    Open polygons count as closed. A frame with a polygon that doesn't
+    decompose (e.g. one whose sides cross each other) keeps the regular check
+    of its detection method (mutual, in membership mode).
+
+**obb_check** *BooleanProperty* (False):
+    Before the narrow phase, collision checks compare the bounding circles of
+    the two parties and, if this is True (on either side), their oriented
+    bounding boxes, which rotate with the widgets. Worth it for long, thin
+    shapes, whose axis-aligned boxes grow large as they rotate.
+
+**local_index** *BooleanProperty* (False):
+    If True, the sides of each frame are indexed in a grid over the hints when
+    the bounds are defined. Collision checks against other segment mode
+    Rotaboxes with fewer points then map the other party's sides into this
+    one's hint space and check them against the sides in the cells they
+    cross, instead of every side in world space. With *lazy_update* too, this
+    widget's points aren't even transformed for these checks. Meant for large
+    detailed bounds (e.g. terrain) against small moving ones. Only segment
+    mode bounds are indexed: in membership mode, this has no effect.
+
+**static** *BooleanProperty* (False):
+    If True, once the widget is laid out, its sides are baked into a shared
+    static index in world space, and its updates do nothing until it's moved,
+    resized or rotated (which bakes them again). *collide_all* leaves static
+    widgets out of the broad phase and checks the others against the index
+    instead, so that thousands of walls cost about as much as the few cells
+    each moving widget covers. Crossing sides count in either mode, and a
+    membership mode wall also reports the bounds wholly inside it, as
+    *collide_widget* does. A membership mode widget wholly containing a
+    static one, though, isn't reported. Meant for level walls and other fixed
+    scenery.
+
 _______________
 Touch interface
     Most of it is familiar from the Scatter widget.
@@ -246,8 +311,39 @@ Utility interface
     The argument indices are based on user's [custom_bounds]' structure.
 
 **read_bounds(filename)** *Method*
-    Define [custom_bounds] using a rotaboxer's project file (.bounds file).
+    Define [custom_bounds] using a rotaboxer's project file (.bounds file) or
+    a compiled bounds file (.cbounds file, see *compile_bounds*).
     To work, [size] should be already defined.
+    Each file is read once per modification (and, for a .bounds file, per
+    size) and its result shared by all the Rotaboxes reading it.
+
+**read_bounds_async(filename)** *Method*
+    Like *read_bounds*, but the file is read on a worker thread and the
+    bounds are set when ready (one file per frame), while the widget keeps
+    its current (by default, rectangular) bounds.
+
+**collide_contact(widget)** *Method*
+    Like *collide_widget*, but returns the contact manifold of a collision,
+    [points, normal, depth], or False. The points are all the crossings of
+    the two widgets' sides, found in the same pass that checks them. The
+    normal (a unit vector) is perpendicular to the crossings' principal axis
+    and points towards the other widget, and the depth is an approximation
+    of how far the widget should move back along it to part. If one widget
+    contains the other (not in segment mode), there are no points, and the
+    normal points from one's bounding box center to the other's.
+    A non-Rotabox widget counts as a rectangle.
+
+**collide_swept(widget)** *Method*
+    Continuous collision check: follows both widgets from their poses before
+    their last update to their current ones (a widget not updated in the
+    latest frame of the two counts as still) and returns (t, side, wside) for
+    the earliest impact, t being the fraction of the motion (0 if they
+    already overlap), or None. The sides in contact are given as [pol_index,
+    point_index] of their first point, as in *collide_widget* ([-1, -1] for
+    containment).
+    Unlike *collide_widget*, a fast widget can't pass through a thin one
+    between two updates. The points move in a straight line, with sub-steps
+    for turns larger than 10 degrees.
 
 **draw_bounds** *NumericProperty* (0)
     This option can be useful during testing, as it makes the widget's bounds
@@ -271,15 +367,96 @@ Utility interface
     The reset completion signal, however, is the consequent [ready] state change
     to True.
 
+________________
+Module interface
+
+**collide_all(rids=None)** *Function*
+    Checks all the registered bounds (or only those in [rids]) against each
+    other and returns a list of [rid, wid, result] for every colliding pair.
+    Instead of calling *collide_widget* for every pair of widgets, a sort and
+    sweep broad phase over the bounding boxes finds the candidate pairs, so only
+    these go through the expensive collision check.
+
+**rotabox_at(x, y)** *Function*
+    Returns the topmost Rotabox whose bounds contain the point (x, y), or None.
+    A uniform grid over the bounding boxes (built on the first query and kept
+    up to date as the widgets move) picks the few candidates that go through
+    the exact check, instead of every widget's *collide_point* in turn.
+    *index_rotaboxes(cell=None)* rebuilds the grid with a different cell size
+    (by default, the bounding boxes' mean size).
+
+**broad_phase(rids=None)** *Function*
+    Returns the (rid, wid) pairs whose bounding boxes overlap, without any
+    further checks.
+
+**collide_static(rid, frame='bounds')** *Function*
+    Checks a rid's sides against those baked in the static index (see
+    *static*) and returns a list of [wid, result] for every static widget hit.
+    Only the sides in the cells the rid's sides cross are checked. Membership
+    mode static widgets also report the bounds wholly inside them, with
+    [result] as their own *collide_bounds* would return it.
+    The grid's cells follow the static bounding boxes' mean size;
+    *index_statics(cell=None)* rebuilds the index with a fixed cell size (or,
+    by default, with the mean size again).
+
+**cached_check(check, rid, wid, frame='bounds', tframe='bounds')** *Function*
+    Runs a pair check (e.g. *collide_bounds*) or returns its last result for
+    the same pair, if neither bounds have changed since.
+    Each rid's bounds get a new version whenever their points change
+    (*update_bounds*, *resize*, etc., but not an update to the same place), and
+    each result is kept with the two versions it was found at.
+    *collide_widget*, *collide_contact* and *collide_all* go through it, so
+    still pairs cost a lookup.
+    When either side has moved, *coherent_check* first tries the pair's
+    witness from the last check: the two sides that crossed (segment mode
+    hits), or an axis that separated the two frames' points (misses).
+    Persistent contacts cost a single side test instead of a full scan. The
+    witnesses are dropped when either bounds are defined again or released.
+
+**update_rotaboxes(widgets)** *Function*
+    Updates the bounds of many Rotaboxes (those using *absolute_update*) in a
+    single engine call (with NumPy or cybounds; otherwise, one call per
+    widget), e.g. right after moving them in a game loop and before checking
+    their collisions.
+
+**release_bounds(rid)** *Function*
+    Removes a Rotabox's bounds from the registry and returns their storage for
+    reuse. Each frame's points and boxes are kept in a few large, shared
+    buffers (see *get_store()*), where each frame takes a contiguous run. The
+    hints and indices are built once per bounds definition (*custom_bounds*,
+    *open_bounds* and *segment_mode*) and shared by all the Rotaboxes defined
+    identically, until the last of them is released.
+    A Rotabox's bounds are released when it's removed from the widget tree (and
+    not added back within the frame) or garbage collected, and its rid is
+    issued again to the next Rotabox. A collected Rotabox's bounds go at the
+    next query of the registry (*collide_all*, *rotabox_at*,
+    *update_rotaboxes* or a new Rotabox), on the main thread.
+
+**count_bounds()** *Function*
+    The number of live entries in the bounds' registry.
+
+**compile_bounds(filename, target=None, size=None)** *Function*
+    Converts a rotaboxer's project file into a compiled bounds file (by
+    default, next to it with a .cbounds extension): the frames' hints as
+    float64 (the same values a project file gives), with the polygons'
+    lengths and open flags, loaded by *read_bounds* through mmap without any
+    parsing, and copied into the bounds' arrays whole. The points are divided
+    by [size] or, if None, by the project image's size (each frame's, for an
+    .atlas); a Rotabox of another size gets them rescaled to its own, as from
+    the project file (a pass over the hints, once per size).
+
 
 ___________________________________________________________________________
 A Rotabox example can be seen if this module is run directly.
 """
 
 __author__ = 'unjuan'
-__version__ = '0.13.7'
+__version__ = '0.14.0'
 
-__all__ = ('Rotabox', )
+__all__ = ('Rotabox', 'collide_all', 'rotabox_at', 'index_rotaboxes',
+           'broad_phase', 'collide_static', 'index_statics', 'cached_check',
+           'coherent_check', 'update_rotaboxes', 'release_bounds',
+           'count_bounds', 'get_store', 'compile_bounds')
 
 from kivy.uix.widget import Widget
 from kivy.uix.image import Image
@@ -292,578 +469,149 @@ from kivy.properties import (NumericProperty, ReferenceListProperty,
                              AliasProperty, ObjectProperty, BooleanProperty,
                              ListProperty, BoundedNumericProperty, partial)
 from math import radians, sin, cos
-import json, sys
-
-if sys.version_info < (3, 0):  # Python 2.x
-    from codecs import open
-    range = xrange
-from future.utils import iteritems, itervalues
+from array import array
+from collections import deque
+from threading import Thread
+import struct, sys
 
 try:
-    from cybounds import define_bounds, resize, aniresize, get_peers, \
-        update_bounds, aniupdate_bounds, point_in_bounds, collide_bounds
-    peers = get_peers()
-except ImportError:
-    import logging
-    logging.log(30,  "[Rotabox     ] cybounds module NOT found. "
-                     "Using internal functions instead.\n")
-
-    from array import array
-    peers = {}
-
-    def scale(points, length, width, height):
-        for h in range(0, length, 2):
-            points[h] = points[h] * width
-            points[h+1] = points[h+1] * height
-
-    def move(points, length, pos0, pos1):
-        for i in range(0, length, 2):
-            points[i] = points[i] + pos0
-            points[i+1] = points[i+1] + pos1
-
-    def rotate(points, length, angle, orig0, orig1):
-        c = cos(angle)
-        s = sin(angle)
-
-        for j in range(0, length, 2):
-            points[j] = points[j] - orig0
-            points[j+1] = points[j+1] - orig1
-            pj = points[j]
-            points[j] = pj * c - points[j+1] * s
-            points[j+1] = pj * s + points[j+1] * c
-            points[j] = points[j] + orig0
-            points[j+1] = points[j+1] + orig1
-
-    def calc_segboxes(points, polids, ptids, plens, length, bbox, blefts, bbotts,
-                      brghts, btops):
-        for k in range(0, length, 2):
-            k1 = k + 1
-            off = plens[polids[k]] * 2 - 2
-            if ptids[k] < plens[polids[k]] - 1:
-                k2 = k1 + 1
-                k3 = k2 + 1
-            else:
-                k2 = k - off
-                k3 = k2 + 1
-
-            blefts[k] = points[k] if points[k] <= points[k2] else points[k2]
-            bbotts[k] = points[k1] if points[k1] <= points[k3] else points[k3]
-            brghts[k] = points[k] if points[k] >= points[k2] else points[k2]
-            btops[k] = points[k1] if points[k1] >= points[k3] else points[k3]
-
-            if blefts[k] < bbox[0]:
-                bbox[0] = blefts[k]
-            if brghts[k] > bbox[2]:
-                bbox[2] = brghts[k]
-            if bbotts[k] < bbox[1]:
-                bbox[1] = bbotts[k]
-            if btops[k] > bbox[3]:
-                bbox[3] = btops[k]
-
-    def calc_polboxes(points, plens, bbox, blefts, bbotts, brghts, btops):
-        strt = 0
-        for p in range(len(plens)):
-            left = float("inf")
-            bottom = float("inf")
-            right = 0.
-            top = 0.
-            for l in range(strt, strt + plens[p] * 2, 2):
-                l1 = l + 1
-
-                if points[l] < left:
-                    left = points[l]
-                if points[l] > right:
-                    right = points[l]
-                if points[l1] < bottom:
-                    bottom = points[l1]
-                if points[l1] > top:
-                    top = points[l1]
-
-            if left < bbox[0]:
-                bbox[0] = left
-            if right > bbox[2]:
-                bbox[2] = right
-            if bottom < bbox[1]:
-                bbox[1] = bottom
-            if top > bbox[3]:
-                bbox[3] = top
-
-            blefts[p] = left
-            bbotts[p] = bottom
-            brghts[p] = right
-            btops[p] = top
-
-            strt = strt + plens[p] * 2
-
-    def intersection_w(pts, ptids, plens, opens, t_box):
-        t_pts = [t_box[0], t_box[1], t_box[2], t_box[1],
-                 t_box[2], t_box[3], t_box[0], t_box[3]]
-        o = 0
-        strt = 0
-        for p in range(len(plens)):
-            if p in opens:
-                o = 2
-            for i in range(strt, strt + plens[p] * 2 - o, 2):
-                i1 = i + 1
-                off = plens[p] * 2 - 2
-                if ptids[i] < plens[p] - 1:
-                    i2 = i1 + 1
-                    i3 = i2 + 1
-                else:
-                    i2 = i - off
-                    i3 = i2 + 1
-                v10 = pts[i]
-                v11 = pts[i1]
-                v20 = pts[i2]
-                v21 = pts[i3]
-
-                for j in range(0, 8, 2):
-                    j1 = j + 1
-                    t_off = 6
-                    if j < 6:
-                        j2 = j1 + 1
-                        j3 = j2 + 1
-                    else:
-                        j2 = j - t_off
-                        j3 = j2 + 1
-                    v30 = t_pts[j]
-                    v31 = t_pts[j1]
-                    v40 = t_pts[j2]
-                    v41 = t_pts[j3]
-                    # Segment intersection detection method:
-                    # If the vertices v1 and v2 are not on opposite sides of the
-                    # segment v3, v4, or the vertices v3 and v4 are not on
-                    # opposite sides of the segment v1, v2, there's no
-                    # intersection.
-                    if (((v40 - v30) * (v11 - v31) -
-                         (v10 - v30) * (v41 - v31) > 0) ==
-                        ((v40 - v30) * (v21 - v31) -
-                         (v20 - v30) * (v41 - v31) > 0)):
-                        continue
-                    elif (((v20 - v10) * (v31 - v11) -
-                           (v30 - v10) * (v21 - v11) > 0) ==
-                          ((v20 - v10) * (v41 - v11) -
-                           (v40 - v10) * (v21 - v11) > 0)):
-                        continue
-
-                    return [p, ptids[i], 0, j/2]
-            strt = strt + plens[p] * 2
-        return False
-
-    def intersection_f(pts, ptids, plens, opens, t_pts, t_polis, t_ptis, t_plens):
-        o = 0
-        strt = 0
-        for p in range(len(plens)):
-            if p in opens:
-                o = 2
-            for i in range(strt, strt + plens[p] * 2 - o, 2):
-                i1 = i + 1
-                off = plens[p] * 2 - 2
-                if ptids[i] < plens[p] - 1:
-                    i2 = i1 + 1
-                    i3 = i2 + 1
-                else:
-                    i2 = i - off
-                    i3 = i2 + 1
-                v10 = pts[i]
-                v11 = pts[i1]
-                v20 = pts[i2]
-                v21 = pts[i3]
-
-                t_strt = 0
-                for t_p in range(len(t_plens)):
-                    for j in range(t_strt, t_strt + t_plens[t_p] * 2, 2):
-                        j1 = j + 1
-                        t_off = t_plens[t_polis[j]] * 2 - 2
-                        if t_ptis[j] < t_plens[t_polis[j]] - 1:
-                            j2 = j1 + 1
-                            j3 = j2 + 1
-                        else:
-                            j2 = j - t_off
-                            j3 = j2 + 1
-                        v30 = t_pts[j]
-                        v31 = t_pts[j1]
-                        v40 = t_pts[j2]
-                        v41 = t_pts[j3]
-                        # Segment intersection detection method:
-                        # If the vertices v1 and v2 are not on opposite sides of
-                        # the segment v3, v4, or the vertices v3 and v4 are not
-                        # on opposite sides of the segment v1, v2, there's no
-                        # intersection.
-                        if (((v40 - v30) * (v11 - v31) -
-                             (v10 - v30) * (v41 - v31) > 0) ==
-                            ((v40 - v30) * (v21 - v31) -
-                             (v20 - v30) * (v41 - v31) > 0)):
-                            continue
-                        elif (((v20 - v10) * (v31 - v11) -
-                               (v30 - v10) * (v21 - v11) > 0) ==
-                              ((v20 - v10) * (v41 - v11) -
-                               (v40 - v10) * (v21 - v11) > 0)):
-                            continue
-
-                        return [p, ptids[i], t_p, t_ptis[j]]
-                    t_strt = t_strt + t_plens[t_p] * 2
-            strt = strt + plens[p] * 2
-        return False
-
-    def intersection(pts, ptids, le, plens, opens, lefts, botts, rghts, tops,
-                     t_box, t_pts, t_ptis, t_le, t_plens, t_opens, t_lefts,
-                     t_botts, t_rghts, t_tops):
-        o = 0
-        t_o = 0
-        strt = 0
-        for p in range(len(plens)):
-            if p in opens:
-                o = 2
-            for i in range(strt, strt + plens[p] * 2 - o, 2):
-                if rghts[i] < t_box[0]:
-                    continue
-                if lefts[i] > t_box[2]:
-                    continue
-                if tops[i] < t_box[1]:
-                    continue
-                if botts[i] > t_box[3]:
-                    continue
-                i1 = i + 1
-                off = plens[p] * 2 - 2
-                if ptids[i] < plens[p] - 1:
-                    i2 = (i1 + 1) % le
-                    i3 = i2 + 1
-                else:
-                    i2 = i - off
-                    i3 = i2 + 1
-                v10 = pts[i]
-                v11 = pts[i1]
-                v20 = pts[i2]
-                v21 = pts[i3]
-
-                t_strt = 0
-                for t_p in range(len(t_plens)):
-                    if t_p in t_opens:
-                        t_o = 2
-                    for j in range(t_strt, t_strt + t_plens[t_p] * 2 - t_o, 2):
-                        if rghts[i] < t_lefts[j]:
-                            continue
-                        if lefts[i] > t_rghts[j]:
-                            continue
-                        if tops[i] < t_botts[j]:
-                            continue
-                        if botts[i] > t_tops[j]:
-                            continue
-                        j1 = j + 1
-                        t_off = t_plens[t_p] * 2 - 2
-                        if t_ptis[j] < t_plens[t_p] - 1:
-                            j2 = (j1+1) % t_le
-                            j3 = j2 + 1
-                        else:
-                            j2 = j - t_off
-                            j3 = j2 + 1
-                        v30 = t_pts[j]
-                        v31 = t_pts[j1]
-                        v40 = t_pts[j2]
-                        v41 = t_pts[j3]
-                        # Segment intersection detection method:
-                        # If the vertices v1 and v2 are not on opposite sides of
-                        # the segment v3, v4, or the vertices v3 and v4 are not
-                        # on opposite sides of the segment v1, v2, there's no
-                        # intersection.
-                        if (((v40 - v30) * (v11 - v31) -
-                             (v10 - v30) * (v41 - v31) > 0) ==
-                            ((v40 - v30) * (v21 - v31) -
-                             (v20 - v30) * (v41 - v31) > 0)):
-                            continue
-                        elif (((v20 - v10) * (v31 - v11) -
-                               (v30 - v10) * (v21 - v11) > 0) ==
-                              ((v20 - v10) * (v41 - v11) -
-                               (v40 - v10) * (v21 - v11) > 0)):
-                            continue
-
-                        return [p, ptids[i], t_p, t_ptis[j]]
-                    t_strt = t_strt + t_plens[t_p] * 2
-            strt = strt + plens[p] * 2
-        return False
-
-    def membership(pts, plens, lefts, botts, rghts, tops,
-                   t_box, t_pts, t_polis, t_le):
-        strt = 0
-        for p, pl in enumerate(plens):
-            # Preliminary 1: pol's bbox vs widget's bbox.
-            if rghts[p] < t_box[0]:
-                strt = strt + pl * 2
-                continue
-            if lefts[p] > t_box[2]:
-                strt = strt + pl * 2
-                continue
-            if tops[p] < t_box[1]:
-                strt = strt + pl * 2
-                continue
-            if botts[p] > t_box[3]:
-                strt = strt + pl * 2
-                continue
-
-            for k in range(0, t_le, 2):
-                x = t_pts[k]
-                y = t_pts[k + 1]
-                # Preliminary 2: pol's bbox vs widget's points to filter out.
-                if rghts[p] < x:
-                    continue
-                if lefts[p] > x:
-                    continue
-                if tops[p] < y:
-                    continue
-                if botts[p] > y:
-                    continue
-                # Point-in-polygon (oddeven) collision detection method:
-                # Checking the membership of each poby assuming a ray at 0 angle
-                # from that poto infinity (through window right) and counting
-                # the number of times that this ray crosses the polygon line.
-                # If this number is odd, the pois inside; if it's even, the pois
-                # outside.
-                c = 0
-                j = strt + pl * 2 - 2
-                for i in range(strt, strt + pl * 2, 2):
-                    x1 = pts[j]
-                    y1 = pts[j+1]
-                    x2 = pts[i]
-                    y2 = pts[i+1]
-                    if (((y2 > y) != (y1 > y))
-                            and x < (x1 - x2) * (y - y2) / (y1 - y2) + x2):
-                        c = not c
-                    j = i
-                if c:
-                    return [p, t_polis[k]]
-            strt = strt + pl * 2
-        return False
-
-    def collide_bounds(rid, wid, frame='bounds', tframe='bounds'):
-
-        try:
-            this_box = peers[rid]['bbox']
-        except KeyError:
-            return False
-
-        try:
-            that_box = peers[wid]['bbox']
-        except TypeError:
-            that_box = wid
-
-        try:
-            if this_box[2] < that_box[0]:
-                return False
-        except IndexError:
-            return False
-        if this_box[0] > that_box[2]:
-            return False
-        if this_box[3] < that_box[1]:
-            return False
-        if this_box[1] > that_box[3]:
-            return False
+    from queue import Queue
+except ImportError:  # Python 2.x
+    from Queue import Queue
 
-        bounds = peers[rid][frame]
-        try:
-            tbounds = peers[wid][tframe]
-        except TypeError:
-            return intersection_w(bounds['points'], bounds['pt_ids'],
-                                  bounds['pol_lens'], bounds['opens'], that_box)
-
-        if peers[rid]['seg']:
-            if peers[wid]['seg']:
-                return intersection(bounds['points'], bounds['pt_ids'],
-                                    bounds['length'], bounds['pol_lens'],
-                                    bounds['opens'], bounds['lefts'],
-                                    bounds['botts'], bounds['rights'],
-                                    bounds['tops'], that_box,
-                                    tbounds['points'], tbounds['pt_ids'],
-                                    tbounds['length'], tbounds['pol_lens'],
-                                    tbounds['opens'], tbounds['lefts'],
-                                    tbounds['botts'], tbounds['rights'],
-                                    tbounds['tops'])
-            else:
-                return intersection_f(bounds['points'], bounds['pt_ids'],
-                                      bounds['pol_lens'], bounds['opens'],
-                                      tbounds['points'], tbounds['pol_ids'],
-                                      tbounds['pt_ids'], tbounds['pol_lens'])
-        else:
-            return membership(bounds['points'], bounds['pol_lens'],
-                              bounds['lefts'], bounds['botts'], bounds['rights'],
-                              bounds['tops'], that_box, tbounds['points'],
-                              tbounds['pol_ids'],
-                              tbounds['length'])
-
-    def point_in_bounds(x, y, rid, frame='bounds'):
-            '''"Oddeven" point-in-polygon method:
-            Checking the membership of touch poby assuming a ray at 0 angle
-            from that poto infinity (through window right) and counting the
-            number of polygon sides that this ray crosses. If this number is
-            odd, the pois inside; if it's even, the pois outside.
-            '''
-            bounds = peers[rid][frame]
-            strt = 0
-            for r, rang in enumerate(bounds['pol_lens']):
-                c = 0
-                j = strt + rang * 2 - 2
-                for i in range(strt, strt + rang * 2, 2):
-                    x1, y1 = bounds['points'][j], bounds['points'][j+1]
-                    x2, y2 = bounds['points'][i], bounds['points'][i+1]
-                    if (((y2 > y) != (y1 > y)) and
-                            x < (x1 - x2) * (y - y2) / (y1 - y2) + x2):
-                        c = not c
-                    j = i
-                if c:
-                    return c
-                strt = strt + rang * 2
-            return False
-
-    def update_bounds(motion, angle, origin, rid, frame='bounds'):
-        '''Updating the elements of the collision detection checks.
-        '''
-        try:
-            bounds = peers[rid][frame]
-        except TypeError:
-            return
-
-        if motion:
-            move(bounds['points'], bounds['length'], motion[0], motion[1])
-
-        if angle:
-            rotate(bounds['points'], bounds['length'], angle, origin[0],
-                   origin[1])
-
-        bbox = array('d', [float("inf"), float("inf"), 0., 0.])
-
-        if peers[rid]['seg']:
-            calc_segboxes(bounds['points'], bounds['pol_ids'], bounds['pt_ids'],
-                          bounds['pol_lens'], bounds['length'], bbox,
-                          bounds['lefts'], bounds['botts'], bounds['rights'],
-                          bounds['tops'])
-        else:
-            calc_polboxes(bounds['points'], bounds['pol_lens'], bbox,
-                          bounds['lefts'], bounds['botts'], bounds['rights'],
-                          bounds['tops'])
-
-        peers[rid]['bbox'] = bbox
-
-    def aniupdate_bounds(motion, pos, angle, origin, rid, frame='bounds'):
-        '''Updating the elements of the collision detection checks,
-        in case of an animation.
-        '''
+if sys.version_info < (3, 0):  # Python 2.x
+    range = xrange
+from future.utils import itervalues
+
+# The collision engine, without Kivy (its module functions are also this
+# module's interface).
+from rotabounds import Body, peers, owners, define_bounds, resize, aniresize, \
+    update_bounds, aniupdate_bounds, transform_bounds, \
+    batch_transform_bounds, point_in_bounds, collide_bounds, \
+    sat_bounds, contact_bounds, release_bounds, get_store, decompose, \
+    define_pieces, define_tiers, define_index, new_rid, retire, reap_rids, \
+    count_bounds, frame_key, narrow_phase, broad_phase, pending, \
+    defer_bounds, flush_bounds, flush_pair, local_map, local_bounds, \
+    cached_check, coherent_check, collide_all, RECT, time_of_impact, \
+    moved_rids, index_rotaboxes, rids_at, bake_bounds, unbake_bounds, \
+    index_statics, collide_static, compile_bounds, load_bounds, read_project, \
+    read_file
+
+
+def update_rotaboxes(widgets):
+    '''Updates the bounds of many Rotaboxes in a single engine call (with
+    NumPy or cybounds; otherwise, one call per widget), e.g. right after
+    moving them in a game loop and before checking their collisions.
+    Only widgets using [absolute_update] are concerned; when their own
+    scheduled update comes, it finds their bounds already in place.
+    '''
+    reap_rids()
+    movers = [widget for widget in widgets
+              if widget.ready and widget.allow_rotabox
+              and widget.absolute_update]
+    rids = [widget.rid for widget in movers]
+    if batch_transform_bounds is None:  # Pure Python engine
+        for widget in movers:
+            transform_bounds(widget.width, widget.height, widget.pos,
+                             radians(widget.angle % 360), widget.origin,
+                             widget.rid, widget.curr_key)
+    else:
+        frames = []
+        sizes = array('d')
+        positions = array('d')
+        angles = array('d')
+        origins = array('d')
+        for widget in movers:
+            frames.append(widget.curr_key)
+            sizes.extend(widget.size)
+            positions.extend(widget.pos)
+            angles.append(radians(widget.angle % 360))
+            origins.extend(widget.origin)
+        batch_transform_bounds(rids, frames, sizes, positions, angles,
+                               origins)
+    moved_rids.update(rids)
+    for rid in rids:
+        pending.pop(rid, None)
+
+
+def swept_body(widget, latest):
+    '''[Rotabox.swept_body] for any widget, a plain one being still.'''
+    try:
+        return widget.swept_body(latest)
+    except AttributeError:
+        pose = (widget.width, widget.height, widget.x, widget.y, 0., 0., 0.)
+        return RECT, False, pose, pose
+
+
+def tree_order(widget):
+    '''A sorting key for widgets, from the topmost (the one drawn last) down.
+    Children come first in their parents' [children], and above their parents.
+    '''
+    path = [float("inf")]
+    parent = widget.parent
+    while parent is not None and parent is not widget:
+        path.append(parent.children.index(widget))
+        widget = parent
+        parent = getattr(widget, 'parent', None)
+    path.reverse()
+    return path
+
+
+def rotabox_at(x, y):
+    '''Returns the topmost Rotabox whose bounds contain the point (x, y), or
+    None. Only the Rotaboxes whose bounding boxes contain the point (found
+    through the hit testing grid, see [rids_at]) go through the exact
+    [collide_point] check.
+    '''
+    hits = []
+    for rid in rids_at(x, y):
+        widget = owners.get(rid)
+        if isinstance(widget, Widget) and widget.collide_point(x, y):
+            hits.append(widget)
+    if hits:
+        return min(hits, key=tree_order)
+
+
+# Bounds files waiting for the loader thread: (filename, width, height, done)
+load_queue = Queue()
+loader = []  # The loader thread, once started.
+# Files read by the loader thread, waiting for the main thread: (done, result)
+loaded = deque()
+
+
+def read_in_background(filename, width, height, done):
+    '''[read_file] on the loader thread. [done](bounds, opens), or
+    [done](None, error), is called on the main thread when it's read, one
+    file per frame (each may redefine a Rotabox's bounds).
+    '''
+    if not loader:
+        thread = Thread(target=run_loader, name='Rotabox loader')
+        thread.daemon = True
+        thread.start()
+        loader.append(thread)
+    load_queue.put((filename, width, height, done))
+
+
+def run_loader():
+    while True:
+        filename, width, height, done = load_queue.get()
         try:
-            bounds = peers[rid][frame]
-        except TypeError:
-            return
-
-        if motion:
-            bounds['mov_pts'][:] = bounds['sca_pts']
-            move(bounds['mov_pts'], bounds['length'], pos[0], pos[1])
-            bounds['points'][:] = bounds['mov_pts']
-
-        if angle:
-            bounds['points'][:] = bounds['mov_pts']
-            rotate(bounds['points'], bounds['length'], angle, origin[0],
-                   origin[1])
+            result = read_file(filename, width, height)
+        except Exception as er:  # Any, for the thread to go on.
+            result = None, er
+        loaded.append((done, result))
+        trigger_install()
 
-        bbox = array('d', [float("inf"), float("inf"), 0., 0.])
 
-        if peers[rid]['seg']:
-            calc_segboxes(bounds['points'], bounds['pol_ids'], bounds['pt_ids'],
-                          bounds['pol_lens'], bounds['length'], bbox,
-                          bounds['lefts'], bounds['botts'], bounds['rights'],
-                          bounds['tops'])
-        else:
-                calc_polboxes(bounds['points'], bounds['pol_lens'], bbox,
-                              bounds['lefts'], bounds['botts'], bounds['rights'],
-                              bounds['tops'])
-
-        peers[rid]['bbox'] = bbox
-
-    def resize(width, height, rid):
-        for k, frame in iteritems(peers[rid]):
-            if k == 'bounds':
-                bounds = peers[rid]['bounds']
-                bounds['points'][:] = bounds['hints']
-                scale(bounds['points'], bounds['length'], width, height)
-                break
-        else:
-            for k, frame in iteritems(peers[rid]):
-                if k != 'bbox' and k != 'vbbox' and k != 'hhits' and k != 'seg' \
-                        and k != 'friendly':
-                    frame['points'][:] = frame['hints']
-                    scale(frame['points'], frame['length'], width, height)
-
-    def aniresize(width, height, rid):
-        for k, frame in iteritems(peers[rid]):
-            if k == 'bounds':
-                bounds = peers[rid]['bounds']
-                bounds['sca_pts'][:] = bounds['hints']
-                scale(bounds['sca_pts'], bounds['length'], width, height)
-                break
-        else:
-            for k, frame in iteritems(peers[rid]):
-                if k != 'bbox' and k != 'seg' and k != '':
-                    frame['sca_pts'][:] = frame['hints']
-                    scale(frame['sca_pts'], frame['length'], width, height)
-
-    def define_frame(frame, opens, seg_mode, bounds, ani=False):
-        for p in range(len(frame)):
-            pol = frame[p]
-            plen = len(pol)
-            array.extend(bounds['pol_lens'], array('i', [plen]))
-            for i in range(plen):
-                array.extend(bounds['hints'], array('d', [pol[i][0], pol[i][1]]))
-                array.extend(bounds['pol_ids'], array('i', [p, p]))
-                array.extend(bounds['pt_ids'], array('i', [i, i]))
-                bounds['length'] += 2
-
-        if seg_mode:
-            length = bounds['length']
-        else:
-            length = len(bounds['pol_lens'])
-        bounds['lefts'] = array('d', [float("inf")] * length)
-        bounds['botts'] = array('d', [float("inf")] * length)
-        bounds['rights'] = array('d', [0.] * length)
-        bounds['tops'] = array('d', [0.] * length)
-
-        if seg_mode:
-            bounds['opens'] = array('i', opens)
-
-        if ani:
-            bounds['mov_pts'][:] = bounds['sca_pts'][:] = bounds['hints']
-        bounds['points'][:] = bounds['hints']
-
-    def define_bounds(custom_bounds, open_bounds, segment_mode, rid, pc):
-        '''Organising the data from the user's [self.custom_bounds] hints.
-        The [pc] parameter is not used. It's here for compatibility with the
-        equivalent function in the cython module.
-        '''
-        frames = {}
-
-        if isinstance(custom_bounds, dict):   # Animation case
-            for key, frame in iteritems(custom_bounds):
-                bounds = {'hints': array('d'), 'sca_pts': array('d'),
-                          'mov_pts': array('d'), 'points': array('d'),
-                          'pol_ids': array('i'), 'pt_ids': array('i'),
-                          'pol_lens': array('i'), 'length': 0}
-                if isinstance(open_bounds, dict):
-                    opens = array('i', open_bounds[key])
-                else:
-                    opens = array('i', open_bounds)
+def install_loaded(*args):
+    if loaded:
+        done, result = loaded.popleft()
+        done(*result)
+    if loaded:
+        trigger_install()
 
-                define_frame(frame, opens, segment_mode, bounds, ani=True)
 
-                frames[key] = bounds
-
-        elif isinstance(custom_bounds, list):  # Single image case
-            bounds = {'hints': array('d'), 'points': array('d'),
-                      'pol_ids': array('i'), 'pt_ids': array('i'),
-                      'pol_lens': array('i'), 'length': 0}
-            define_frame(custom_bounds, open_bounds, segment_mode, bounds)
-
-            frames['bounds'] = bounds
-
-        frames['bbox'] = array('d', [])
-        frames['seg'] = segment_mode
-
-        peers[rid] = frames
+trigger_install = Clock.create_trigger(install_loaded)
 
 
 class Rotabox(Widget):
@@ -949,6 +697,44 @@ class Rotabox(Widget):
     in updating the bounds outweighs the benefit in collision.'''
     pre_check = BooleanProperty(False)
 
+    '''Calculates the bounds on every update from the [custom_bounds] hints and
+    the widget's full size, position and angle, instead of moving and rotating
+    the previous points. Errors don't add up over time, resizing needs no
+    separate pass and an unchanged widget costs nothing to update.'''
+    absolute_update = BooleanProperty(False)
+
+    '''Like [absolute_update], but the bounds are only calculated when needed
+    by a query ([collide_widget], [collide_point], [get_point] etc.). Until
+    then, each update only places the bounding circle, for the bbox.'''
+    lazy_update = BooleanProperty(False)
+
+    '''Decomposes the polygons into convex pieces when the bounds are defined,
+    so that collision checks against other Rotaboxes doing the same use the
+    separating axis test between the pieces: an overlap of areas, in either
+    collision mode.'''
+    convex_pieces = BooleanProperty(False)
+
+    '''Besides the bounding circles, collision checks against other Rotaboxes
+    (or widgets) compare the oriented bounding boxes before the narrow phase.
+    Worth it for long, thin shapes, whose axis-aligned boxes grow large as they
+    rotate.'''
+    obb_check = BooleanProperty(False)
+
+    '''Indexes the sides in hint space when the bounds are defined, so that
+    collision checks against smaller segment mode Rotaboxes map their sides
+    into this one's hint space and check only those in the cells they cross.
+    Meant for large detailed bounds (e.g. terrain) against small moving ones.'''
+    local_index = BooleanProperty(False)
+
+    '''Once laid out, the sides are baked into the shared static index, in
+    world space, and the updates stop until the widget is moved again. Other
+    Rotaboxes are checked against the index in [collide_all], instead of
+    pair by pair: by their crossing sides and, for a membership mode wall,
+    by whether they're wholly inside it (but a membership mode Rotabox wholly
+    containing a static one isn't reported). Meant for level walls and other
+    fixed scenery.'''
+    static = BooleanProperty(False)
+
     # --------------------------------------------------------- TOUCH INTERFACE
     '''Allow touch translation on the X axis.'''
     allow_drag_x = BooleanProperty(False)
@@ -1000,59 +786,71 @@ class Rotabox(Widget):
     # ------------------------------------------------------- UTILITY INTERFACE
     def get_point(self, pol_index, point_index):
         '''Access a point's current position, based on [custom_bounds] structure.'''
+        flush_bounds(self.rid)
         bounds = peers[self.rid][self.curr_key]
         index = (sum(bounds['pol_lens'][:pol_index]) + point_index) * 2
         return list(bounds['points'][index:index + 2])
 
     def read_bounds(self, filename, delayed=False, *args):
         '''
-        Define [custom_bounds] using a rotaboxer's project file.
+        Define [custom_bounds] using a rotaboxer's project file, or a compiled
+        bounds file (.cbounds, see [compile_bounds]).
         To work, [size] should be already defined.
+        A file is read once per modification (and, for a project file, per
+        size); the result is shared by all its readers.
         '''
         if not self.prepared:
             Clock.schedule_once(partial(self.read_bounds, filename, True))
             return self.custom_bounds
         try:
-            with open(filename, 'r', encoding="UTF8") as proj:
-                project = json.load(proj)
-        except (IOError, KeyError) as er:
+            bounds, opens = read_file(filename, self.width, self.height)
+        except (IOError, KeyError, ValueError, struct.error) as er:
             print('On read_bounds: ', er)
         else:
-            bounds = {}
-            opens = []
-            for f, frame in iteritems(project):
-                if f in ('image', 'version'):
-                    continue
-                pols = []
-                i = 0
-                while i < len(frame):
-                    for pol in itervalues(frame):
-                        if pol['number'] == i:
-                            pols.append(pol)
-                            break
-                    i += 1
-                bounds[f] = []
-                for p, pol in enumerate(pols):
-                    try:
-                        if pol['open']:
-                            opens.append(p)
-                    except KeyError:
-                        pass
-                    bounds[f].append([(round(float(point[0]) / self.width, 3),
-                                       round(float(point[1]) / self.height, 3))
-                                      for point in pol['points']])
-            blen = len(bounds)
-            if blen:
-                if opens:
-                    self.open_bounds = opens
-                if blen == 1:
-                    bounds = bounds[list(bounds.keys())[0]]
-                if delayed:
-                    self.custom_bounds = bounds
-                    return
-                return bounds
-            else:
+            bounds = self.unpack_bounds(bounds, opens)
+            if bounds is None:
                 return self.custom_bounds
+            if delayed:
+                self.custom_bounds = bounds
+                return
+            return bounds
+
+    def read_bounds_async(self, filename, *args):
+        '''
+        Define [custom_bounds] using a bounds file (see [read_bounds]), read on
+        a worker thread. The bounds are set on the main thread when ready;
+        until then, the widget keeps its current (by default, rectangular)
+        bounds. If called again before that, only the last file is used.
+        '''
+        if not self.prepared:
+            Clock.schedule_once(partial(self.read_bounds_async, filename))
+            return
+        self.bounds_token = token = object()
+        read_in_background(filename, self.width, self.height,
+                           partial(self.install_bounds, token))
+
+    def install_bounds(self, token, bounds, opens, *args):
+        if token is not self.bounds_token:  # Superseded
+            return
+        self.bounds_token = None
+        if bounds is None:
+            print('On read_bounds: ', opens)
+            return
+        bounds = self.unpack_bounds(bounds, opens)
+        if bounds is not None:
+            self.custom_bounds = bounds
+
+    def unpack_bounds(self, bounds, opens):
+        '''[custom_bounds] from a bounds file's frames (a single frame's
+        polygons, if only one), setting [open_bounds]. None if no frames.
+        '''
+        if not bounds:
+            return None
+        if opens:
+            self.open_bounds = opens
+        if len(bounds) == 1:
+            bounds = bounds[list(bounds.keys())[0]]
+        return bounds
 
     def get_scale(self):
         return float(self.width) / self.original_size[0]
@@ -1136,8 +934,14 @@ class Rotabox(Widget):
         self.last_size = self.size[:]
         self.last_angle = 0
         self.anim = False
-        self.rid = 0
+        self.rid = None
+        self.detached = False
         self.curr_key = 'bounds'
+        self.key_image = None
+        self.bounds_token = None
+        self.pose = self.last_pose = None
+        self.pose_frame = -1
+        self.baked = None
         self.draw_color = Color(0.29, 0.518, 1, 1)
         self.box_color = Color(0.35, 0.15, 0, 1)
         self.draw_lines = ()
@@ -1155,6 +959,12 @@ class Rotabox(Widget):
                   aspect_ratio=self.on_reset,
                   custom_bounds=self.on_reset,
                   allow_rotabox=self.on_reset,
+                  absolute_update=self.on_reset,
+                  lazy_update=self.on_reset,
+                  convex_pieces=self.on_reset,
+                  obb_check=self.on_reset,
+                  local_index=self.on_reset,
+                  static=self.on_reset,
                   draw_bounds=self.on_reset)
 
     def add_widget(self, widget, **kwargs):
@@ -1174,6 +984,43 @@ class Rotabox(Widget):
         self.prepared = False  # This needs to be second
         self.trigger_update()
 
+    def on_parent(self, *args):
+        '''Releases the bounds of a widget removed from the tree, unless it's
+        added back within the frame (e.g. when touched to front).'''
+        if self.parent is None:
+            Clock.schedule_once(self.detach)
+        elif self.detached:
+            self.detached = False
+            self.on_reset()
+
+    def detach(self, *args):
+        if self.parent is None and self.rid is not None:
+            retire(self.rid)
+            self.rid = None
+            self.detached = True
+            self.ready = False
+            self.prepared = False
+
+    def on_image(self, *args):
+        if self.prepared and self.anim:
+            self.follow_image()
+
+    def follow_image(self):
+        '''Binding the current frame's key to [image]'s source.'''
+        if self.key_image is not None:
+            self.key_image.unbind(source=self.update_key)
+        self.key_image = self.image
+        self.image.bind(source=self.update_key)
+        self.update_key()
+
+    def update_key(self, *args):
+        '''The current frame's key in the animated bounds (e.g. 'coin_3' for
+        'atlas://coins/coin_3'), found once per source change instead of on
+        every update. An identically keyed atlas file is assumed.
+        '''
+        if self.anim:
+            self.curr_key = self.image.source.split('/')[-1]
+
     def on_open_bounds(self, *args):
         if self.open_bounds and not self.segment_mode:
             raise Exception('Open bounds are only applicable in Segment mode.')
@@ -1242,19 +1089,29 @@ class Rotabox(Widget):
 
         if self.allow_rotabox:
             # Generating a unique key for each instance
-            try:
-                self.rid = sorted(peers.keys())[-1] + 1
-            except IndexError:
-                pass
+            if self.rid is None:
+                self.rid = new_rid(self)
             if isinstance(self.custom_bounds, dict):
-                self.curr_key = self.image.source.split('/')[-1]
                 self.anim = True
+                self.follow_image()
             # Building widget's bounds.
             define_bounds(self.custom_bounds, self.open_bounds,
                           self.segment_mode, self.rid, self.pre_check)
+            if self.convex_pieces:
+                define_pieces(self.rid, self.custom_bounds)
+            define_tiers(self.rid, self.obb_check)
+            if self.local_index:
+                define_index(self.rid)
+            unbake_bounds(self.rid)
+            self.baked = None
+            owners[self.rid] = self
+            moved_rids.add(self.rid)
             # Setting up canvas and triggers for test drawing
             if self.draw_bounds:
                 self.set_draw()
+        elif self.rid is not None:
+            retire(self.rid)
+            self.rid = None
 
         self.trigger_update()
 
@@ -1275,7 +1132,9 @@ class Rotabox(Widget):
                 # the resizing from pivot.
                 self.pivot = (self.pivot_x - dw * .5, self.pivot_y - dh * .5)
 
-        if self.allow_rotabox:
+        # (Absolute updates scale the hints themselves.)
+        if self.allow_rotabox and not (self.absolute_update or self.lazy_update
+                                       or self.static):
             # Scaling widget's bounds
             if not self.anim:
                 resize(self.width, self.height, self.rid)
@@ -1303,6 +1162,12 @@ class Rotabox(Widget):
             self.angle %= 360
             angle = self.angle
             pos = self.pos
+            if self.static:
+                # Baked where it is (see [bake_bounds]).
+                baked = (self.width, self.height, pos[0], pos[1], angle,
+                         self.origin[0], self.origin[1], self.curr_key)
+                if baked == self.baked:
+                    return
 
             # Updating the rotation instruction, in canvas.before
             self.rotation.origin = self.origin
@@ -1322,15 +1187,40 @@ class Rotabox(Widget):
                 angle_diff = 0
             self.last_angle = angle
 
+            # The last two poses, for [collide_swept]. Only the first update
+            # in a frame moves the last one (e.g. [set_origin] updates too).
+            if self.pose_frame != Clock.frames:
+                self.last_pose = self.pose
+                self.pose_frame = Clock.frames
+            self.pose = (self.width, self.height, pos[0], pos[1],
+                         radians(angle), self.origin[0], self.origin[1])
+
             if not self.allow:
                 self.allow = 1
                 return
 
             if self.allow_rotabox:
+                moved_rids.add(self.rid)
+                if self.static:
+                    transform_bounds(self.width, self.height, pos,
+                                     radians(angle), self.origin, self.rid,
+                                     self.curr_key)
+                    bake_bounds(self.rid, self.curr_key)
+                    self.baked = baked
+                    return
                 # Updating the custom bounds
+                if self.absolute_update or self.lazy_update:
+                    if self.lazy_update:
+                        defer_bounds(self.width, self.height, pos,
+                                     radians(angle), self.origin, self.rid,
+                                     self.curr_key)
+                    else:
+                        transform_bounds(self.width, self.height, pos,
+                                         radians(angle), self.origin, self.rid,
+                                         self.curr_key)
+                    return
+
                 if self.anim:
-                    # An identically keyed atlas file is assumed.
-                    self.curr_key = self.image.source.split('/')[-1]
                     aniupdate_bounds(True, pos, radians(angle),
                                      self.origin, self.rid, self.curr_key)
                     return
@@ -1339,32 +1229,100 @@ class Rotabox(Widget):
                     update_bounds(motion, radians(angle_diff), self.origin,
                                   self.rid, self.curr_key)
         elif not self.prepared:
+            if self.detached:  # Removed from the tree; bounds released.
+                return
             self.prepare()
             self.prepared = True
         else:
             self.update_size()
+            if self.allow_rotabox:
+                moved_rids.add(self.rid)
             self.ready = True
 
     def collide_point(self, x=0, y=0):
         if self.allow_rotabox:
-            return point_in_bounds(x, y, self.rid, frame=self.curr_key)
+            flush_bounds(self.rid)
+            try:
+                return point_in_bounds(x, y, self.rid, frame=self.curr_key)
+            except KeyError:  # Not prepared (yet) or removed.
+                return False
         else:
             return super(Rotabox, self).collide_point(x, y)
 
     def collide_widget(self, wid):
+        try:
+            check = narrow_phase(self.rid, wid.rid)
+        except AttributeError:  # Not a Rotabox
+            check = None
+        if pending:
+            if check is None:
+                flush_bounds(self.rid)
+            elif not flush_pair(self.rid, wid.rid, check is local_bounds):
+                return False
+        try:
+            if check is not None:
+                return cached_check(check, self.rid, wid.rid, self.curr_key,
+                                    wid.curr_key)
+            if self.segment_mode:
+                return collide_bounds(self.rid,
+                                      [wid.x, wid.y, wid.right, wid.top],
+                                      frame=self.curr_key)
+            return super(Rotabox, self).collide_widget(wid)
+        except KeyError:
+            return False
+
+    def collide_contact(self, wid):
+        '''
+        [collide_widget], returning the contact manifold of a collision with
+        [wid] as [points, normal, depth] (see [contact_bounds]), or False.
+        A non-Rotabox widget counts as a rectangle.
+        '''
+        if pending:
+            try:
+                if not flush_pair(self.rid, wid.rid):
+                    return False
+            except AttributeError:
+                flush_bounds(self.rid)
         try:
             try:
-                return collide_bounds(self.rid, wid.rid, frame=self.curr_key,
-                                      tframe=wid.curr_key)
+                return cached_check(contact_bounds, self.rid, wid.rid,
+                                    self.curr_key, wid.curr_key)
             except AttributeError:
-                if self.segment_mode:
-                    return collide_bounds(self.rid,
-                                          [wid.x, wid.y, wid.right, wid.top],
-                                          frame=self.curr_key)
-                return super(Rotabox, self).collide_widget(wid)
+                return contact_bounds(self.rid,
+                                      [wid.x, wid.y, wid.right, wid.top],
+                                      frame=self.curr_key)
         except KeyError:
             return False
 
+    def collide_swept(self, wid):
+        '''
+        Continuous collision check with [wid], over both widgets' motion in
+        their last updates (a widget not updated in the latest frame of the
+        two counts as still): the earliest time of impact, from 0 (at the
+        previous poses) to 1 (at the current ones), and the sides in contact,
+        as (t, side, wside), or None. Sides are given as [pol_index,
+        point_index] of their first point, as in [collide_widget].
+        '''
+        latest = max(self.pose_frame, getattr(wid, 'pose_frame', -1))
+        try:
+            return time_of_impact(*(self.swept_body(latest)
+                                    + swept_body(wid, latest)))
+        except KeyError:
+            return None
+
+    def swept_body(self, latest):
+        '''(frame, segment mode, last pose, pose) for [time_of_impact].'''
+        pose = self.pose or (self.width, self.height, self.x, self.y,
+                             radians(self.angle), self.origin[0],
+                             self.origin[1])
+        last_pose = self.last_pose
+        if last_pose is None or self.pose_frame != latest:
+            last_pose = pose
+        if self.allow_rotabox and self.rid is not None:
+            return (peers[self.rid][self.curr_key], peers[self.rid]['seg'],
+                    last_pose, pose)
+        return RECT, False, last_pose, pose
+
     # ----------------------------------- TOUCH HANDLING (altered Scatter code)
     def on_touch_down(self, touch):
         x, y = touch.x, touch.y
@@ -1623,6 +1581,7 @@ class Rotabox(Widget):
         For testing.
         '''
         if self.ready:
+            flush_bounds(self.rid)
             try:
                 bounds = peers[self.rid][self.curr_key]
             except KeyError:
@@ -0,0 +1,684 @@
+import gc
+import json
+import os
+import subprocess
+import sys
+from array import array
+from math import radians, atan2, pi
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rotabounds
+from rotabounds import Body, collide_all, collide_static, index_statics, \
+    compile_bounds, load_bounds, read_project, read_file, peers, \
+    time_of_impact, sat_bounds, collide_bounds, decompose, cached_check, \
+    local_bounds, batch_transform_bounds, transform_bounds, broad_phase, \
+    coherent_check, update_bounds, get_store, count_bounds, rids_at, \
+    aniresize, aniupdate_bounds, frame_key, contact_bounds, RECT
+
+
+@pytest.fixture
+def body():
+    '''Makes Bodies (with Body's arguments) and releases them after the
+    test.
+    '''
+    made = []
+
+    def make(*args, **kwargs):
+        made.append(Body(*args, **kwargs))
+        return made[-1]
+
+    yield make
+    for each in made:
+        each.release()
+
+
+def test_broad_phase(body):
+    a = body(size=(50, 50), pos=(0, 0))
+    b = body(size=(50, 50), pos=(40, 40))
+    apart_x = body(size=(50, 50), pos=(200, 0))
+    apart_y = body(size=(50, 50), pos=(10, 200))
+    rids = [a.rid, b.rid, apart_x.rid, apart_y.rid]
+    assert [set(pair) for pair in broad_phase(rids)] == [set([a.rid, b.rid])]
+    assert broad_phase([a.rid, apart_x.rid, apart_y.rid]) == []
+
+
+def test_collide_all(body):
+    a = body(size=(50, 50), pos=(0, 0))
+    b = body(size=(50, 50), pos=(40, 40))
+    near = body(size=(50, 50), pos=(55, -45), angle=45)  # Boxes overlap
+    outer = body(segment_mode=False, size=(100, 100), pos=(300, 0))
+    inner = body(size=(10, 10), pos=(340, 40))
+    rids = [a.rid, b.rid, near.rid, outer.rid, inner.rid]
+    assert set([a.rid, near.rid]) in [set(pair) for pair in broad_phase(rids)]
+    hits = dict(((rid, wid), result) for rid, wid, result
+                in collide_all(rids))
+    pair = (a.rid, b.rid) if (a.rid, b.rid) in hits else (b.rid, a.rid)
+    assert hits[pair] == collide_bounds(*pair)
+    # Only the membership mode side detects the inner one.
+    assert (outer.rid, inner.rid) in hits
+    assert len(hits) == 2
+    assert a.collide(b) and not a.collide(near)
+
+
+def test_static_membership_mode(body):
+    wall = body(segment_mode=False, size=(100, 20), pos=(0, 0), static=True)
+    mover = body(segment_mode=False, size=(20, 20), pos=(40, 10))
+    seg = body(size=(20, 20), pos=(90, -10))
+    away = body(segment_mode=False, size=(20, 20), pos=(300, 300))
+    assert wall.rid in rotabounds.static_segs
+    assert [wid for wid, result in collide_static(mover.rid)] == [wall.rid]
+    assert [wid for wid, result in collide_static(seg.rid)] == [wall.rid]
+    assert collide_static(away.rid) == []
+    hits = set((rid, wid) for rid, wid, result in collide_all())
+    assert (mover.rid, wall.rid) in hits
+    assert (seg.rid, wall.rid) in hits
+    assert not any(away.rid in pair for pair in hits)
+    rid = wall.rid
+    wall.release()
+    assert rid not in rotabounds.static_segs
+
+
+def test_static_cell_size(body):
+    big = body(size=(5000, 5000), pos=(-2500, -2500), static=True)
+    walls = [body(size=(10, 10), pos=(i * 20, 0), static=True)
+             for i in range(200)]
+    mover = body(size=(10, 10), pos=(205, 5))
+    try:
+        assert rotabounds.static_cell[0] < 100
+        assert [wid for wid, result in collide_static(mover.rid)] == [
+            walls[10].rid]
+        index_statics(50.)
+        assert rotabounds.static_cell[0] == 50.
+        walls.append(body(size=(10, 10), pos=(0, 100), static=True))
+        assert rotabounds.static_cell[0] == 50.
+        assert [wid for wid, result in collide_static(mover.rid)] == [
+            walls[10].rid]
+    finally:
+        index_statics()
+
+
+def test_local_index_membership_mode(body):
+    terrain = body(segment_mode=False, size=(100, 20), local_index=True)
+    mover = body(size=(20, 20), pos=(40, 10))
+    assert 'local_grid' not in rotabounds.peers[terrain.rid]['bounds']
+    assert mover.collide(terrain)
+    assert terrain.collide(mover)
+
+
+def test_compiled_bounds(body, tmpdir):
+    project = {'image': 'x.png', 'version': '0.13.0', 'img': {
+        '0': {'number': 0, 'points': [[10, 20], [30, 45], [50, 60], [7, 8]]},
+        '1': {'number': 1, 'open': True, 'points': [[1, 2], [3, 4], [5, 6]]}}}
+    filename = str(tmpdir.join('x.bounds'))
+    with open(filename, 'w') as proj:
+        json.dump(project, proj)
+    bounds, opens = load_bounds(compile_bounds(filename, size=(70, 90)))
+    j_bounds, j_opens = read_project(filename, 70, 90)
+    assert opens == j_opens == [1]
+    assert list(bounds['img']) == j_bounds['img']
+    compiled = body(bounds['img'], opens, size=(70, 90), angle=30)
+    parsed = body(j_bounds['img'], j_opens, size=(70, 90), angle=30)
+    for key in ('hints', 'points', 'pol_lens', 'pol_ids', 'pt_ids'):
+        assert (list(peers[compiled.rid]['bounds'][key])
+                == list(peers[parsed.rid]['bounds'][key]))
+
+
+def test_compiled_bounds_rescaled(tmpdir):
+    project = {'image': 'x.png', 'version': '0.13.0', 'img': {
+        '0': {'number': 0, 'points': [[10, 20], [30, 45], [50, 60], [7, 8]]}}}
+    filename = str(tmpdir.join('x.bounds'))
+    with open(filename, 'w') as proj:
+        json.dump(project, proj)
+    target = compile_bounds(filename, size=(70, 90))
+    same, opens = read_file(target, 70, 90)
+    assert same['img'] is load_bounds(target)[0]['img']
+    bounds, opens = read_file(target, 140, 45)
+    assert bounds['img'].size == (140., 45.)
+    for point, j_point in zip(bounds['img'][0],
+                              read_project(filename, 140, 45)[0]['img'][0]):
+        assert abs(point[0] - j_point[0]) < 1e-3
+        assert abs(point[1] - j_point[1]) < 2e-3
+    assert read_file(target, 140, 45)[0] is bounds
+
+
+def test_time_of_impact_sides(body):
+    bullet = [[(0, 0), (1, 0), (1, 1), (0, 1)], [(2, 2), (3, 2), (3, 3)]]
+    bounds = peers[body(bullet).rid]['bounds']
+    wall = (5., 100., 150., 0., 0., 152.5, 50.)
+    t, side, wside = time_of_impact(
+        bounds, True, (10., 10., 0., 45., 0., 5., 50.),
+        (10., 10., 300., 45., 0., 305., 50.), RECT, False, wall, wall)
+    assert abs(t - .4) < 1e-9  # The triangle's right side
+    assert side == [1, 1]
+    assert wside == [0, 3]
+
+
+def test_convex_pieces_fallback(body):
+    bow = [(0, 0), (1, 1), (1, 0), (0, 1)]
+    assert decompose(bow) is None
+    tie = body([bow], size=(100, 100), convex_pieces=True)
+    inside = body(size=(10, 10), pos=(45, 20), convex_pieces=True)
+    across = body(size=(10, 10), pos=(95, 45), convex_pieces=True)
+    assert peers[tie.rid]['bounds']['piece_lens'] is None
+    assert 'piece_axes' in peers[inside.rid]['bounds']
+    for box in (inside, across):
+        assert (bool(sat_bounds(tie.rid, box.rid))
+                == bool(collide_bounds(tie.rid, box.rid)))
+    assert not sat_bounds(tie.rid, inside.rid)
+    assert sat_bounds(tie.rid, across.rid)
+
+
+def test_cached_check_lazy_update(body):
+    calls = []
+
+    def check(rid, wid, frame, tframe):
+        calls.append(rid)
+        return local_bounds(rid, wid, frame, tframe)
+
+    a = body(size=(100, 100), lazy_update=True, local_index=True)
+    b = body(size=(20, 20), pos=(90, 40), lazy_update=True)
+    a.set_transform(angle=10)
+    b.set_transform(pos=(91, 40))
+    first = cached_check(check, a.rid, b.rid)
+    assert first
+    assert cached_check(check, a.rid, b.rid) == first
+    assert len(calls) == 1
+    assert a.rid in rotabounds.pending
+    b.set_transform(pos=(300, 40))
+    assert not cached_check(check, a.rid, b.rid)
+    assert len(calls) == 2
+
+
+@pytest.mark.skipif(batch_transform_bounds is None,
+                    reason='No batch version in the pure Python engine')
+def test_batch_transform_bounds(body):
+    shape = [[(0, 0), (1, .2), (.8, 1), (.1, .7)], [(.3, .3), (.6, .3),
+                                                    (.5, .5)]]
+    rids = [body(shape, size=(20, 30), segment_mode=bool(i % 2)).rid
+            for i in range(6)]
+    sizes = array('d', [20, 30] * 6)
+    positions = array('d', [i * 5. for i in range(12)])
+    angles = array('d', [i * .3 for i in range(6)])
+    origins = array('d', [i * 5. + 3 for i in range(12)])
+    batch_transform_bounds(rids, ['bounds'] * 6, sizes, positions, angles,
+                           origins)
+    batched = [(list(peers[rid]['bounds']['points']),
+                list(peers[rid]['bbox'])) for rid in rids]
+    for n, rid in enumerate(rids):
+        peers[rid]['bounds']['state'] = None
+        transform_bounds(20, 30, positions[n * 2:n * 2 + 2], angles[n],
+                         origins[n * 2:n * 2 + 2], rid)
+        points = list(peers[rid]['bounds']['points'])
+        assert points == pytest.approx(batched[n][0])
+        assert list(peers[rid]['bbox']) == pytest.approx(batched[n][1])
+
+
+def test_cached_check_pose_restored(body):
+    a = body(size=(100, 100), lazy_update=True, local_index=True)
+    b = body(size=(20, 20), pos=(40, 40))  # Inside, no sides crossing
+    a.collide_point(0, 0)  # Placed at its first pose.
+    assert not a.collide(b)
+    a.set_transform(pos=(50, 0))
+    assert a.collide(b) == [0, 3, 0, 0]
+    a.set_transform(pos=(0, 0))  # Back before the deferred pose ran
+    assert a.rid not in rotabounds.pending
+    assert not a.collide(b)
+    assert not collide_bounds(a.rid, b.rid)
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    '''collide_bounds, counting its calls (in [counted.calls]).'''
+    check = rotabounds.collide_bounds
+
+    def counted(rid, wid, frame='bounds', tframe='bounds'):
+        counted.calls += 1
+        return check(rid, wid, frame, tframe)
+
+    counted.calls = 0
+    monkeypatch.setattr(rotabounds, 'collide_bounds', counted)
+    return counted
+
+
+def test_witness_hit(body, counted):
+    a = body(size=(100, 100))
+    b = body(size=(20, 20), pos=(90, 40))
+    hit = coherent_check(counted, a.rid, b.rid)
+    assert hit and counted.calls == 1
+    b.set_transform(pos=(91, 41))  # The same sides still cross.
+    assert coherent_check(counted, a.rid, b.rid) == hit
+    assert counted.calls == 1
+    b.set_transform(pos=(40, 90))  # Other sides
+    assert coherent_check(counted, a.rid, b.rid) == collide_bounds(a.rid,
+                                                                   b.rid)
+    assert counted.calls == 2
+
+
+def test_witness_miss(body, counted):
+    a = body(size=(50, 50))
+    b = body(size=(50, 50), pos=(55, -45), angle=45)  # The boxes overlap.
+    assert not coherent_check(counted, a.rid, b.rid)
+    assert len(rotabounds.witnesses[(a.rid, 'bounds', b.rid,
+                                     'bounds')][2]) == 2  # An axis
+    b.set_transform(pos=(56, -46))
+    assert not coherent_check(counted, a.rid, b.rid)
+    assert counted.calls == 1
+    b.set_transform(pos=(35, -25))  # Crossing the axis
+    assert coherent_check(counted, a.rid, b.rid)
+    assert counted.calls == 2
+
+
+def test_witness_dropped(body, counted):
+    a = body(size=(100, 100))
+    b = body(size=(20, 20), pos=(90, 40))
+    key = (a.rid, 'bounds', b.rid, 'bounds')
+    assert coherent_check(counted, a.rid, b.rid)
+    assert key in rotabounds.witnesses
+    rotabounds.define_bounds([[(0, 0), (1, 0), (1, 1)]], [], True, a.rid,
+                             False)
+    a.set_transform()
+    assert coherent_check(counted, a.rid, b.rid) == collide_bounds(a.rid,
+                                                                   b.rid)
+    assert counted.calls == 2  # Not answered by the old definition's sides
+    assert key in rotabounds.witnesses
+    a.release()
+    assert key not in rotabounds.witnesses
+    assert not any(key in keys for keys in rotabounds.witnessed.values())
+
+
+def test_witness_pose_restored(body):
+    a = body(size=(100, 100), lazy_update=True)
+    b = body(size=(20, 20), pos=(40, 40))
+    a.collide_point(0, 0)
+    assert not coherent_check(collide_bounds, a.rid, b.rid)
+    a.set_transform(pos=(50, 0))
+    assert a.collide(b)
+    a.set_transform(pos=(0, 0))
+    assert not a.collide(b)
+    assert not coherent_check(collide_bounds, a.rid, b.rid)
+
+
+def comb(teeth):
+    '''A comb's outline, with its teeth pointing up.'''
+    width = 1. / teeth
+    pol = [(0, 0), (1, 0)]
+    for t in range(teeth - 1, -1, -1):
+        pol.extend([((t + .8) * width, .2), ((t + .8) * width, 1),
+                    ((t + .2) * width, 1), ((t + .2) * width, .2)])
+    return [pol]
+
+
+def test_static_membership_contains(body):
+    ell = [[(0, 0), (1, 0), (1, .5), (.5, .5), (.5, 1), (0, 1)]]
+    wall = body(ell, segment_mode=False, size=(200, 200), static=True)
+    inner = body(size=(10, 10), pos=(20, 20))
+    member = body(segment_mode=False, size=(10, 10), pos=(150, 50))
+    notch = body(size=(10, 10), pos=(150, 150))  # Only in the wall's box
+    assert [wid for wid, result in collide_static(inner.rid)] == [wall.rid]
+    assert [wid for wid, result in collide_static(member.rid)] == [wall.rid]
+    assert collide_static(notch.rid) == []
+    hits = collide_all([wall.rid, inner.rid, member.rid, notch.rid])
+    assert sorted(hits) == sorted(
+        [[wall.rid, inner.rid, collide_bounds(wall.rid, inner.rid)],
+         [wall.rid, member.rid, collide_bounds(wall.rid, member.rid)]])
+    for each in (inner, member):
+        assert wall.collide(each)
+    assert not wall.collide(notch)
+
+
+def test_open_then_closed_polygon(body):
+    # Only the triangle's closing side crosses the small boxes.
+    shape = [[(0, 0), (.4, 0), (.4, .4), (0, .4)],
+             [(.6, .1), (.9, .1), (.9, .4)]]
+    bounds = body(shape, [0], size=(100, 100))
+    for kwargs in ({}, {'segment_mode': False}):
+        assert bounds.collide(body(size=(2, 2), pos=(74, 24), **kwargs))
+    assert bounds.collide([74, 24, 76, 26])
+    assert not bounds.collide(body(size=(2, 2), pos=(-1, 19)))  # Open side
+
+
+def test_transform_bounds(body):
+    a = body(size=(20, 10), pos=(5, 5))
+    for step in range(360):  # Drifting, step by step
+        update_bounds(None, radians(1), (15, 10), a.rid)
+    transform_bounds(20, 10, (5, 5), radians(90), (15, 10), a.rid)
+    assert list(peers[a.rid]['bounds']['points']) == pytest.approx(
+        [20, 0, 20, 20, 10, 20, 10, 0])
+    assert list(peers[a.rid]['bbox']) == pytest.approx([10, 0, 20, 20])
+    version = rotabounds.versions[a.rid]
+    transform_bounds(20, 10, (5, 5), radians(90), (15, 10), a.rid)
+    assert rotabounds.versions[a.rid] == version  # Already in place
+
+
+def test_store_runs_reused(body):
+    shape = [[(0, 0), (1, 0), (.5, 1)]]
+    store, slots = get_store()
+    a = body(shape, size=(30, 30))
+    runs = list(slots[a.rid])
+    points = peers[a.rid]['bounds']['points']
+    assert len(points) == 6
+    assert runs[0][0] == 'd'
+    a.release()
+    b = body(shape, size=(30, 30), pos=(10, 0))
+    assert list(slots[b.rid]) == runs  # The released run, reused
+    assert list(peers[b.rid]['bounds']['points']) == [10, 0, 40, 0, 25, 30]
+
+
+def test_rids_reused(body):
+    count = count_bounds()
+    a = body()
+    rid = a.rid
+    assert count_bounds() == count + 1
+    a.release()
+    assert count_bounds() == count
+    assert rid not in peers
+    assert body().rid == rid
+    dropped = Body()
+    rid = dropped.rid
+    del dropped
+    gc.collect()
+    assert rid in peers  # Until the next query
+    collide_all([])
+    assert rid not in peers
+    assert rid in rotabounds.free_rids
+
+
+def cyclic(*args, **kwargs):
+    '''A Body that only the cyclic garbage collector frees.'''
+    made = Body(*args, **kwargs)
+    made.cycle = made
+    return made
+
+
+def test_collected_while_querying(body, monkeypatch):
+    dropped = [cyclic(size=(10, 10), pos=(i * 20, 0)) for i in range(20)]
+    dropped.append(cyclic(segment_mode=False, size=(500, 500),
+                          pos=(-100, -100), static=True))
+    rids = [each.rid for each in dropped]
+    mover = body(size=(10, 10), pos=(5, 5))
+    for each in dropped:
+        each.set_transform(pos=(each.pos[0], each.pos[1] + 1))
+    del each
+
+    def collecting(function):
+        def run(*args):
+            del dropped[:]
+            gc.collect()
+            return function(*args)
+        monkeypatch.setattr(rotabounds, function.__name__, run)
+
+    collecting(rotabounds.index_box)  # Called while looping over moved rids
+    assert mover.rid in rids_at(10, 10)
+    assert not dropped and all(rid in peers for rid in rids)
+    rids_at(10, 10)
+    assert not any(rid in peers for rid in rids)
+
+    dropped = [cyclic(segment_mode=False, size=(500, 500), pos=(-100, -100),
+                      static=True) for i in range(3)]
+    rids = [each.rid for each in dropped]
+    collecting(rotabounds.collide_bounds)  # Called over the static walls
+    assert collide_all([mover.rid] + rids)
+    assert all(rid in peers for rid in rids)
+    collide_all([])
+    assert not any(rid in peers for rid in rids)
+
+
+def test_rids_at(body):
+    a = body(size=(50, 50))
+    b = body(size=(50, 50), pos=(30, 30), angle=45)
+    ours = set([a.rid, b.rid])
+    assert ours.intersection(rids_at(40, 40)) == ours
+    assert ours.intersection(rids_at(10, 10)) == set([a.rid])
+    b.set_transform(pos=(300, 300))  # Indexed again by the next query
+    assert ours.intersection(rids_at(40, 40)) == set([a.rid])
+    assert ours.intersection(rids_at(320, 320)) == set([b.rid])
+    a.release()
+    assert not ours.intersection(rids_at(10, 10))
+
+
+def test_point_in_bounds(body):
+    shape = [[(0, 0), (.4, 0), (.4, 1), (0, 1)],
+             [(.6, 0), (1, 0), (.8, 1)]]
+    for mode in (True, False):
+        a = body(shape, segment_mode=mode, size=(100, 100))
+        assert a.collide_point(20, 50)
+        assert a.collide_point(80, 50)
+        assert not a.collide_point(50, 50)  # Between the polygons' boxes
+        assert not a.collide_point(95, 90)  # In the triangle's box only
+        assert not a.collide_point(150, 50)  # Out of the bbox
+
+
+def test_sat_bounds(body):
+    ell = [[(0, 0), (1, 0), (1, .4), (.4, .4), (.4, 1), (0, 1)]]
+    a = body(ell, segment_mode=False, size=(100, 100), convex_pieces=True)
+    b = body(segment_mode=False, size=(10, 10), convex_pieces=True)
+    assert len(peers[a.rid]['bounds']['piece_lens']) > 1
+    hits = set()
+    for y in (15, 65):
+        for x in range(-18, 120, 5):  # Not touching, where SAT would count it
+            for angle in (0, 30):
+                b.set_transform(pos=(x, y), angle=angle)
+                hit = bool(collide_bounds(a.rid, b.rid)
+                           or collide_bounds(b.rid, a.rid))  # Mutual
+                assert bool(sat_bounds(a.rid, b.rid)) == hit
+                assert bool(sat_bounds(b.rid, a.rid)) == hit
+                hits.add(hit)
+    assert hits == set([True, False])
+    b.set_transform(pos=(55, 55))  # In the notch
+    assert not sat_bounds(a.rid, b.rid)
+
+
+def test_sat_fallback_checks_both_ways(body):
+    # The bowtie doesn't decompose, so the pair falls back to membership.
+    shape = [[(0, 0), (1, .5), (0, 1)], [(0, 0), (.2, .2), (.2, 0), (0, .2)]]
+    arrow = body(shape, size=(100, 100), segment_mode=False,
+                 convex_pieces=True)
+    target = body(size=(100, 100), pos=(80, 0), segment_mode=False,
+                  convex_pieces=True)
+    assert peers[target.rid]['bounds']['piece_lens'] is not None
+    assert peers[arrow.rid]['bounds']['piece_lens'] is None
+    # Only the arrow's tip is inside the target.
+    assert collide_all([arrow.rid, target.rid]) == [
+        [target.rid, arrow.rid, [0, 0]]]
+
+
+def test_tiers(body):
+    bar = [[(0, .45), (1, .45), (1, .55), (0, .55)]]
+    plain = body(bar, size=(100, 100), angle=45)
+    boxed = body(bar, size=(100, 100), angle=45, obb_check=True)
+    assert not peers[plain.rid]['bounds']['tiers'][13]
+    assert peers[boxed.rid]['bounds']['tiers'][13]
+    hits = set()
+    for n in range(-6, 7):
+        others = [body(bar, size=(100, 100), pos=(n * 4, -n * 4), angle=45,
+                       obb_check=obb) for obb in (False, True)]
+        for this in (plain, boxed):
+            for that in others:
+                hit = bool(collide_bounds(this.rid, that.rid))
+                assert hit == (abs(n) < 2)  # Parallel, 5.66 apart per step
+                hits.add(hit)
+    assert hits == set([True, False])
+
+
+def test_lazy_update(body):
+    a = body(size=(40, 20), lazy_update=True)
+    a.collide_point(0, 0)
+    points = list(peers[a.rid]['bounds']['points'])
+    a.set_transform(pos=(100, 100), angle=90)
+    assert a.rid in rotabounds.pending
+    assert list(peers[a.rid]['bounds']['points']) == points  # Not yet
+    box = list(peers[a.rid]['bbox'])  # The bounding circle's
+    assert box == pytest.approx([120 - 500 ** .5, 110 - 500 ** .5,
+                                 120 + 500 ** .5, 110 + 500 ** .5])
+    version = rotabounds.versions[a.rid]
+    assert a.collide_point(120, 125)
+    assert not a.collide_point(135, 110)
+    assert a.rid not in rotabounds.pending
+    assert list(peers[a.rid]['bbox']) == pytest.approx([110, 90, 130, 130])
+    assert rotabounds.versions[a.rid] == version
+
+
+def test_lazy_update_radius(body):
+    a = body(size=(40, 20), lazy_update=True)
+    tiers = peers[a.rid]['bounds']['tiers']
+    a.set_transform(pos=(10, 0))
+    assert tiers[2] == pytest.approx(500 ** .5)
+    tiers[3] *= 1 + 1e-12  # As the anchor points give it, rotated
+    tiers[2] = 30.
+    a.set_transform(pos=(20, 0))
+    assert tiers[2] == 30.  # The same scale, to rounding
+    a.set_transform(size=(80, 60))
+    assert tiers[2] == pytest.approx(50.)
+    assert list(tiers[3:5]) == [80., 60.]
+
+
+def test_animated_frames(body):
+    frames = {'a': [[(0, 0), (1, 0), (1, 1), (0, 1)]],
+              'b': [[(0, 0), (1, 0), (.5, 1)]]}
+    rid = body(frames, size=(20, 20)).rid
+    aniresize(20, 20, rid)
+    aniupdate_bounds((5, 5), (5, 5), 0., (0, 0), rid, 'b')
+    assert list(peers[rid]['b']['points']) == [5, 5, 25, 5, 15, 25]
+    assert list(peers[rid]['bbox']) == [5, 5, 25, 25]
+    aniupdate_bounds((0, 0), (0, 0), 0., (0, 0), rid, 'a')
+    assert list(peers[rid]['bbox']) == [0, 0, 20, 20]
+    version = rotabounds.versions[rid]
+    aniupdate_bounds(None, (0, 0), 0., (0, 0), rid, 'b')  # Still at (5, 5)
+    assert list(peers[rid]['bbox']) == [5, 5, 25, 25]
+    assert rotabounds.versions[rid] == version  # Not placed again
+
+
+def test_frame_key(body):
+    frames = {'a': [[(0, 0), (1, 0), (1, 1), (0, 1)]],
+              'b': [[(0, 0), (1, 0), (.5, 1)]]}
+    anim = body(frames, size=(20, 20))
+    corner = body(size=(5, 5), pos=(17, 17))
+    assert frame_key(anim.rid) == 'a'
+    assert collide_all([anim.rid, corner.rid])
+    anim.set_transform(frame='b')
+    assert frame_key(anim.rid) == 'b'
+    assert not collide_all([anim.rid, corner.rid])
+    assert frame_key(-1) == 'bounds'  # No owner
+
+
+def test_shared_templates(body):
+    shape = [[(0, 0), (1, 0), (.5, 1)]]
+    a = peers[body(shape, size=(10, 10)).rid]['bounds']
+    b = peers[body([list(pol) for pol in shape], size=(30, 30),
+                   pos=(5, 5)).rid]['bounds']
+    c = peers[body(shape, [0], size=(10, 10)).rid]['bounds']
+    assert a['shared'] is b['shared']
+    assert a['hints'] is b['hints'] and a['pol_ids'] is b['pol_ids']
+    assert a['points'] is not b['points']
+    assert list(a['points']) != list(b['points'])
+    assert c['shared'] is not a['shared']  # Opened
+
+
+def test_define_frame(body):
+    shape = [[(0, 0), (1, 0), (1, 1)], [(2, 2), (3, 2), (3, 3), (2, 3)]]
+    bounds = peers[body(shape, [1]).rid]['bounds']
+    assert list(bounds['hints']) == [0, 0, 1, 0, 1, 1, 2, 2, 3, 2, 3, 3, 2, 3]
+    assert list(bounds['pol_lens']) == [3, 4]
+    assert list(bounds['pol_ids']) == [0] * 6 + [1] * 8
+    assert list(bounds['pt_ids']) == [0, 0, 1, 1, 2, 2, 0, 0, 1, 1, 2, 2,
+                                      3, 3]
+    assert bounds['length'] == 14
+    assert list(bounds['opens']) == [1]
+
+
+def test_time_of_impact(body):
+    bounds = peers[body().rid]['bounds']
+    wall = (5., 100., 150., 0., 0., 152.5, 50.)
+    past = time_of_impact(bounds, True, (10., 10., 0., 45., 0., 5., 50.),
+                          (10., 10., 300., 45., 0., 305., 50.), RECT, False,
+                          wall, wall)
+    assert past[0] == pytest.approx(140. / 300)  # Not tunnelling
+    assert time_of_impact(bounds, True, (10., 10., 0., 200., 0., 5., 205.),
+                          (10., 10., 300., 200., 0., 305., 205.), RECT,
+                          False, wall, wall) is None
+    inside = (10., 10., 150., 45., 0., 155., 50.)
+    assert time_of_impact(bounds, True, inside, inside, RECT, False, wall,
+                          wall)[0] == 0
+    # A bar turning a quarter around its end, onto a box at 37 to 45 degrees
+    box = (10., 10., 30., 30., 0., 35., 35.)
+    t = time_of_impact(bounds, True, (50., 2., 0., -1., 0., 0., 0.),
+                       (50., 2., 0., -1., pi / 2, 0., 0.), RECT, False, box,
+                       box)[0]
+    assert .35 < t < atan2(30, 40) / (pi / 2)
+
+
+def test_contact_bounds(body):
+    a = body(size=(100, 100))
+    b = body(size=(20, 20), pos=(90, 40))
+    points, normal, depth = contact_bounds(a.rid, b.rid)
+    assert sorted(points) == [(100, 40), (100, 60)]
+    assert normal == pytest.approx((1, 0))
+    assert depth == pytest.approx(10)
+    b.set_transform(pos=(120, 40))
+    assert not contact_bounds(a.rid, b.rid)
+    member = body(segment_mode=False, size=(100, 100))
+    b.set_transform(pos=(40, 40))  # Inside, no sides crossing
+    points, normal, depth = contact_bounds(member.rid, b.rid)
+    assert points == []
+    assert depth > 0
+    assert not contact_bounds(a.rid, b.rid)  # Segment mode
+
+
+def test_headless():
+    code = ('import sys, rotabounds; sys.exit(any('
+            'name.split(".")[0] == "kivy" for name in sys.modules))')
+    assert subprocess.call([sys.executable, '-c', code],
+                           cwd=os.path.dirname(rotabounds.__file__)) == 0
+
+
+def test_local_bounds(body):
+    terrain = body(comb(8), size=(200, 100), local_index=True,
+                   lazy_update=True)
+    twin = body(comb(8), size=(200, 100))  # Placed right away
+    mover = body(size=(10, 10))
+    assert 'local_grid' in peers[terrain.rid]['bounds']
+    hits = set()
+    for angle in (0, 20, 200):
+        terrain.set_transform(pos=(10, 5), angle=angle)
+        twin.set_transform(pos=(10, 5), angle=angle)
+        for x in range(-10, 230, 7):
+            mover.set_transform(pos=(x, 75 - x * .2))
+            hit = bool(collide_bounds(twin.rid, mover.rid))
+            assert bool(local_bounds(terrain.rid, mover.rid)) == hit
+            assert bool(local_bounds(mover.rid, terrain.rid)) == hit
+            hits.add(hit)
+        assert terrain.rid in rotabounds.pending  # Its points weren't needed.
+    assert hits == set([True, False])
+
+
+BACKEND_RUN = '''
+import sys
+sys.modules['cybounds'] = None
+if sys.argv[1] == 'python':
+    sys.modules['numpy'] = None
+from rotabounds import Body, collide_bounds, contact_bounds
+shape = [[(0, 0), (1, .2), (.8, 1), (.1, .7)], [(.3, .3), (.6, .3), (.5, .5)]]
+results = []
+for mode in (True, False):
+    a = Body(shape, [1], segment_mode=mode, size=(100, 80), angle=20)
+    b = Body(shape, segment_mode=mode, size=(30, 30))
+    for x in range(-20, 120, 9):
+        b.set_transform(pos=(x, x * .5), angle=x)
+        contact = contact_bounds(a.rid, b.rid)
+        results.append((collide_bounds(a.rid, b.rid), a.collide_point(x, 40),
+                        contact and [len(contact[0]), round(contact[2], 6)]))
+print(repr(results))
+'''
+
+
+def test_numpy_backend():
+    pytest.importorskip('numpy')
+    outputs = [subprocess.check_output(
+        [sys.executable, '-c', BACKEND_RUN, backend],
+        cwd=os.path.dirname(rotabounds.__file__))
+        for backend in ('python', 'numpy')]
+    assert outputs[0] == outputs[1]
+    assert b'[0' in outputs[0] and b'False' in outputs[0]
@@ -0,0 +1,228 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+pytest.importorskip('kivy')
+
+from kivy.clock import Clock
+from kivy.uix.widget import Widget
+
+from rotabox import Rotabox, collide_all, update_rotaboxes, rotabox_at
+from rotabounds import peers, pending, static_segs, batch_transform_bounds
+
+
+def settle(frames=4):
+    '''Running the Clock until the widgets' scheduled updates are done.'''
+    for _ in range(frames):
+        Clock.tick()
+
+
+@pytest.fixture
+def rotabox():
+    '''Makes Rotaboxes (with Rotabox's properties), settled, and releases
+    their bounds after the test.
+    '''
+    made = []
+
+    def make(**kwargs):
+        made.append(Rotabox(**kwargs))
+        settle()
+        return made[-1]
+
+    yield make
+    for each in made:
+        each.allow_rotabox = False
+    settle()
+
+
+def test_collide_widget(rotabox):
+    bar = rotabox(size=(100, 50), angle=45)
+    corner = rotabox(size=(20, 20), pos=(90, 35))  # Over the bar's end
+    inside = rotabox(size=(10, 10), pos=(45, 20))
+    assert bar.collide_widget(corner) == [0, 0, 0, 0]
+    assert corner.collide_widget(bar) == [0, 0, 0, 0]
+    assert not bar.collide_widget(inside)  # No sides cross
+    assert bar.collide_widget(Widget(size=(20, 20), pos=(90, 35)))
+    corner.pos = (130, 35)
+    settle()
+    assert not bar.collide_widget(corner)
+
+
+def test_collide_all_rotaboxes(rotabox):
+    bar = rotabox(size=(100, 50), angle=45)
+    near = rotabox(size=(20, 20), pos=(90, 35))
+    far = rotabox(size=(20, 20), pos=(300, 300))
+    hits = collide_all([bar.rid, near.rid, far.rid])
+    assert [set(hit[:2]) for hit in hits] == [set([bar.rid, near.rid])]
+    # The bounds follow the widget.
+    far.pos = (-10, 20)
+    settle()
+    hits = collide_all([bar.rid, near.rid, far.rid])
+    assert len(hits) == 2
+    assert list(peers[far.rid]['bbox']) == [-10, 20, 10, 40]
+
+
+def test_absolute_update(rotabox):
+    shape = [[(0, 0), (1, .2), (.8, 1), (.1, .7)]]
+    relative = rotabox(custom_bounds=shape, size=(40, 30))
+    absolute = rotabox(custom_bounds=shape, size=(40, 30),
+                       absolute_update=True)
+    for pos, angle in (((10, 5), 30), ((-20, 40), 200), ((0, 0), 0)):
+        for widget in (relative, absolute):
+            widget.pos = pos
+            widget.angle = angle
+        settle()
+        points = peers[relative.rid]['bounds']['points']
+        assert (list(peers[absolute.rid]['bounds']['points'])
+                == pytest.approx(list(points)))
+
+
+@pytest.mark.parametrize('batch', [True, False])
+def test_update_rotaboxes(rotabox, monkeypatch, batch):
+    if not batch:  # As in the pure Python engine
+        monkeypatch.setattr('rotabox.batch_transform_bounds', None)
+    elif batch_transform_bounds is None:
+        pytest.skip('No batch version in the pure Python engine')
+    movers = [rotabox(size=(20, 10), absolute_update=True) for n in range(3)]
+    still = rotabox(size=(20, 10))
+    for n, widget in enumerate(movers + [still]):
+        widget.pos = (n * 30, 5)
+        widget.angle = 90
+    update_rotaboxes(movers + [still])  # Before their scheduled updates
+    for n, widget in enumerate(movers):
+        assert list(peers[widget.rid]['bbox']) == pytest.approx(
+            [n * 30 + 5, 0, n * 30 + 15, 20])
+    assert list(peers[still.rid]['bbox']) == [0, 0, 20, 10]  # Not absolute
+    settle()
+    assert list(peers[still.rid]['bbox']) == pytest.approx([95, 0, 105, 20])
+
+
+def test_rotabox_at(rotabox):
+    root = Widget()
+    below = rotabox(size=(100, 100))
+    above = rotabox(size=(100, 20), pos=(0, 40), angle=45)
+    root.add_widget(below)
+    root.add_widget(above)  # Drawn last
+    settle()
+    assert rotabox_at(50, 50) is above
+    assert rotabox_at(10, 90) is below  # In [above]'s bbox only
+    assert rotabox_at(200, 200) is None
+    root.remove_widget(above)
+    settle()
+    assert rotabox_at(50, 50) is below
+
+
+def test_lazy_update(rotabox):
+    decor = rotabox(size=(40, 30), lazy_update=True)
+    points = list(peers[decor.rid]['bounds']['points'])
+    decor.pos = (100, 100)
+    decor.angle = 90
+    settle()
+    assert decor.rid in pending
+    assert list(peers[decor.rid]['bounds']['points']) == points
+    assert list(peers[decor.rid]['bbox']) == pytest.approx(
+        [95, 90, 145, 140])  # The bounding circle's
+    assert decor.collide_point(120, 130)  # Placed on demand
+    assert decor.rid not in pending
+    assert not decor.collide_point(100, 115)
+    assert list(peers[decor.rid]['bbox']) == pytest.approx(
+        [105, 95, 135, 135])
+
+
+def write_project(tmpdir, name, points):
+    filename = str(tmpdir.join(name))
+    with open(filename, 'w') as proj:
+        json.dump({'image': 'x.png', 'version': '0.13.0', 'img': {
+            '0': {'number': 0, 'points': points}}}, proj)
+    return filename
+
+
+def wait_for_bounds(widget, timeout=5.):
+    '''Running the Clock until [widget]'s bounds file is installed.'''
+    deadline = time.time() + timeout
+    while widget.bounds_token is not None and time.time() < deadline:
+        settle(1)
+    settle()
+
+
+def test_read_bounds_async(rotabox, tmpdir):
+    triangle = write_project(tmpdir, 'a.bounds', [[0, 0], [50, 0], [0, 50]])
+    square = write_project(tmpdir, 'b.bounds',
+                           [[0, 0], [20, 0], [20, 20], [0, 20]])
+    widget = rotabox(size=(100, 100))
+    default = widget.custom_bounds
+    widget.read_bounds_async(triangle)
+    widget.read_bounds_async(square)  # Supersedes the triangle
+    assert widget.custom_bounds is default  # Until it's read
+    wait_for_bounds(widget)
+    assert widget.custom_bounds == [[(0, 0), (.2, 0), (.2, .2), (0, .2)]]
+    assert widget.collide_point(10, 10)
+    assert not widget.collide_point(30, 10)
+
+    # A file that can't be read leaves the bounds as they are.
+    widget.read_bounds_async(str(tmpdir.join('missing.bounds')))
+    wait_for_bounds(widget)
+    assert widget.custom_bounds == [[(0, 0), (.2, 0), (.2, .2), (0, .2)]]
+
+
+@pytest.mark.parametrize('plain', [False, True])
+def test_collide_swept(rotabox, plain):
+    if plain:
+        wall = Widget(size=(5, 100), pos=(150, 0))
+    else:
+        wall = rotabox(size=(5, 100), pos=(150, 0))
+    bullet = rotabox(size=(10, 10), pos=(0, 45))
+    assert bullet.collide_swept(wall) is None  # Still
+    bullet.x = 300  # Through the wall in one frame
+    settle()
+    assert not bullet.collide_widget(wall)
+    t, side, wside = bullet.collide_swept(wall)
+    assert t == pytest.approx(140. / 300)
+    assert side == [0, 1]  # The bullet's right side
+    assert wside == [0, 3]  # The wall's left one
+    if not plain:
+        wall.y = 1  # A later update: the bullet now counts as still.
+        settle()
+        assert bullet.collide_swept(wall) is None
+
+
+def test_collide_contact(rotabox):
+    box = rotabox(size=(100, 100))
+    tile = rotabox(size=(20, 20), pos=(90, 40))  # 10 into the right side
+    plain = Widget(size=(20, 20), pos=(90, 40))
+    for other in (tile, plain):
+        points, normal, depth = box.collide_contact(other)
+        assert sorted(points) == [(100, 40), (100, 60)]
+        assert normal == pytest.approx((1, 0))
+        assert depth == pytest.approx(10)
+    points, normal, depth = tile.collide_contact(box)
+    assert normal == pytest.approx((-1, 0))  # Towards the other party
+    tile.pos = (150, 40)
+    settle()
+    assert box.collide_contact(tile) is False
+    assert box.collide_contact(Widget(size=(20, 20), pos=(150, 40))) is False
+
+
+def test_static(rotabox):
+    wall = rotabox(size=(10, 100), pos=(100, 0), static=True)
+    mover = rotabox(size=(20, 20), pos=(95, 40))
+    assert wall.rid in static_segs
+    assert collide_all([mover.rid, wall.rid]) == [
+        [mover.rid, wall.rid, [0, 0, 0, 1]]]
+    assert mover.collide_widget(wall)
+
+    wall.x = 300  # Baked again where it goes
+    settle()
+    assert wall.baked[2] == 300
+    assert collide_all([mover.rid, wall.rid]) == []
+
+    wall.static = False
+    settle()
+    assert wall.rid not in static_segs
+    assert wall.baked is None